@@ -1,36 +1,31 @@
-import yfinance as yf
 import pandas as pd
+from fundamentals import FundamentalsCache, STATEMENTS, get_ticker
+
+# Info and statements are fetched once per ticker and served from local snapshots until they expire
+fundamentals = FundamentalsCache()
 
 def fetch_historical_data(ticker, period="1y"):
-    stock = yf.Ticker(ticker)
+    stock = get_ticker(ticker)
     hist = stock.history(period=period)
     return hist
 
 def fetch_company_info(ticker):
-    stock = yf.Ticker(ticker)
-    info = stock.info
+    info = fundamentals.snapshot(ticker)['info']
     return info
 
 def fetch_financials(ticker):
-    stock = yf.Ticker(ticker)
-    financials = {
-        "Income Statement": stock.financials,
-        "Quarterly Income Statement": stock.quarterly_financials,
-        "Balance Sheet": stock.balance_sheet,
-        "Quarterly Balance Sheet": stock.quarterly_balance_sheet,
-        "Cash Flow": stock.cashflow,
-        "Quarterly Cash Flow": stock.quarterly_cashflow
-    }
+    snapshot = fundamentals.snapshot(ticker)
+    financials = {name: snapshot[name] for name in STATEMENTS}
     return financials
 
 def fetch_key_metrics(ticker):
-    stock = yf.Ticker(ticker)
+    info = fundamentals.snapshot(ticker)['info']
     metrics = {
-        "Sector": stock.info.get('sector'),
-        "Trailing P/E": stock.info.get('trailingPE'),
-        "Beta": stock.info.get('beta'),
-        "Market Cap": stock.info.get('marketCap'),
-        "Dividend Yield": stock.info.get('dividendYield')
+        "Sector": info.get('sector'),
+        "Trailing P/E": info.get('trailingPE'),
+        "Beta": info.get('beta'),
+        "Market Cap": info.get('marketCap'),
+        "Dividend Yield": info.get('dividendYield')
     }
     return metrics
 
@@ -38,7 +33,12 @@ def main():
     tickers = ['AAPL', 'MSFT', 'GOOGL']
     period = "1y"
     
-    for ticker in tickers:
+    # Refresh the expired snapshots of every ticker at once
+    _, failed = fundamentals.snapshots(tickers)
+    for ticker in failed:
+        print(f"Failed to fetch fundamentals for {ticker}")
+    
+    for ticker in [ticker for ticker in tickers if ticker not in failed]:
         print(f"\nFetching data for {ticker}...\n")
         
         # Fetch historical data
@@ -1,6 +1,6 @@
 import yfinance as yf
 import pandas as pd
-import numpy as np
+from pf_metrics import benchmark_returns, risk_metrics, rank_universe
 
 def fetch_historical_data(ticker, start_date, end_date):
     stock = yf.Ticker(ticker)
@@ -8,37 +8,19 @@ def fetch_historical_data(ticker, start_date, end_date):
     return hist
 
 def calculate_metrics(hist, risk_free_rate=0.01):
-    # Calculate daily returns
-    daily_returns = hist['Close'].pct_change().dropna()
+    # Daily returns of one ticker, or of one column per ticker
+    closes = hist['Close']
+    daily_returns = closes.pct_change(fill_method=None).dropna(how='all')
+    if isinstance(daily_returns, pd.Series):
+        daily_returns = daily_returns.to_frame()
     
-    # Calculate annualized return
-    annualized_return = daily_returns.mean() * 252
+    # SPY benchmark, fetched once per date range however many tickers are measured
+    benchmark = benchmark_returns(hist.index[0].date(), hist.index[-1].date())
     
-    # Calculate annualized volatility
-    annualized_volatility = daily_returns.std() * np.sqrt(252)
-    
-    # Calculate Sharpe Ratio
-    sharpe_ratio = (annualized_return - risk_free_rate) / annualized_volatility
-    
-    # Calculate Sortino Ratio
-    downside_returns = daily_returns[daily_returns < 0]
-    downside_volatility = downside_returns.std() * np.sqrt(252)
-    sortino_ratio = (annualized_return - risk_free_rate) / downside_volatility
-    
-    # Calculate Information Ratio (assuming SPY as benchmark)
-    benchmark = yf.Ticker('SPY').history(start=hist.index[0], end=hist.index[-1])
-    benchmark_returns = benchmark['Close'].pct_change().dropna()
-    excess_returns = daily_returns - benchmark_returns
-    tracking_error = excess_returns.std() * np.sqrt(252)
-    information_ratio = (annualized_return - benchmark_returns.mean() * 252) / tracking_error
-    
-    metrics = {
-        'Annualized Return': annualized_return,
-        'Annualized Volatility': annualized_volatility,
-        'Sharpe Ratio': sharpe_ratio,
-        'Sortino Ratio': sortino_ratio,
-        'Information Ratio': information_ratio
-    }
+    # Every metric of every ticker in one vectorized pass
+    metrics = risk_metrics(daily_returns, benchmark, risk_free_rate)
+    if isinstance(closes, pd.Series):
+        return metrics.iloc[0].to_dict()
     return metrics
 
 def main():
@@ -47,16 +29,20 @@ def main():
     end_date = '2023-01-01'
     risk_free_rate = 0.01
     
+    closes = {}
     for ticker in tickers:
         print(f"\nFetching data for {ticker}...\n")
         
         # Fetch historical data
         hist_data = fetch_historical_data(ticker, start_date, end_date)
         print(f"Historical Data for {ticker}:\n", hist_data.head(), "\n")
-        
-        # Calculate metrics
-        metrics = calculate_metrics(hist_data, risk_free_rate)
-        print(f"Metrics for {ticker}:\n", metrics, "\n")
+        closes[ticker] = hist_data['Close']
+    
+    # Rank the whole universe in one call, against a benchmark fetched once
+    daily_returns = pd.DataFrame(closes).pct_change(fill_method=None).dropna(how='all')
+    benchmark = benchmark_returns(start_date, end_date)
+    ranking = rank_universe(daily_returns, 'Sharpe Ratio', benchmark, risk_free_rate)
+    print("Metrics by Sharpe Ratio:\n", ranking, "\n")
 
 if __name__ == "__main__":
     main()
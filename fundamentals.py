@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import shutil
+import functools
+import concurrent.futures
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# Directory of the fundamentals snapshots
+DEFAULT_ROOT = 'fundamentals_cache'
+
+# Age in seconds after which a snapshot is refreshed
+DEFAULT_TTL = 24 * 3600
+
+# Layout version of the snapshots; snapshots written with another layout are refetched
+SNAPSHOT_FORMAT = 1
+
+# Statements kept in a snapshot, with the yf.Ticker attribute each comes from
+STATEMENTS = {
+    "Income Statement": 'financials',
+    "Quarterly Income Statement": 'quarterly_financials',
+    "Balance Sheet": 'balance_sheet',
+    "Quarterly Balance Sheet": 'quarterly_balance_sheet',
+    "Cash Flow": 'cashflow',
+    "Quarterly Cash Flow": 'quarterly_cashflow'
+}
+
+@functools.lru_cache(maxsize=None)
+def get_ticker(symbol):
+    """
+    The one yf.Ticker object of a symbol, shared by every caller of the process.
+    """
+    return yf.Ticker(symbol)
+
+def _statement_file(name):
+    return name.lower().replace(' ', '_') + '.npz'
+
+def _save_statement(path, statement):
+    # Columnar: one float matrix plus its line items and period dates
+    statement = statement.apply(pd.to_numeric, errors='coerce')
+    np.savez(path, values=statement.to_numpy(dtype=float), items=np.array(statement.index, dtype=str),
+             periods=np.array(pd.to_datetime(statement.columns), dtype='datetime64[ns]'))
+
+def _load_statement(path):
+    with np.load(path) as data:
+        return pd.DataFrame(data['values'], index=data['items'], columns=pd.DatetimeIndex(data['periods']))
+
+class FundamentalsCache:
+    """
+    Local snapshots of company info and financial statements, refreshed after a time to live.
+
+    A refresh builds one yf.Ticker, reads its info once and every statement
+    of STATEMENTS once, and writes them into a new numbered snapshot
+    directory (info.json plus one .npz per statement). The ticker's
+    manifest.json then switches to the new version. The version it replaces
+    is kept for one more refresh, so a reader that opened the old manifest
+    just before the switch can still load it; older ones are removed. Reads
+    within the time to live never touch the network, and a snapshot version
+    is read from disk once per cache object. A failed refresh falls back to
+    the expired snapshot when there is one.
+
+    Attributes:
+    root : str : directory of the snapshots
+    ttl : float : age in seconds after which a snapshot is refreshed
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, ttl=DEFAULT_TTL):
+        self.root = root
+        self.ttl = ttl
+        # Last snapshot loaded for each ticker, as (version, snapshot)
+        self._loaded = {}
+
+    def _directory(self, ticker):
+        return os.path.join(self.root, ticker.replace(os.sep, '_'))
+
+    def manifest(self, ticker):
+        """
+        Manifest of the current snapshot of a ticker ('format', 'version', 'fetched_at'), None if there is none.
+        """
+        path = os.path.join(self._directory(ticker), 'manifest.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as file:
+            return json.load(file)
+
+    def is_fresh(self, ticker):
+        manifest = self.manifest(ticker)
+        return (manifest is not None and manifest['format'] == SNAPSHOT_FORMAT
+                and time.time() - manifest['fetched_at'] < self.ttl)
+
+    def refresh(self, ticker):
+        """
+        Fetch info and statements of a ticker and store them as its next snapshot version.
+        """
+        stock = get_ticker(ticker)
+        info = stock.info
+        statements = {name: getattr(stock, attribute) for name, attribute in STATEMENTS.items()}
+
+        directory = self._directory(ticker)
+        previous = self.manifest(ticker)
+        version = 1 if previous is None else previous['version'] + 1
+        snapshot = os.path.join(directory, f"v{version}")
+        os.makedirs(snapshot, exist_ok=True)
+        with open(os.path.join(snapshot, 'info.json'), 'w') as file:
+            json.dump(info, file, default=str)
+        for name, statement in statements.items():
+            _save_statement(os.path.join(snapshot, _statement_file(name)), statement)
+
+        manifest = {'format': SNAPSHOT_FORMAT, 'version': version, 'fetched_at': time.time()}
+        with open(os.path.join(directory, 'manifest.tmp.json'), 'w') as file:
+            json.dump(manifest, file)
+        os.replace(os.path.join(directory, 'manifest.tmp.json'), os.path.join(directory, 'manifest.json'))
+        for name in os.listdir(directory):
+            if name.startswith('v') and name[1:].isdigit() and int(name[1:]) < version - 1:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    def snapshot(self, ticker):
+        """
+        Info and statements of a ticker, from the local snapshot unless it is missing or expired.
+
+        The snapshot of a version already loaded is returned from memory and
+        shared between callers, so it must not be modified.
+
+        Returns:
+        snapshot : dict : 'info' (dict) and one DataFrame per STATEMENTS name (line items x periods)
+        """
+        if not self.is_fresh(ticker):
+            try:
+                self.refresh(ticker)
+            except Exception:
+                if self.manifest(ticker) is None:
+                    raise
+        version = self.manifest(ticker)['version']
+        loaded = self._loaded.get(ticker)
+        if loaded is not None and loaded[0] == version:
+            return loaded[1]
+        snapshot_directory = os.path.join(self._directory(ticker), f"v{version}")
+        with open(os.path.join(snapshot_directory, 'info.json')) as file:
+            snapshot = {'info': json.load(file)}
+        for name in STATEMENTS:
+            snapshot[name] = _load_statement(os.path.join(snapshot_directory, _statement_file(name)))
+        self._loaded[ticker] = (version, snapshot)
+        return snapshot
+
+    def snapshots(self, tickers, workers=8):
+        """
+        Snapshots of many tickers, the stale ones refreshed concurrently.
+
+        Returns:
+        snapshots : dict : snapshot of each ticker that could be fetched
+        failed : list : tickers with neither a snapshot nor a successful fetch
+        """
+        snapshots, failed = {}, []
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            futures = {executor.submit(self.snapshot, ticker): ticker for ticker in tickers}
+            for future, ticker in futures.items():
+                try:
+                    snapshots[ticker] = future.result()
+                except Exception:
+                    failed.append(ticker)
+        return snapshots, failed
@@ -1,22 +1,27 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from functools import partial
+from mc_parallel import run_parallel
 
-def simulate_bernoulli_trials(num_trials, prob_success):
+def simulate_bernoulli_trials(num_trials, prob_success, rng=None):
     """
     Simulate a series of Bernoulli trials.
     
     Parameters:
     num_trials : int : number of trials
     prob_success : float : probability of success for each trial
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     successes : int : number of successes
     """
-    trials = np.random.binomial(1, prob_success, num_trials)
+    if rng is None:
+        rng = np.random.default_rng()
+    trials = rng.binomial(1, prob_success, num_trials)
     successes = np.sum(trials)
     return successes
 
-def monte_carlo_bernoulli_simulation(num_trials, prob_success, target_successes, iterations):
+def monte_carlo_bernoulli_simulation(num_trials, prob_success, target_successes, iterations, rng=None):
     """
     Perform a Monte Carlo simulation to estimate the probability of achieving a certain number of successes.
     
@@ -25,13 +30,15 @@ def monte_carlo_bernoulli_simulation(num_trials, prob_success, target_successes,
     prob_success : float : probability of success for each trial
     target_successes : int : target number of successes
     iterations : int : number of Monte Carlo simulations
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     success_counts : ndarray : simulated number of successes
     """
-    success_counts = np.zeros(iterations)
-    for i in range(iterations):
-        success_counts[i] = simulate_bernoulli_trials(num_trials, prob_success)
+    if rng is None:
+        rng = np.random.default_rng()
+    # The number of successes in num_trials Bernoulli trials is binomial
+    success_counts = rng.binomial(num_trials, prob_success, iterations).astype(float)
     return success_counts
 
 def plot_success_distribution(success_counts, target_successes):
@@ -51,24 +58,28 @@ def plot_success_distribution(success_counts, target_successes):
     plt.legend()
     plt.show()
 
-# Parameters
-num_trials = 100  # Number of trials
-prob_success = 0.5  # Probability of success for each trial
-target_successes = 60  # Target number of successes
-iterations = 10000  # Number of Monte Carlo simulations
+if __name__ == "__main__":
+    # Parameters
+    num_trials = 100  # Number of trials
+    prob_success = 0.5  # Probability of success for each trial
+    target_successes = 60  # Target number of successes
+    iterations = 10000  # Number of Monte Carlo simulations
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
 
-# Run the Monte Carlo simulation
-success_counts = monte_carlo_bernoulli_simulation(num_trials, prob_success, target_successes, iterations)
+    # Run the Monte Carlo simulation
+    simulate = partial(monte_carlo_bernoulli_simulation, num_trials, prob_success, target_successes)
+    success_counts = run_parallel(simulate, iterations, seed=seed, workers=workers)
 
-# Analyze the results
-mean_successes = np.mean(success_counts)
-median_successes = np.median(success_counts)
-probability_target_successes = np.sum(success_counts >= target_successes) / iterations
+    # Analyze the results
+    mean_successes = np.mean(success_counts)
+    median_successes = np.median(success_counts)
+    probability_target_successes = np.sum(success_counts >= target_successes) / iterations
 
-# Print the results
-print(f"Mean number of successes: {mean_successes:.2f}")
-print(f"Median number of successes: {median_successes:.2f}")
-print(f"Probability of achieving at least {target_successes} successes: {probability_target_successes:.2%}")
+    # Print the results
+    print(f"Mean number of successes: {mean_successes:.2f}")
+    print(f"Median number of successes: {median_successes:.2f}")
+    print(f"Probability of achieving at least {target_successes} successes: {probability_target_successes:.2%}")
 
-# Plot the distribution of the number of successes
-plot_success_distribution(success_counts, target_successes)
+    # Plot the distribution of the number of successes
+    plot_success_distribution(success_counts, target_successes)
@@ -1,7 +1,52 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from collections import OrderedDict
+from functools import partial
+from scipy.stats import norm
+from mc_paths import simulate_gbm_paths, simulate_terminal_values, gbm_increments
+from mc_qmc import rqmc_estimate
+from mc_parallel import run_parallel, concatenate_paths, DEFAULT_BLOCK_SIZE
 
-def simulate_stock_paths(S0, r, sigma, T, M, I):
+# Maximum number of simulation results kept in the memo cache
+SIMULATION_CACHE_SIZE = 8
+
+_simulation_cache = OrderedDict()
+
+class SimulationResult:
+    """
+    Simulated Black-Scholes prices shared by the pricer, the plots and the statistics.
+    
+    Attributes:
+    S0, r, sigma, T, M, I, seed : inputs the simulation was run with
+    antithetic, moment_matching, sampler : sampling options the shocks were drawn with
+    block_size : int : number of paths per independent block; antithetic pairs and moment matching
+                       stay within a block
+    paths : ndarray : simulated paths of shape (M + 1, I), or None for a terminal-only run
+    final_prices : ndarray : simulated terminal prices of shape (I,)
+    """
+
+    def __init__(self, S0, r, sigma, T, M, I, seed, paths=None, final_prices=None,
+                 antithetic=False, moment_matching=False, sampler='pseudo', block_size=None):
+        self.S0 = S0
+        self.r = r
+        self.sigma = sigma
+        self.T = T
+        self.M = M
+        self.I = I
+        self.seed = seed
+        self.antithetic = antithetic
+        self.moment_matching = moment_matching
+        self.sampler = sampler
+        self.block_size = I if block_size is None else block_size
+        self.paths = paths
+        self.final_prices = paths[-1] if final_prices is None else final_prices
+
+    @property
+    def discount_factor(self):
+        return np.exp(-self.r * self.T)
+
+def simulate_stock_paths(S0, r, sigma, T, M, I, out=None, rng=None, antithetic=False, moment_matching=False,
+                         sampler='pseudo'):
     """
     Simulate stock price paths using Geometric Brownian Motion.
     
@@ -12,19 +57,191 @@ def simulate_stock_paths(S0, r, sigma, T, M, I):
     T : float : time to maturity
     M : int : number of time steps
     I : int : number of simulations
+    out : ndarray : optional buffer of shape (M + 1, I) to fill
+    rng : np.random.Generator : random number generator (a fresh one if None)
+    antithetic : bool : pair every path with its mirrored path
+    moment_matching : bool : match the first two moments of the shocks at every step
+    sampler : str : 'pseudo' or 'sobol' (scrambled Sobol with Brownian-bridge construction)
     
     Returns:
     paths : ndarray : simulated stock price paths
     """
     dt = T / M
-    paths = np.zeros((M + 1, I))
-    paths[0] = S0
-    for t in range(1, M + 1):
-        z = np.random.standard_normal(I)
-        paths[t] = paths[t - 1] * np.exp((r - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * z)
+    drift, diffusion = gbm_increments(r, sigma, dt)
+    paths = simulate_gbm_paths(S0, drift, diffusion, M, I, out=out, rng=rng,
+                               antithetic=antithetic, moment_matching=moment_matching, sampler=sampler)
     return paths
 
-def calculate_option_price(S0, K, r, sigma, T, M, I):
+def simulate(S0, r, sigma, T, M, I, seed=None, store_paths=True, antithetic=False, moment_matching=False,
+             sampler='pseudo', workers=1):
+    """
+    Run (or reuse) a Black-Scholes simulation.
+    
+    Seeded runs are memoized in an LRU cache keyed by the market inputs and
+    the seed, so repeated calls with the same inputs skip the simulation. The
+    cached arrays are read-only because they are shared between callers.
+    Unseeded runs are always fresh and never cached. The paths are simulated
+    in blocks with independent streams, so a seeded result is the same
+    whatever the number of workers. Antithetic mirroring and moment matching
+    are applied within each block.
+    
+    Parameters:
+    S0 : float : initial stock price
+    r : float : risk-free rate
+    sigma : float : volatility
+    T : float : time to maturity
+    M : int : number of time steps
+    I : int : number of simulations
+    seed : int : seed of the random number generator, None for an uncached random run
+    store_paths : bool : keep the full paths, or only sample the terminal prices
+    antithetic : bool : pair every path with its mirrored path (I must be even)
+    moment_matching : bool : match the first two moments of the shocks
+    sampler : str : 'pseudo' or 'sobol' (scrambled Sobol with Brownian-bridge construction)
+    workers : int : number of worker processes, None for every core
+    
+    Returns:
+    result : SimulationResult : simulated prices
+    """
+    key = (S0, r, sigma, T, M, I, seed, store_paths, antithetic, moment_matching, sampler)
+    if seed is not None and key in _simulation_cache:
+        _simulation_cache.move_to_end(key)
+        return _simulation_cache[key]
+
+    result = _run_simulation(S0, r, sigma, T, M, I, seed, store_paths, antithetic, moment_matching, sampler,
+                             workers=workers)
+
+    if seed is not None:
+        _simulation_cache[key] = result
+        if len(_simulation_cache) > SIMULATION_CACHE_SIZE:
+            _simulation_cache.popitem(last=False)
+    return result
+
+def _run_simulation(S0, r, sigma, T, M, I, seed, store_paths, antithetic, moment_matching, sampler,
+                    workers=1, rng=None):
+    options = {'antithetic': antithetic, 'moment_matching': moment_matching, 'sampler': sampler}
+    if store_paths:
+        simulate_block = partial(simulate_stock_paths, S0, r, sigma, T, M, **options)
+        combine = concatenate_paths
+    else:
+        # A European payoff only depends on the terminal price, so sample it directly
+        drift, diffusion = gbm_increments(r, sigma, T / M)
+        simulate_block = partial(simulate_terminal_values, S0, drift, diffusion, M, **options)
+        combine = np.concatenate
+
+    # A Sobol sequence keeps its balance properties only in one piece, so it is never split
+    block_size = I if rng is not None or sampler == 'sobol' else DEFAULT_BLOCK_SIZE
+    if rng is not None:
+        values = simulate_block(I, rng=rng)
+    else:
+        values = run_parallel(simulate_block, I, seed=seed, workers=workers, block_size=block_size, combine=combine)
+    values.flags.writeable = False
+
+    if store_paths:
+        return SimulationResult(S0, r, sigma, T, M, I, seed, paths=values, block_size=block_size, **options)
+    return SimulationResult(S0, r, sigma, T, M, I, seed, final_prices=values, block_size=block_size, **options)
+
+def _antithetic_means(samples, block_size):
+    # Every block mirrors its own shocks, so the first half of a block pairs with its second half
+    means = []
+    for start in range(0, samples.size, block_size):
+        block = samples[start:start + block_size]
+        half = block.size // 2
+        means.append(0.5 * (block[:half] + block[half:]))
+    return np.concatenate(means)
+
+def clear_simulation_cache():
+    """
+    Drop every memoized simulation result.
+    """
+    _simulation_cache.clear()
+
+def black_scholes_price(S0, K, r, sigma, T, option_type='call'):
+    """
+    Calculate the closed-form Black-Scholes price of a European option.
+    
+    Parameters:
+    S0 : float : initial stock price
+    K : float or ndarray : strike price
+    r : float : risk-free rate
+    sigma : float : volatility
+    T : float or ndarray : time to maturity
+    option_type : str : 'call' or 'put'
+    
+    Returns:
+    price : float or ndarray : option price
+    """
+    sqrt_T = np.sqrt(T)
+    d1 = (np.log(S0 / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt_T)
+    d2 = d1 - sigma * sqrt_T
+    discounted_strike = K * np.exp(-r * T)
+    if option_type == 'call':
+        return S0 * norm.cdf(d1) - discounted_strike * norm.cdf(d2)
+    if option_type == 'put':
+        return discounted_strike * norm.cdf(-d2) - S0 * norm.cdf(-d1)
+    raise ValueError(f"option_type must be 'call' or 'put', got {option_type!r}")
+
+def estimate_option_price(S0, K, r, sigma, T, M, I, seed=None, result=None,
+                          antithetic=False, moment_matching=False, control_variate=False, sampler='pseudo'):
+    """
+    Estimate the price of a European call option with its Monte Carlo standard error.
+    
+    The control variate is the discounted terminal stock price, whose
+    Black-Scholes value is exactly S0; its coefficient is estimated from the
+    same sample. Antithetic pairs are averaged before any statistic is taken,
+    so the standard error accounts for their correlation. With moment
+    matching the samples are no longer independent and the reported standard
+    error is the usual i.i.d. approximation; the same holds for a single
+    Sobol run, use estimate_option_price_rqmc for a valid QMC error bar.
+    
+    Parameters:
+    S0 : float : initial stock price
+    K : float : strike price
+    r : float : risk-free rate
+    sigma : float : volatility
+    T : float : time to maturity
+    M : int : number of time steps
+    I : int : number of simulations
+    seed : int : seed of the random number generator, enables the memo cache
+    result : SimulationResult : existing simulation to price from instead of simulating
+    antithetic : bool : use antithetic variates (ignored when result is given)
+    moment_matching : bool : match the first two moments of the shocks (ignored when result is given)
+    control_variate : bool : correct the estimate with the discounted terminal stock price
+    sampler : str : 'pseudo' or 'sobol' (ignored when result is given)
+    
+    Returns:
+    estimate : dict : 'price', 'std_error', the 'plain_std_error' of crude Monte Carlo
+                      with the same number of paths, and the effective 'speedup'
+    """
+    if result is None:
+        result = simulate(S0, r, sigma, T, M, I, seed=seed, store_paths=False,
+                          antithetic=antithetic, moment_matching=moment_matching, sampler=sampler)
+    discount_factor = result.discount_factor
+    payoffs = discount_factor * np.maximum(result.final_prices - K, 0)
+    plain_std_error = payoffs.std(ddof=1) / np.sqrt(payoffs.size)
+
+    samples = payoffs
+    controls = discount_factor * result.final_prices
+    if result.antithetic:
+        samples = _antithetic_means(samples, result.block_size)
+        controls = _antithetic_means(controls, result.block_size)
+    if control_variate:
+        covariance = np.cov(samples, controls)
+        beta = covariance[0, 1] / covariance[1, 1] if covariance[1, 1] > 0 else 0.0
+        samples = samples - beta * (controls - result.S0)
+
+    price = np.mean(samples)
+    std_error = samples.std(ddof=1) / np.sqrt(samples.size)
+    speedup = (plain_std_error / std_error) ** 2 if std_error > 0 else np.inf
+    estimate = {
+        'price': price,
+        'std_error': std_error,
+        'plain_std_error': plain_std_error,
+        'speedup': speedup
+    }
+    return estimate
+
+def calculate_option_price(S0, K, r, sigma, T, M, I, seed=None, result=None,
+                           antithetic=False, moment_matching=False, control_variate=False, sampler='pseudo'):
     """
     Calculate the price of a European call option using Monte Carlo simulation.
     
@@ -36,14 +253,242 @@ def calculate_option_price(S0, K, r, sigma, T, M, I):
     T : float : time to maturity
     M : int : number of time steps
     I : int : number of simulations
+    seed : int : seed of the random number generator, enables the memo cache
+    result : SimulationResult : existing simulation to price from instead of simulating
+    antithetic : bool : use antithetic variates
+    moment_matching : bool : match the first two moments of the shocks
+    control_variate : bool : correct the estimate with the discounted terminal stock price
+    sampler : str : 'pseudo' or 'sobol'
     
     Returns:
     option_price : float : estimated option price
     """
-    paths = simulate_stock_paths(S0, r, sigma, T, M, I)
-    payoffs = np.maximum(paths[-1] - K, 0)
-    option_price = np.exp(-r * T) * np.mean(payoffs)
-    return option_price
+    estimate = estimate_option_price(S0, K, r, sigma, T, M, I, seed=seed, result=result,
+                                     antithetic=antithetic, moment_matching=moment_matching,
+                                     control_variate=control_variate, sampler=sampler)
+    return estimate['price']
+
+def estimate_option_price_rqmc(S0, K, r, sigma, T, M, I, replicates=16, seed=None, store_paths=False,
+                               antithetic=False, control_variate=False):
+    """
+    Estimate the price of a European call option with randomized quasi-Monte Carlo.
+    
+    Each replicate prices the option on an independently scrambled Sobol
+    sequence of I points (best a power of two); the spread of the replicates
+    gives the standard error. The speedup is measured against crude Monte
+    Carlo with the same total number of paths, replicates * I.
+    
+    Parameters:
+    S0 : float : initial stock price
+    K : float : strike price
+    r : float : risk-free rate
+    sigma : float : volatility
+    T : float : time to maturity
+    M : int : number of time steps
+    I : int : number of points per replicate
+    replicates : int : number of independent scramblings
+    seed : int : seed the replicate streams are spawned from
+    store_paths : bool : simulate full Brownian-bridge paths instead of sampling the terminal price
+    antithetic : bool : use antithetic variates within each replicate
+    control_variate : bool : correct each replicate with the discounted terminal stock price
+    
+    Returns:
+    estimate : dict : 'price', 'std_error', 'plain_std_error' and 'speedup'
+    """
+    plain_std_errors = []
+
+    def estimator(rng):
+        result = _run_simulation(S0, r, sigma, T, M, I, None, store_paths, antithetic, False, 'sobol', rng=rng)
+        replicate = estimate_option_price(S0, K, r, sigma, T, M, I, result=result,
+                                          control_variate=control_variate)
+        plain_std_errors.append(replicate['plain_std_error'])
+        return replicate['price']
+
+    rqmc = rqmc_estimate(estimator, replicates, seed)
+    plain_std_error = np.mean(plain_std_errors) / np.sqrt(replicates)
+    std_error = rqmc['std_error']
+    estimate = {
+        'price': rqmc['value'],
+        'std_error': std_error,
+        'plain_std_error': plain_std_error,
+        'speedup': (plain_std_error / std_error) ** 2 if std_error > 0 else np.inf
+    }
+    return estimate
+
+def price_option_chain(S0, r, sigma, strikes, maturities, I, seed=None, antithetic=False,
+                       moment_matching=False, sampler='pseudo'):
+    """
+    Price a whole chain of European calls and puts from one shared simulation.
+    
+    The paths are simulated once up to the longest maturity, on a time grid
+    made of the maturities themselves, so every expiry is read from the same
+    paths. For each expiry the terminal prices are sorted once and all
+    strikes are evaluated together from prefix sums, so the cost grows with
+    the number of expiries rather than with the size of the chain.
+    
+    Parameters:
+    S0 : float : initial stock price
+    r : float : risk-free rate
+    sigma : float : volatility
+    strikes : array-like : strike prices
+    maturities : array-like : times to maturity
+    I : int : number of simulations
+    seed : int : seed of the random number generator
+    antithetic : bool : pair every path with its mirrored path (I must be even)
+    moment_matching : bool : match the first two moments of the shocks
+    sampler : str : 'pseudo' or 'sobol'
+    
+    Returns:
+    chain : dict : 'strikes' and 'maturities' (sorted), and 'call' and 'put' price
+                   arrays of shape (len(maturities), len(strikes))
+    """
+    strikes = np.sort(np.asarray(strikes, dtype=float))
+    maturities = np.sort(np.unique(np.asarray(maturities, dtype=float)))
+    if maturities[0] <= 0:
+        raise ValueError("maturities must be positive")
+
+    # One simulation on the grid of expiries: step j runs from maturity j - 1 to maturity j
+    intervals = np.diff(maturities, prepend=0.0)[:, np.newaxis]
+    drift = (r - 0.5 * sigma ** 2) * intervals
+    diffusion = sigma * np.sqrt(intervals)
+    paths = simulate_gbm_paths(S0, drift, diffusion, len(maturities), I, rng=np.random.default_rng(seed),
+                               antithetic=antithetic, moment_matching=moment_matching, sampler=sampler)
+
+    calls = np.empty((len(maturities), len(strikes)))
+    puts = np.empty((len(maturities), len(strikes)))
+    for j, prices in enumerate(paths[1:]):
+        # sum(max(S - K, 0)) = sum of the prices above K - K * count above K
+        prices = np.sort(prices)
+        cumulative = np.concatenate(([0.0], np.cumsum(prices)))
+        below = np.searchsorted(prices, strikes, side='right')
+        sum_below = cumulative[below]
+        sum_above = cumulative[-1] - sum_below
+        calls[j] = sum_above - strikes * (I - below)
+        puts[j] = strikes * below - sum_below
+    discount_factors = np.exp(-r * maturities)[:, np.newaxis] / I
+    chain = {
+        'strikes': strikes,
+        'maturities': maturities,
+        'call': calls * discount_factors,
+        'put': puts * discount_factors
+    }
+    return chain
+
+def black_scholes_greeks(S0, K, r, sigma, T, option_type='call'):
+    """
+    Calculate the closed-form Black-Scholes Greeks of a European option.
+    
+    Parameters:
+    S0 : float : initial stock price
+    K : float : strike price
+    r : float : risk-free rate
+    sigma : float : volatility
+    T : float : time to maturity
+    option_type : str : 'call' or 'put'
+    
+    Returns:
+    greeks : dict : 'price', 'delta', 'gamma', 'vega', 'rho' and 'theta'
+    """
+    sqrt_T = np.sqrt(T)
+    d1 = (np.log(S0 / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt_T)
+    d2 = d1 - sigma * sqrt_T
+    discounted_strike = K * np.exp(-r * T)
+    sign = 1 if option_type == 'call' else -1
+    greeks = {
+        'price': black_scholes_price(S0, K, r, sigma, T, option_type),
+        'delta': sign * norm.cdf(sign * d1),
+        'gamma': norm.pdf(d1) / (S0 * sigma * sqrt_T),
+        'vega': S0 * norm.pdf(d1) * sqrt_T,
+        'rho': sign * discounted_strike * T * norm.cdf(sign * d2),
+        'theta': -S0 * norm.pdf(d1) * sigma / (2 * sqrt_T) - sign * r * discounted_strike * norm.cdf(sign * d2)
+    }
+    return greeks
+
+def _mean_and_std_error(samples, antithetic, block_size):
+    # Antithetic pairs are averaged first so the standard error sees independent samples
+    if antithetic:
+        samples = _antithetic_means(samples, block_size)
+    return np.mean(samples), samples.std(ddof=1) / np.sqrt(samples.size)
+
+def _discounted_payoffs(final_prices, K, r, T, option_type):
+    if option_type == 'call':
+        return np.exp(-r * T) * np.maximum(final_prices - K, 0)
+    if option_type == 'put':
+        return np.exp(-r * T) * np.maximum(K - final_prices, 0)
+    raise ValueError(f"option_type must be 'call' or 'put', got {option_type!r}")
+
+def calculate_greeks(S0, K, r, sigma, T, M, I, seed=None, result=None, option_type='call', method='pathwise',
+                     antithetic=False, moment_matching=False, sampler='pseudo'):
+    """
+    Estimate the price and the Greeks of a European option from one simulation.
+    
+    With method='pathwise', delta, vega, rho and theta are pathwise
+    derivatives of the discounted payoff, and gamma (for which the kinked
+    payoff has no second pathwise derivative) uses the likelihood-ratio
+    score of the pathwise delta. With method='bump', every Greek is a central
+    finite difference revalued on the same normal draws (common random
+    numbers), which removes most of the noise of independent bumps. Both
+    methods reuse the terminal prices that produce the price itself.
+    
+    Parameters:
+    S0 : float : initial stock price
+    K : float : strike price
+    r : float : risk-free rate
+    sigma : float : volatility
+    T : float : time to maturity
+    M : int : number of time steps
+    I : int : number of simulations
+    seed : int : seed of the random number generator, enables the memo cache
+    result : SimulationResult : existing simulation to reuse instead of simulating
+    option_type : str : 'call' or 'put'
+    method : str : 'pathwise' or 'bump'
+    antithetic : bool : use antithetic variates (ignored when result is given)
+    moment_matching : bool : match the first two moments of the shocks (ignored when result is given)
+    sampler : str : 'pseudo' or 'sobol' (ignored when result is given)
+    
+    Returns:
+    greeks : dict : 'price', 'delta', 'gamma', 'vega', 'rho', 'theta', and their 'std_errors' as a dict
+    """
+    if result is None:
+        result = simulate(S0, r, sigma, T, M, I, seed=seed, store_paths=False,
+                          antithetic=antithetic, moment_matching=moment_matching, sampler=sampler)
+    final_prices = result.final_prices
+    sqrt_T = np.sqrt(T)
+    # Recover the normal draws behind the terminal prices
+    z = (np.log(final_prices / S0) - (r - 0.5 * sigma ** 2) * T) / (sigma * sqrt_T)
+
+    samples = {'price': _discounted_payoffs(final_prices, K, r, T, option_type)}
+    if method == 'pathwise':
+        discount_factor = np.exp(-r * T)
+        if option_type == 'call':
+            slope = (final_prices > K).astype(float)
+        else:
+            slope = -(final_prices < K).astype(float)
+        discounted_slope = discount_factor * slope * final_prices
+        samples['delta'] = discounted_slope / S0
+        samples['gamma'] = discounted_slope * (z / (sigma * sqrt_T) - 1) / S0 ** 2
+        samples['vega'] = discounted_slope * (sqrt_T * z - sigma * T)
+        samples['rho'] = T * (discounted_slope - samples['price'])
+        samples['theta'] = r * samples['price'] - discounted_slope * (r - 0.5 * sigma ** 2 + 0.5 * sigma * z / sqrt_T)
+    elif method == 'bump':
+        def revalue(S0_=S0, r_=r, sigma_=sigma, T_=T):
+            bumped = S0_ * np.exp((r_ - 0.5 * sigma_ ** 2) * T_ + sigma_ * np.sqrt(T_) * z)
+            return _discounted_payoffs(bumped, K, r_, T_, option_type)
+
+        dS, dsigma, dr, dT = 0.01 * S0, 1e-3, 1e-4, min(1e-3, 0.5 * T)
+        up, down = revalue(S0_=S0 + dS), revalue(S0_=S0 - dS)
+        samples['delta'] = (up - down) / (2 * dS)
+        samples['gamma'] = (up - 2 * samples['price'] + down) / dS ** 2
+        samples['vega'] = (revalue(sigma_=sigma + dsigma) - revalue(sigma_=sigma - dsigma)) / (2 * dsigma)
+        samples['rho'] = (revalue(r_=r + dr) - revalue(r_=r - dr)) / (2 * dr)
+        samples['theta'] = -(revalue(T_=T + dT) - revalue(T_=T - dT)) / (2 * dT)
+    else:
+        raise ValueError(f"method must be 'pathwise' or 'bump', got {method!r}")
+
+    greeks = {'std_errors': {}}
+    for name, values in samples.items():
+        greeks[name], greeks['std_errors'][name] = _mean_and_std_error(values, result.antithetic, result.block_size)
+    return greeks
 
 def plot_simulation(paths):
     """
@@ -59,23 +504,52 @@ def plot_simulation(paths):
     plt.title('Simulated Stock Price Paths')
     plt.show()
 
-# Parameters
-S0 = 100  # Initial stock price
-K = 105  # Strike price
-r = 0.05  # Risk-free rate
-sigma = 0.2  # Volatility
-T = 1.0  # Time to maturity (1 year)
-M = 252  # Number of time steps (daily)
-I = 10000  # Number of simulations
+if __name__ == "__main__":
+    # Parameters
+    S0 = 100  # Initial stock price
+    K = 105  # Strike price
+    r = 0.05  # Risk-free rate
+    sigma = 0.2  # Volatility
+    T = 1.0  # Time to maturity (1 year)
+    M = 252  # Number of time steps (daily)
+    I = 10000  # Number of simulations
+    seed = None  # Set an integer for reproducible, memoized runs (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
+
+    # Simulate stock price paths once and share them
+    result = simulate(S0, r, sigma, T, M, I, seed=seed, workers=workers)
+
+    # Calculate the option price
+    option_price = calculate_option_price(S0, K, r, sigma, T, M, I, result=result)
+
+    # Print the estimated option price
+    print(f"Estimated European call option price: ${option_price:.2f}")
 
-# Simulate stock price paths
-paths = simulate_stock_paths(S0, r, sigma, T, M, I)
+    # Price again with variance reduction and report the accuracy gained
+    estimate = estimate_option_price(S0, K, r, sigma, T, M, I, seed=seed, antithetic=True,
+                                     moment_matching=True, control_variate=True)
+    print(f"Variance-reduced price: ${estimate['price']:.4f} "
+          f"(std error {estimate['std_error']:.4f}, crude {estimate['plain_std_error']:.4f}, "
+          f"speedup x{estimate['speedup']:.1f})")
+    # Randomized quasi-Monte Carlo with the same budget of paths
+    estimate = estimate_option_price_rqmc(S0, K, r, sigma, T, M, 1024, replicates=8, seed=seed)
+    print(f"Randomized QMC price: ${estimate['price']:.4f} "
+          f"(std error {estimate['std_error']:.4f}, speedup x{estimate['speedup']:.1f})")
+    print(f"Black-Scholes closed-form price: ${black_scholes_price(S0, K, r, sigma, T):.4f}")
 
-# Calculate the option price
-option_price = calculate_option_price(S0, K, r, sigma, T, M, I)
+    # Greeks from the same simulation as the price
+    greeks = calculate_greeks(S0, K, r, sigma, T, M, I, result=result)
+    reference = black_scholes_greeks(S0, K, r, sigma, T)
+    for name in ['delta', 'gamma', 'vega', 'rho', 'theta']:
+        print(f"{name.capitalize()}: {greeks[name]:.4f} +/- {greeks['std_errors'][name]:.4f} "
+              f"(closed form {reference[name]:.4f})")
 
-# Print the estimated option price
-print(f"Estimated European call option price: ${option_price:.2f}")
+    # Price a 40-strike x 8-expiry surface from a single simulation
+    chain = price_option_chain(S0, r, sigma, np.linspace(80, 120, 40), [1/12, 2/12, 3/12, 6/12, 9/12, 1, 1.5, 2],
+                               I, seed=seed, moment_matching=True)
+    for maturity, calls in zip(chain['maturities'], chain['call']):
+        atm = np.argmin(np.abs(chain['strikes'] - S0))
+        print(f"T={maturity:.2f}: at-the-money call ${calls[atm]:.2f} (K={chain['strikes'][atm]:.1f})")
 
-# Plot the simulated stock price paths
-plot_simulation(paths)
+    # Plot the simulated stock price paths
+    plot_simulation(result.paths)
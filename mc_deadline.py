@@ -1,19 +1,24 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from functools import partial
+from mc_parallel import run_parallel
 
-def simulate_task_completion_times(num_tasks, mean_time, std_dev_time):
+def simulate_task_completion_times(num_tasks, mean_time, std_dev_time, rng=None):
     """
     Simulate random task completion times based on a normal distribution.
     
     Parameters:
-    num_tasks : int : number of tasks
+    num_tasks : int or tuple : number of tasks (or shape of the array of task times)
     mean_time : float : mean task completion time
     std_dev_time : float : standard deviation of task completion times
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     task_times : ndarray : simulated task completion times
     """
-    return np.random.normal(mean_time, std_dev_time, num_tasks)
+    if rng is None:
+        rng = np.random.default_rng()
+    return rng.normal(mean_time, std_dev_time, num_tasks)
 
 def calculate_project_completion_time(task_times):
     """
@@ -27,7 +32,7 @@ def calculate_project_completion_time(task_times):
     """
     return np.sum(task_times)
 
-def monte_carlo_project_simulation(num_tasks, mean_time, std_dev_time, deadline, iterations):
+def monte_carlo_project_simulation(num_tasks, mean_time, std_dev_time, deadline, iterations, rng=None):
     """
     Perform a Monte Carlo simulation to estimate the probability of meeting the project deadline.
     
@@ -37,14 +42,13 @@ def monte_carlo_project_simulation(num_tasks, mean_time, std_dev_time, deadline,
     std_dev_time : float : standard deviation of task completion times
     deadline : float : project deadline
     iterations : int : number of Monte Carlo simulations
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     completion_times : ndarray : simulated project completion times
     """
-    completion_times = np.zeros(iterations)
-    for i in range(iterations):
-        task_times = simulate_task_completion_times(num_tasks, mean_time, std_dev_time)
-        completion_times[i] = calculate_project_completion_time(task_times)
+    task_times = simulate_task_completion_times((iterations, num_tasks), mean_time, std_dev_time, rng)
+    completion_times = task_times.sum(axis=1)
     return completion_times
 
 def plot_completion_time_distribution(completion_times, deadline):
@@ -64,25 +68,29 @@ def plot_completion_time_distribution(completion_times, deadline):
     plt.legend()
     plt.show()
 
-# Parameters
-num_tasks = 10  # Number of tasks
-mean_time = 5  # Mean task completion time (days)
-std_dev_time = 2  # Standard deviation of task completion times (days)
-deadline = 50  # Project deadline (days)
-iterations = 10000  # Number of Monte Carlo simulations
+if __name__ == "__main__":
+    # Parameters
+    num_tasks = 10  # Number of tasks
+    mean_time = 5  # Mean task completion time (days)
+    std_dev_time = 2  # Standard deviation of task completion times (days)
+    deadline = 50  # Project deadline (days)
+    iterations = 10000  # Number of Monte Carlo simulations
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
 
-# Run the Monte Carlo simulation
-completion_times = monte_carlo_project_simulation(num_tasks, mean_time, std_dev_time, deadline, iterations)
+    # Run the Monte Carlo simulation
+    simulate = partial(monte_carlo_project_simulation, num_tasks, mean_time, std_dev_time, deadline)
+    completion_times = run_parallel(simulate, iterations, seed=seed, workers=workers)
 
-# Analyze the results
-mean_completion_time = np.mean(completion_times)
-median_completion_time = np.median(completion_times)
-probability_meeting_deadline = np.sum(completion_times <= deadline) / iterations
+    # Analyze the results
+    mean_completion_time = np.mean(completion_times)
+    median_completion_time = np.median(completion_times)
+    probability_meeting_deadline = np.sum(completion_times <= deadline) / iterations
 
-# Print the results
-print(f"Mean project completion time: {mean_completion_time:.2f} days")
-print(f"Median project completion time: {median_completion_time:.2f} days")
-print(f"Probability of meeting the deadline: {probability_meeting_deadline:.2%}")
+    # Print the results
+    print(f"Mean project completion time: {mean_completion_time:.2f} days")
+    print(f"Median project completion time: {median_completion_time:.2f} days")
+    print(f"Probability of meeting the deadline: {probability_meeting_deadline:.2%}")
 
-# Plot the distribution of project completion times
-plot_completion_time_distribution(completion_times, deadline)
+    # Plot the distribution of project completion times
+    plot_completion_time_distribution(completion_times, deadline)
@@ -1,57 +1,69 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from random import randint
+from functools import partial
+from mc_parallel import run_parallel
 
-def throw_and_sum_n_dice(n):
+def throw_and_sum_n_dice(n, rng=None):
     """
     This function throws n dice and sums the results.
     """
-    total = 0
-    for _ in range(n):
-        throw = randint(1, 6)
-        total += throw
-    return total
+    if rng is None:
+        rng = np.random.default_rng()
+    return int(rng.integers(1, 7, size=n).sum())
 
-def compute_profit_path(k, n):
+def compute_profit_path(k, n, rng=None):
     """
     This function returns the profit (or loss) path at the end of 
     k iterations of the game, where we throw n dice.
     """
+    if rng is None:
+        rng = np.random.default_rng()
     total_profit = 0
     for _ in range(k):
-        total = throw_and_sum_n_dice(n)
+        total = throw_and_sum_n_dice(n, rng)
         if 40 <= total <= 50:
             total_profit += 10
         else:
             total_profit -= 2
     return total_profit
 
-# Parameters
-iterations = 100000  # Number of Monte Carlo simulations
-k = 50  # Number of times to play the game in each simulation
-n = 10  # Number of dice thrown in each game
-
-# Run the Monte Carlo simulation
-total_profits = []
-for _ in range(iterations):
-    total_profits.append(compute_profit_path(k, n))
-
-# Analyze the results
-total_profits = np.array(total_profits)
-winning_occurrences = np.sum(total_profits > 0)
-losing_occurrences = np.sum(total_profits <= 0)
-
-# Print the results
-print(f'We would win money {winning_occurrences} times out of {iterations} simulations -- a.k.a. {winning_occurrences/iterations:.2%} of the time.')
-print(f'We would lose money {losing_occurrences} times out of {iterations} simulations -- a.k.a. {losing_occurrences/iterations:.2%} of the time.')
-print(f'Maximum profit: ${total_profits.max()}')
-print(f'Maximum loss: ${total_profits.min()}')
-print(f'Average profit/loss: ${total_profits.mean():.2f}')
-
-# Plot the distribution of profits
-plt.figure(figsize=(10, 6))
-plt.hist(total_profits, bins=50, edgecolor='black')
-plt.xlabel('Total Profit')
-plt.ylabel('Frequency')
-plt.title('Distribution of Total Profits from Monte Carlo Simulation')
-plt.show()
+def simulate_profits(k, n, iterations, rng=None):
+    """
+    This function returns the total profit of `iterations` independent runs
+    of k games, all throws drawn in one vectorized call.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    totals = rng.integers(1, 7, size=(iterations, k, n), dtype=np.int8).sum(axis=2, dtype=np.int32)
+    wins = np.count_nonzero((totals >= 40) & (totals <= 50), axis=1)
+    return 10 * wins - 2 * (k - wins)
+
+if __name__ == "__main__":
+    # Parameters
+    iterations = 100000  # Number of Monte Carlo simulations
+    k = 50  # Number of times to play the game in each simulation
+    n = 10  # Number of dice thrown in each game
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
+
+    # Run the Monte Carlo simulation
+    total_profits = run_parallel(partial(simulate_profits, k, n), iterations, seed=seed, workers=workers)
+
+    # Analyze the results
+    winning_occurrences = np.sum(total_profits > 0)
+    losing_occurrences = np.sum(total_profits <= 0)
+
+    # Print the results
+    print(f'We would win money {winning_occurrences} times out of {iterations} simulations -- a.k.a. {winning_occurrences/iterations:.2%} of the time.')
+    print(f'We would lose money {losing_occurrences} times out of {iterations} simulations -- a.k.a. {losing_occurrences/iterations:.2%} of the time.')
+    print(f'Maximum profit: ${total_profits.max()}')
+    print(f'Maximum loss: ${total_profits.min()}')
+    print(f'Average profit/loss: ${total_profits.mean():.2f}')
+
+    # Plot the distribution of profits
+    plt.figure(figsize=(10, 6))
+    plt.hist(total_profits, bins=50, edgecolor='black')
+    plt.xlabel('Total Profit')
+    plt.ylabel('Frequency')
+    plt.title('Distribution of Total Profits from Monte Carlo Simulation')
+    plt.show()
@@ -1,25 +1,21 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
 import matplotlib.pyplot as plt
+from mc_parallel import run_parallel, concatenate_paths
+from functools import partial
+from mc_paths import simulate_gbm_paths
 from datetime import datetime
+from price_store import fetch_prices
 
 def fetch_historical_data(ticker, start_date, end_date):
-    stock_data = yf.download(ticker, start=start_date, end=end_date)
-    return stock_data['Adj Close']
+    return fetch_prices(ticker, start_date, end_date)
 
 def calculate_log_returns(stock_prices):
     log_returns = np.log(stock_prices / stock_prices.shift(1))
     return log_returns[1:]
 
-def simulate_stock_prices(start_price, mean, std_dev, days, iterations):
-    simulated_prices = np.zeros((days, iterations))
-    simulated_prices[0] = start_price
-
-    for t in range(1, days):
-        random_shocks = np.random.normal(mean, std_dev, iterations)
-        simulated_prices[t] = simulated_prices[t-1] * np.exp(random_shocks)
-    
+def simulate_stock_prices(start_price, mean, std_dev, days, iterations, out=None, rng=None):
+    simulated_prices = simulate_gbm_paths(start_price, mean, std_dev, days - 1, iterations, out=out, rng=rng)
     return simulated_prices
 
 def plot_simulation(simulated_prices):
@@ -42,26 +38,30 @@ def plot_simulation(simulated_prices):
     plt.legend()
     plt.show()
 
-# Parameters
-ticker = 'HO.PA'
-start_date = '2020-01-01'
-end_date = datetime.today().strftime('%Y-%m-%d')  # Get today's date in YYYY-MM-DD format
-days = 252  # Number of trading days in a year
-iterations = 1000
+if __name__ == "__main__":
+    # Parameters
+    ticker = 'HO.PA'
+    start_date = '2020-01-01'
+    end_date = datetime.today().strftime('%Y-%m-%d')  # Get today's date in YYYY-MM-DD format
+    days = 252  # Number of trading days in a year
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
+    iterations = 1000
 
-# Fetch historical data
-stock_prices = fetch_historical_data(ticker, start_date, end_date)
+    # Fetch historical data
+    stock_prices = fetch_historical_data(ticker, start_date, end_date)
 
-# Calculate log returns
-log_returns = calculate_log_returns(stock_prices)
+    # Calculate log returns
+    log_returns = calculate_log_returns(stock_prices)
 
-# Estimate parameters
-mean = log_returns.mean()
-std_dev = log_returns.std()
+    # Estimate parameters
+    mean = log_returns.mean()
+    std_dev = log_returns.std()
 
-# Simulate future stock prices
-start_price = stock_prices[-1]
-simulated_prices = simulate_stock_prices(start_price, mean, std_dev, days, iterations)
+    # Simulate future stock prices
+    start_price = stock_prices[-1]
+    simulate = partial(simulate_stock_prices, start_price, mean, std_dev, days)
+    simulated_prices = run_parallel(simulate, iterations, seed=seed, workers=workers, combine=concatenate_paths)
 
-# Plot the simulation with indicators
-plot_simulation(simulated_prices)
+    # Plot the simulation with indicators
+    plot_simulation(simulated_prices)
@@ -1,39 +1,42 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
 import matplotlib.pyplot as plt
+from scipy.stats import norm
+from mc_parallel import run_parallel, concatenate_paths
+from mc_stats import RunningMoments, QuantileSketch, TailBuffer, merge_accumulators
+from functools import partial
+from mc_paths import simulate_gbm_paths, simulate_terminal_values, likelihood_ratios
 from datetime import datetime
+from price_store import fetch_prices
 
 def fetch_historical_data(ticker, start_date, end_date):
-    stock_data = yf.download(ticker, start=start_date, end=end_date)
-    return stock_data['Adj Close']
+    return fetch_prices(ticker, start_date, end_date)
 
 def calculate_log_returns(stock_prices):
     log_returns = np.log(stock_prices / stock_prices.shift(1))
     return log_returns[1:]
 
-def simulate_stock_prices(start_price, mean, std_dev, days, iterations):
-    simulated_prices = np.zeros((days, iterations))
-    simulated_prices[0] = start_price
-
-    for t in range(1, days):
-        random_shocks = np.random.normal(mean, std_dev, iterations)
-        simulated_prices[t] = simulated_prices[t-1] * np.exp(random_shocks)
-    
+def simulate_stock_prices(start_price, mean, std_dev, days, iterations, out=None, rng=None, shift=0.0):
+    simulated_prices = simulate_gbm_paths(start_price, mean, std_dev, days - 1, iterations, out=out, rng=rng, shift=shift)
     return simulated_prices
 
-def plot_simulation(simulated_prices, mc_var, cond_var, conf_interval_99):
+def tail_shift(confidence_level, days):
+    # Per-day shock shift that centers the simulated final prices on the requested lower quantile
+    return norm.ppf(confidence_level / 100) / np.sqrt(days - 1)
+
+def plot_simulation(simulated_prices, mc_var, cond_var, conf_interval_99, final_statistics=None):
     plt.figure(figsize=(10, 6))
     plt.plot(simulated_prices, color='blue', alpha=0.1)
     plt.xlabel('Days')
     plt.ylabel('Price')
     plt.title('Monte Carlo Simulation of Stock Prices')
 
-    # Calculate and plot indicators
-    final_prices = simulated_prices[-1]
-    mean_price = np.mean(final_prices)
-    std_dev_price = np.std(final_prices)
-    conf_interval_95 = np.percentile(final_prices, [2.5, 97.5])
+    # Calculate and plot indicators, from the streamed statistics when available
+    if final_statistics is None:
+        final_statistics = summarize_final_prices(simulated_prices[-1], tail_capacity=0)
+    mean_price = final_statistics['moments'].mean
+    std_dev_price = final_statistics['moments'].std()
+    conf_interval_95 = final_statistics['sketch'].quantile([0.025, 0.975])
 
     plt.axhline(mean_price, color='red', linestyle='--', label=f'Mean Price: ${mean_price:.2f}')
     plt.fill_between(range(days), mean_price - std_dev_price, mean_price + std_dev_price, color='yellow', alpha=0.3, label=f'1 Std Dev: ${std_dev_price:.2f}')
@@ -47,50 +50,120 @@ def plot_simulation(simulated_prices, mc_var, cond_var, conf_interval_99):
     plt.legend()
     plt.show()
 
-def calculate_var(simulated_prices, confidence_level=5):
-    final_prices = simulated_prices[-1]
+def simulate_final_prices(start_price, mean, std_dev, days, iterations, rng=None, shift=0.0):
+    final_prices = simulate_terminal_values(start_price, mean, std_dev, days - 1, iterations, rng=rng, shift=shift)
+    return final_prices
+
+def simulate_tail_scenarios(start_price, mean, std_dev, days, confidence_level, iterations, rng=None):
+    # Importance sampling: push the scenarios into the loss tail and keep their likelihood ratios
+    shift = tail_shift(confidence_level, days)
+    final_prices = simulate_final_prices(start_price, mean, std_dev, days, iterations, rng, shift)
+    weights = likelihood_ratios(start_price, final_prices, mean, std_dev, days - 1, shift)
+    return {'final_prices': final_prices, 'weights': weights}
+
+def summarize_final_prices(final_prices, tail_capacity, rng=None):
+    # Mergeable statistics of a chunk of final prices: moments, quantile sketch and exact tails
+    statistics = {
+        'moments': RunningMoments().update(final_prices),
+        'sketch': QuantileSketch(rng=rng).update(final_prices),
+        'lower_tail': TailBuffer(tail_capacity).update(final_prices),
+        'upper_tail': TailBuffer(tail_capacity, side='upper').update(final_prices)
+    }
+    return statistics
+
+def accumulate_final_prices(start_price, mean, std_dev, days, tail_capacity, iterations, rng=None):
+    # Simulate one chunk of final prices and keep only its statistics
+    final_prices = simulate_final_prices(start_price, mean, std_dev, days, iterations, rng)
+    return summarize_final_prices(final_prices, tail_capacity, rng)
+
+def final_prices_of(simulated_prices):
+    # Accept either full paths (days x iterations) or terminal prices only
+    simulated_prices = np.asarray(simulated_prices)
+    return simulated_prices[-1] if simulated_prices.ndim == 2 else simulated_prices
+
+def calculate_var(simulated_prices, confidence_level=5, weights=None):
+    # A lower TailBuffer gives the exact figure without keeping every scenario
+    if isinstance(simulated_prices, TailBuffer):
+        return simulated_prices.quantile(confidence_level / 100)
+    final_prices = final_prices_of(simulated_prices)
+    if weights is not None:
+        # Importance-sampled scenarios: quantile of the likelihood-ratio weighted distribution
+        order = np.argsort(final_prices)
+        cumulative = np.cumsum(weights[order]) / final_prices.size
+        index = min(np.searchsorted(cumulative, confidence_level / 100), final_prices.size - 1)
+        return final_prices[order[index]]
     var = np.percentile(final_prices, confidence_level)
     return var
 
-def calculate_cvar(simulated_prices, var, confidence_level=5):
-    final_prices = simulated_prices[-1]
-    cvar = final_prices[final_prices <= var].mean()
+def calculate_cvar(simulated_prices, var, confidence_level=5, weights=None):
+    if isinstance(simulated_prices, TailBuffer):
+        return simulated_prices.tail_mean(var)
+    final_prices = final_prices_of(simulated_prices)
+    tail = final_prices <= var
+    if weights is not None:
+        return np.sum(weights[tail] * final_prices[tail]) / np.sum(weights[tail])
+    cvar = final_prices[tail].mean()
     return cvar
 
-# Parameters
-ticker = 'HO.PA'
-start_date = '2010-01-01'
-end_date = datetime.today().strftime('%Y-%m-%d')  # Get today's date in YYYY-MM-DD format
-days = 252  # Number of trading days in a year
-iterations = 1000
-
-# Fetch historical data
-stock_prices = fetch_historical_data(ticker, start_date, end_date)
-
-# Calculate log returns
-log_returns = calculate_log_returns(stock_prices)
-
-# Estimate parameters
-mean = log_returns.mean()
-std_dev = log_returns.std()
-
-# Simulate future stock prices
-start_price = stock_prices[-1]
-simulated_prices = simulate_stock_prices(start_price, mean, std_dev, days, iterations)
-
-# Calculate VaR and CVaR
-confidence_level = 5  # 95% confidence level
-mc_var = calculate_var(simulated_prices, confidence_level)
-cond_var = calculate_cvar(simulated_prices, mc_var, confidence_level)
-
-# Calculate 99% confidence interval
-conf_interval_99 = np.percentile(simulated_prices[-1], [0.5, 99.5])
-
-# Plot the simulation with indicators
-plot_simulation(simulated_prices, mc_var, cond_var, conf_interval_99)
-
-print(f"Optimal Price: ${start_price:.2f}")
-print(f"Maximum Revenue: ${np.max(simulated_prices[-1]):.2f}")
-print(f"VaR (95% confidence level): ${mc_var:.2f}")
-print(f"CVaR (95% confidence level): ${cond_var:.2f}")
-print(f"99% Confidence Interval: ${conf_interval_99[0]:.2f} - ${conf_interval_99[1]:.2f}")
+if __name__ == "__main__":
+    # Parameters
+    ticker = 'HO.PA'
+    start_date = '2010-01-01'
+    end_date = datetime.today().strftime('%Y-%m-%d')  # Get today's date in YYYY-MM-DD format
+    days = 252  # Number of trading days in a year
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
+    iterations = 1000  # Number of plotted paths
+    var_iterations = 1000000  # Number of terminal-only scenarios for the risk figures
+    tail_iterations = 100000  # Number of importance-sampled scenarios per deep-tail level
+    deep_confidence_levels = [0.1, 0.03]  # 99.9% and 99.97% confidence levels
+
+    # Fetch historical data
+    stock_prices = fetch_historical_data(ticker, start_date, end_date)
+
+    # Calculate log returns
+    log_returns = calculate_log_returns(stock_prices)
+
+    # Estimate parameters
+    mean = log_returns.mean()
+    std_dev = log_returns.std()
+
+    # Independent streams for the plotted paths and the risk scenarios
+    path_seed, var_seed, tail_seed = np.random.SeedSequence(seed).spawn(3)
+
+    # Simulate future stock prices
+    start_price = stock_prices[-1]
+    simulate = partial(simulate_stock_prices, start_price, mean, std_dev, days)
+    simulated_prices = run_parallel(simulate, iterations, seed=path_seed, workers=workers, combine=concatenate_paths)
+
+    # Stream terminal prices in chunks for the risk figures, keeping only mergeable statistics
+    confidence_level = 5  # 95% confidence level
+    tail_capacity = int(np.ceil(var_iterations * confidence_level / 100)) + 2
+    simulate = partial(accumulate_final_prices, start_price, mean, std_dev, days, tail_capacity)
+    final_statistics = run_parallel(simulate, var_iterations, seed=var_seed, workers=workers, block_size=100000,
+                                    combine=merge_accumulators)
+
+    # Calculate VaR and CVaR
+    mc_var = calculate_var(final_statistics['lower_tail'], confidence_level)
+    cond_var = calculate_cvar(final_statistics['lower_tail'], mc_var, confidence_level)
+
+    # Calculate 99% confidence interval
+    conf_interval_99 = [final_statistics['lower_tail'].quantile(0.005), final_statistics['upper_tail'].quantile(0.995)]
+
+    # Plot the simulation with indicators
+    plot_simulation(simulated_prices, mc_var, cond_var, conf_interval_99, final_statistics)
+
+    print(f"Optimal Price: ${start_price:.2f}")
+    print(f"Maximum Revenue: ${np.max(simulated_prices[-1]):.2f}")
+    print(f"VaR (95% confidence level): ${mc_var:.2f}")
+    print(f"CVaR (95% confidence level): ${cond_var:.2f}")
+    print(f"99% Confidence Interval: ${conf_interval_99[0]:.2f} - ${conf_interval_99[1]:.2f}")
+
+    # Deep-tail VaR and CVaR by importance sampling, the shift being chosen for each level
+    for deep_level, deep_seed in zip(deep_confidence_levels, tail_seed.spawn(len(deep_confidence_levels))):
+        simulate = partial(simulate_tail_scenarios, start_price, mean, std_dev, days, deep_level)
+        scenarios = run_parallel(simulate, tail_iterations, seed=deep_seed, workers=workers, combine=merge_accumulators)
+        deep_var = calculate_var(scenarios['final_prices'], deep_level, scenarios['weights'])
+        deep_cvar = calculate_cvar(scenarios['final_prices'], deep_var, deep_level, scenarios['weights'])
+        print(f"VaR ({100 - deep_level:g}% confidence level): ${deep_var:.2f}")
+        print(f"CVaR ({100 - deep_level:g}% confidence level): ${deep_cvar:.2f}")
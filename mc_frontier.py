@@ -0,0 +1,235 @@
+import numpy as np
+from pf_covariance import as_array
+
+def _free_solution(cov_matrix, mean_returns, weights, free, lam):
+    # Weights of the free assets at multiplier lam, the bounded ones being held at their current weights
+    bounded = np.setdiff1d(np.arange(len(weights)), free)
+    cov_free_inv = np.linalg.inv(cov_matrix[np.ix_(free, free)])
+    ones = np.ones(len(free))
+    inv_ones = cov_free_inv @ ones
+    inv_mean = cov_free_inv @ mean_returns[free]
+    inv_bounded = cov_free_inv @ (cov_matrix[np.ix_(free, bounded)] @ weights[bounded])
+    budget = 1 - weights[bounded].sum() + ones @ inv_bounded
+    gamma = (budget - lam * (ones @ inv_mean)) / (ones @ inv_ones)
+    return -inv_bounded + gamma * inv_ones + lam * inv_mean
+
+def _crossing(cov_matrix, mean_returns, weights, free, i, bound):
+    # Multiplier at which the free asset free[i] reaches a bound, and that bound
+    bounded = np.setdiff1d(np.arange(len(weights)), free)
+    cov_free_inv = np.linalg.inv(cov_matrix[np.ix_(free, free)])
+    ones = np.ones(len(free))
+    inv_ones = cov_free_inv @ ones
+    inv_mean = cov_free_inv @ mean_returns[free]
+    c1 = ones @ inv_ones
+    slope = -c1 * inv_mean[i] + (ones @ inv_mean) * inv_ones[i]
+    if np.isclose(c1 * inv_mean[i], (ones @ inv_mean) * inv_ones[i], rtol=1e-10, atol=0):
+        # Free assets of equal returns: the weight does not move with the multiplier (up to rounding)
+        return None, None
+    if isinstance(bound, tuple):
+        bound = bound[1] if slope > 0 else bound[0]
+    inv_bounded = cov_free_inv @ (cov_matrix[np.ix_(free, bounded)] @ weights[bounded])
+    budget = 1 - weights[bounded].sum() + ones @ inv_bounded
+    return (budget * inv_ones[i] - c1 * (bound + inv_bounded[i])) / slope, bound
+
+def critical_line(mean_returns, cov_matrix, lower_bounds=0.0, upper_bounds=1.0, tolerance=1e-10):
+    """
+    Trace the exact mean-variance frontier with Markowitz's critical line algorithm.
+
+    Under a budget constraint and box bounds the frontier is piecewise
+    linear in the weights: it is fully described by its turning points,
+    where an asset enters or leaves the set of assets strictly inside its
+    bounds. Starting from the highest-return portfolio, the algorithm moves
+    down the risk-aversion multiplier from one turning point to the next
+    until the minimum-variance portfolio, with one small linear solve per
+    candidate event. When several assets tie for the highest return, the
+    path starts from the least risky of their mixes.
+
+    Parameters:
+    mean_returns : ndarray : annualized mean returns, shape (assets,)
+    cov_matrix : ndarray : annualized covariance matrix (positive definite), shape (assets, assets)
+    lower_bounds : float or ndarray : lowest weight of each asset (0 for long-only)
+    upper_bounds : float or ndarray : highest weight of each asset
+    tolerance : float : numerical tolerance on the bounds and the budget
+
+    Returns:
+    turning_points : ndarray : frontier turning points from maximum return to minimum variance, shape (points, assets)
+    """
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    # The free sub-blocks are inverted, so a factor-model covariance is densified here
+    cov_matrix = as_array(cov_matrix)
+    num_assets = len(mean_returns)
+    lower = np.broadcast_to(np.asarray(lower_bounds, dtype=float), (num_assets,))
+    upper = np.broadcast_to(np.asarray(upper_bounds, dtype=float), (num_assets,))
+    if lower.sum() > 1 + tolerance or upper.sum() < 1 - tolerance:
+        raise ValueError("the bounds leave no fully invested portfolio")
+
+    # Highest-return portfolio: fill the best assets up to their upper bound, the last one taking the rest
+    weights = lower.copy()
+    order = np.argsort(-mean_returns, kind='stable')
+    free = []
+    for asset in order:
+        weights[asset] = min(upper[asset], 1 - weights.sum() + lower[asset])
+        if weights.sum() >= 1 - tolerance:
+            free = [asset]
+            break
+    tied = np.flatnonzero(np.abs(mean_returns - mean_returns[free[0]]) <= tolerance)
+    if len(tied) > 1:
+        # Every mix of the assets tied with the last one filled has the highest return: start from the
+        # least risky of them, traced on the tied assets alone (the others held) with distinct returns
+        held = np.setdiff1d(np.arange(num_assets), tied)
+        tied_lower, tied_upper = lower.copy(), upper.copy()
+        tied_lower[held] = tied_upper[held] = weights[held]
+        ranks = np.zeros(num_assets)
+        ranks[tied] = np.arange(len(tied), 0, -1)
+        weights = critical_line(ranks, cov_matrix, tied_lower, tied_upper, tolerance)[-1]
+        inside = [asset for asset in tied if lower[asset] + tolerance < weights[asset] < upper[asset] - tolerance]
+        above = [asset for asset in tied if weights[asset] > lower[asset] + tolerance]
+        if inside:
+            free = inside
+        elif above:
+            # At a corner the free asset is the one giving up weight first: of the tied assets above
+            # their lower bound, the one adding the most variance
+            free = [max(above, key=lambda asset: cov_matrix[asset] @ weights)]
+    turning_points = [weights.copy()]
+    lam = np.inf
+    # Events at the current multiplier are degenerate turning points and still taken, but an asset that
+    # already changed status at this multiplier cannot change again, so corners cannot cycle
+    changed = set()
+
+    def pending(candidate, asset):
+        return (candidate is not None and (candidate < lam or np.isclose(candidate, lam))
+                and not (asset in changed and np.isclose(candidate, lam)))
+
+    while True:
+        # a) a free asset moves to one of its bounds
+        lam_in, asset_in, bound_in = -np.inf, None, None
+        if len(free) > 1:
+            for i, asset in enumerate(free):
+                candidate, bound = _crossing(cov_matrix, mean_returns, weights, free, i, (lower[asset], upper[asset]))
+                if not pending(candidate, asset):
+                    continue
+                # Of assets reaching their bounds together, one going to its lower bound is bounded first,
+                # so the assets left free can still give up weight to the next one entering
+                tie = np.isclose(candidate, lam_in)
+                if ((candidate > lam_in and not tie)
+                        or (tie and bound == lower[asset] and bound_in != lower[asset_in])):
+                    lam_in, asset_in, bound_in = candidate, asset, bound
+
+        # b) a bounded asset leaves its bound
+        lam_out, asset_out = -np.inf, None
+        if len(free) < num_assets:
+            for asset in np.setdiff1d(np.arange(num_assets), free):
+                if upper[asset] - lower[asset] <= tolerance:
+                    # A fixed weight never leaves its bound
+                    continue
+                candidate, _ = _crossing(cov_matrix, mean_returns, weights, free + [asset], len(free), weights[asset])
+                if pending(candidate, asset) and candidate > lam_out:
+                    lam_out, asset_out = candidate, asset
+
+        if lam_in <= 0 and lam_out <= 0:
+            # No more events above lam = 0: finish at the minimum-variance portfolio
+            lam = 0.0
+        elif lam_in > lam_out:
+            changed = changed | {asset_in} if np.isclose(lam_in, lam) else {asset_in}
+            lam = lam_in
+            free.remove(asset_in)
+            weights[asset_in] = bound_in
+        else:
+            changed = changed | {asset_out} if np.isclose(lam_out, lam) else {asset_out}
+            lam = lam_out
+            free.append(asset_out)
+        weights[free] = _free_solution(cov_matrix, mean_returns, weights, free, lam)
+        turning_points.append(weights.copy())
+        if lam == 0:
+            break
+
+    turning_points = np.array(turning_points)
+    # Drop points broken by rounding, then any point dominated by a later one
+    valid = ((turning_points >= lower - tolerance).all(axis=1) & (turning_points <= upper + tolerance).all(axis=1)
+             & (np.abs(turning_points.sum(axis=1) - 1) <= tolerance))
+    turning_points = turning_points[valid]
+    point_returns = turning_points @ mean_returns
+    keep = point_returns >= np.maximum.accumulate(point_returns[::-1])[::-1] - tolerance
+    return turning_points[keep]
+
+def _segment_moments(start, end, mean_returns, cov_matrix):
+    # Return and variance coefficients along w(a) = start + a * (end - start), a in [0, 1]
+    step = end - start
+    cov_start = cov_matrix @ start
+    return start @ mean_returns, step @ mean_returns, start @ cov_start, step @ cov_start, step @ cov_matrix @ step
+
+def max_sharpe_portfolio(turning_points, mean_returns, cov_matrix, risk_free_rate=0.01):
+    """
+    Exact maximum-Sharpe portfolio on a frontier traced by critical_line.
+
+    Along a frontier segment the return is linear and the variance quadratic
+    in the interpolation weight a, so the Sharpe ratio has a single interior
+    stationary point, a = ((r0 - rf) c - dr v0) / (c dr - (r0 - rf) d),
+    checked together with the segment ends.
+
+    Parameters:
+    turning_points : ndarray : frontier turning points, shape (points, assets)
+    mean_returns : ndarray : annualized mean returns, shape (assets,)
+    cov_matrix : ndarray : annualized covariance matrix, shape (assets, assets)
+    risk_free_rate : float : annual risk-free rate
+
+    Returns:
+    weights : ndarray : weights of the maximum-Sharpe portfolio, shape (assets,)
+    """
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    cov_matrix = as_array(cov_matrix)
+    best_sharpe, best_weights = -np.inf, turning_points[0]
+    segments = list(zip(turning_points[:-1], turning_points[1:])) or [(turning_points[0], turning_points[0])]
+    for start, end in segments:
+        r0, dr, v0, c, d = _segment_moments(start, end, mean_returns, cov_matrix)
+        candidates = [0.0, 1.0]
+        denominator = c * dr - (r0 - risk_free_rate) * d
+        if denominator != 0:
+            candidates.append(min(max(((r0 - risk_free_rate) * c - dr * v0) / denominator, 0.0), 1.0))
+        for a in candidates:
+            sharpe = (r0 + a * dr - risk_free_rate) / np.sqrt(v0 + 2 * a * c + a * a * d)
+            if sharpe > best_sharpe:
+                best_sharpe, best_weights = sharpe, start + a * (end - start)
+    return best_weights
+
+def efficient_frontier(mean_returns, cov_matrix, risk_free_rate=0.01, points_per_segment=20,
+                       lower_bounds=0.0, upper_bounds=1.0):
+    """
+    Exact efficient frontier with its maximum-Sharpe and minimum-volatility portfolios.
+
+    Parameters:
+    mean_returns : ndarray : annualized mean returns, shape (assets,)
+    cov_matrix : ndarray : annualized covariance matrix, shape (assets, assets)
+    risk_free_rate : float : annual risk-free rate
+    points_per_segment : int : number of curve points between consecutive turning points
+    lower_bounds : float or ndarray : lowest weight of each asset (0 for long-only)
+    upper_bounds : float or ndarray : highest weight of each asset
+
+    Returns:
+    frontier : dict : 'turning_points', the curve ('weights', 'returns', 'volatility'), and the
+                      'max_sharpe' and 'min_volatility' portfolios as dicts of weights, returns, volatility and sharpe
+    """
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    cov_matrix = as_array(cov_matrix)
+    turning_points = critical_line(mean_returns, cov_matrix, lower_bounds, upper_bounds)
+
+    # Every segment between turning points is itself on the frontier
+    steps = np.linspace(0, 1, points_per_segment, endpoint=False)
+    curve = [start + np.outer(steps, end - start) for start, end in zip(turning_points[:-1], turning_points[1:])]
+    curve = np.vstack(curve + [turning_points[-1:]])
+
+    def describe(weights):
+        returns = weights @ mean_returns
+        volatility = np.sqrt(weights @ cov_matrix @ weights)
+        return {'weights': weights, 'returns': returns, 'volatility': volatility,
+                'sharpe': (returns - risk_free_rate) / volatility}
+
+    frontier = {
+        'turning_points': turning_points,
+        'weights': curve,
+        'returns': curve @ mean_returns,
+        'volatility': np.sqrt(np.einsum('ij,ij->i', curve @ cov_matrix, curve)),
+        'max_sharpe': describe(max_sharpe_portfolio(turning_points, mean_returns, cov_matrix, risk_free_rate)),
+        'min_volatility': describe(turning_points[-1])
+    }
+    return frontier
@@ -1,12 +1,15 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
 import matplotlib.pyplot as plt
 from datetime import datetime
+from functools import partial
+from mc_parallel import run_parallel, concatenate_paths
+from mc_paths import simulate_gbm_paths, gbm_increments
+from price_store import fetch_prices
 
 def fetch_historical_data(ticker, start_date, end_date):
     """
-    Fetch historical stock data using yfinance.
+    Fetch historical stock prices through the local price store.
     
     Parameters:
     ticker : str : stock ticker symbol
@@ -14,10 +17,9 @@ def fetch_historical_data(ticker, start_date, end_date):
     end_date : str : end date in YYYY-MM-DD format
     
     Returns:
-    stock_data : pd.DataFrame : historical stock data
+    stock_prices : pd.Series : adjusted close prices
     """
-    stock_data = yf.download(ticker, start=start_date, end=end_date)
-    return stock_data['Adj Close']
+    return fetch_prices(ticker, start_date, end_date)
 
 def calculate_log_returns(stock_prices):
     """
@@ -32,7 +34,7 @@ def calculate_log_returns(stock_prices):
     log_returns = np.log(stock_prices / stock_prices.shift(1))
     return log_returns[1:]
 
-def simulate_stock_prices(S0, mu, sigma, T, dt, N):
+def simulate_stock_prices(S0, mu, sigma, T, dt, N, out=None, sampler='pseudo', rng=None):
     """
     Simulate stock price paths using Geometric Brownian Motion.
     
@@ -43,16 +45,16 @@ def simulate_stock_prices(S0, mu, sigma, T, dt, N):
     T : float : time horizon (in years)
     dt : float : time step (in years)
     N : int : number of simulations
+    out : ndarray : optional buffer of shape (num_steps + 1, N) to fill
+    sampler : str : 'pseudo' or 'sobol' (scrambled Sobol with Brownian-bridge construction)
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     paths : ndarray : simulated stock price paths
     """
     num_steps = int(T / dt)
-    paths = np.zeros((num_steps + 1, N))
-    paths[0] = S0
-    for t in range(1, num_steps + 1):
-        z = np.random.standard_normal(N)
-        paths[t] = paths[t - 1] * np.exp((mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * z)
+    drift, diffusion = gbm_increments(mu, sigma, dt)
+    paths = simulate_gbm_paths(S0, drift, diffusion, num_steps, N, out=out, rng=rng, sampler=sampler)
     return paths
 
 def plot_simulation(paths):
@@ -83,42 +85,46 @@ def plot_distribution(final_prices):
     plt.title('Distribution of Final Stock Prices from Monte Carlo Simulation')
     plt.show()
 
-# Parameters
-ticker = 'NVDA'  # Stock ticker symbol
-start_date = '2020-01-01'  # Start date for historical data
-end_date = datetime.today().strftime('%Y-%m-%d')  # Get today's date in YYYY-MM-DD format
-T = 1.0  # Time horizon (1 year)
-dt = 1/252  # Time step (1 trading day)
-N = 10000  # Number of simulations
+if __name__ == "__main__":
+    # Parameters
+    ticker = 'NVDA'  # Stock ticker symbol
+    start_date = '2020-01-01'  # Start date for historical data
+    end_date = datetime.today().strftime('%Y-%m-%d')  # Get today's date in YYYY-MM-DD format
+    T = 1.0  # Time horizon (1 year)
+    dt = 1/252  # Time step (1 trading day)
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
+    N = 10000  # Number of simulations
 
-# Fetch historical data
-stock_prices = fetch_historical_data(ticker, start_date, end_date)
+    # Fetch historical data
+    stock_prices = fetch_historical_data(ticker, start_date, end_date)
 
-# Calculate log returns
-log_returns = calculate_log_returns(stock_prices)
+    # Calculate log returns
+    log_returns = calculate_log_returns(stock_prices)
 
-# Estimate parameters
-mu = log_returns.mean()
-sigma = log_returns.std()
+    # Estimate parameters
+    mu = log_returns.mean()
+    sigma = log_returns.std()
 
-# Simulate future stock prices
-S0 = stock_prices[-1]
-paths = simulate_stock_prices(S0, mu, sigma, T, dt, N)
+    # Simulate future stock prices
+    S0 = stock_prices[-1]
+    simulate = partial(simulate_stock_prices, S0, mu, sigma, T, dt)
+    paths = run_parallel(simulate, N, seed=seed, workers=workers, combine=concatenate_paths)
 
-# Analyze the results
-final_prices = paths[-1]
-mean_final_price = np.mean(final_prices)
-median_final_price = np.median(final_prices)
-lower_confidence = np.percentile(final_prices, 5)
-upper_confidence = np.percentile(final_prices, 95)
+    # Analyze the results
+    final_prices = paths[-1]
+    mean_final_price = np.mean(final_prices)
+    median_final_price = np.median(final_prices)
+    lower_confidence = np.percentile(final_prices, 5)
+    upper_confidence = np.percentile(final_prices, 95)
 
-# Print the results
-print(f"Mean final stock price: ${mean_final_price:.2f}")
-print(f"Median final stock price: ${median_final_price:.2f}")
-print(f"5% confidence interval: ${lower_confidence:.2f} - ${upper_confidence:.2f}")
+    # Print the results
+    print(f"Mean final stock price: ${mean_final_price:.2f}")
+    print(f"Median final stock price: ${median_final_price:.2f}")
+    print(f"5% confidence interval: ${lower_confidence:.2f} - ${upper_confidence:.2f}")
 
-# Plot the simulation results
-plot_simulation(paths)
+    # Plot the simulation results
+    plot_simulation(paths)
 
-# Plot the distribution of final stock prices
-plot_distribution(final_prices)
+    # Plot the distribution of final stock prices
+    plot_distribution(final_prices)
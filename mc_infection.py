@@ -1,10 +1,15 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from functools import partial
+from mc_parallel import run_parallel
+from mc_stats import RunningMoments, QuantileSketch, merge_accumulators
 
-def simulate_disease_spread(population_size, initial_infected, transmission_rate, recovery_rate, days, iterations):
+def simulate_disease_spread(population_size, initial_infected, transmission_rate, recovery_rate, days, iterations, rng=None):
     """
     Simulate the spread of a disease within a population using Monte Carlo simulation.
     
+    All iterations advance together, one vectorized binomial draw per day.
+    
     Parameters:
     population_size : int : total population size
     initial_infected : int : initial number of infected individuals
@@ -12,43 +17,67 @@ def simulate_disease_spread(population_size, initial_infected, transmission_rate
     recovery_rate : float : probability of recovery per day
     days : int : number of days to simulate
     iterations : int : number of Monte Carlo simulations
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     infection_counts : ndarray : simulated number of infected individuals over time
     """
+    if rng is None:
+        rng = np.random.default_rng()
     infection_counts = np.zeros((days, iterations))
     
-    for i in range(iterations):
-        infected = initial_infected
-        recovered = 0
-        susceptible = population_size - infected
-        
-        daily_infections = []
+    infected = np.full(iterations, initial_infected, dtype=np.int64)
+    recovered = np.zeros(iterations, dtype=np.int64)
+    susceptible = population_size - infected
+    
+    for day in range(days):
+        new_infections = rng.binomial(susceptible, np.minimum(transmission_rate * infected / population_size, 1))
+        new_recoveries = rng.binomial(infected, recovery_rate)
         
-        for day in range(days):
-            new_infections = np.random.binomial(susceptible, transmission_rate * infected / population_size)
-            new_recoveries = np.random.binomial(infected, recovery_rate)
-            
-            infected += new_infections - new_recoveries
-            susceptible -= new_infections
-            recovered += new_recoveries
-            
-            daily_infections.append(infected)
+        infected += new_infections - new_recoveries
+        susceptible -= new_infections
+        recovered += new_recoveries
         
-        infection_counts[:, i] = daily_infections
+        infection_counts[day] = infected
     
     return infection_counts
 
+def summarize_disease_spread(infection_counts, rng=None):
+    """
+    Reduce simulated infection counts to mergeable statistics.
+    
+    Parameters:
+    infection_counts : ndarray : simulated number of infected individuals over time
+    rng : np.random.Generator : random number generator for the quantile sketches
+    
+    Returns:
+    statistics : dict : daily 'moments', one quantile sketch per day in 'sketches' and the 'final' counts
+    """
+    statistics = {
+        'moments': RunningMoments(infection_counts.shape[0]).update(infection_counts),
+        'sketches': [QuantileSketch(rng=rng).update(day_counts) for day_counts in infection_counts],
+        'final': infection_counts[-1].copy()
+    }
+    return statistics
+
+def accumulate_disease_spread(population_size, initial_infected, transmission_rate, recovery_rate, days, iterations, rng=None):
+    """
+    Simulate a chunk of iterations and keep only their statistics (see summarize_disease_spread).
+    """
+    infection_counts = simulate_disease_spread(population_size, initial_infected, transmission_rate, recovery_rate, days, iterations, rng)
+    return summarize_disease_spread(infection_counts, rng)
+
 def plot_disease_spread(infection_counts):
     """
     Plot the number of infected individuals over time.
     
     Parameters:
-    infection_counts : ndarray : simulated number of infected individuals over time
+    infection_counts : ndarray or dict : simulated number of infected individuals over time, or their statistics
     """
-    mean_infections = np.mean(infection_counts, axis=1)
-    lower_confidence = np.percentile(infection_counts, 5, axis=1)
-    upper_confidence = np.percentile(infection_counts, 95, axis=1)
+    if not isinstance(infection_counts, dict):
+        infection_counts = summarize_disease_spread(infection_counts)
+    mean_infections = infection_counts['moments'].mean
+    lower_confidence, upper_confidence = np.array([sketch.quantile([0.05, 0.95]) for sketch in infection_counts['sketches']]).T
     
     plt.figure(figsize=(10, 6))
     plt.plot(mean_infections, label='Mean Infections')
@@ -64,9 +93,9 @@ def plot_final_infection_distribution(infection_counts):
     Plot the distribution of final infection counts.
     
     Parameters:
-    infection_counts : ndarray : simulated number of infected individuals over time
+    infection_counts : ndarray or dict : simulated number of infected individuals over time, or their statistics
     """
-    final_infections = infection_counts[-1]
+    final_infections = infection_counts['final'] if isinstance(infection_counts, dict) else infection_counts[-1]
     
     plt.figure(figsize=(10, 6))
     plt.hist(final_infections, bins=50, edgecolor='black')
@@ -75,19 +104,23 @@ def plot_final_infection_distribution(infection_counts):
     plt.title('Distribution of Final Infection Counts from Monte Carlo Simulation')
     plt.show()
 
-# Parameters
-population_size = 8000000000  # Total population size
-initial_infected = 1  # Initial number of infected individuals
-transmission_rate = 1  # Probability of disease transmission per contact
-recovery_rate = 0.05  # Probability of recovery per day
-days = 365  # Number of days to simulate
-iterations = 1000  # Number of Monte Carlo simulations
+if __name__ == "__main__":
+    # Parameters
+    population_size = 8000000000  # Total population size
+    initial_infected = 1  # Initial number of infected individuals
+    transmission_rate = 1  # Probability of disease transmission per contact
+    recovery_rate = 0.05  # Probability of recovery per day
+    days = 365  # Number of days to simulate
+    iterations = 1000  # Number of Monte Carlo simulations
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
 
-# Run the Monte Carlo simulation
-infection_counts = simulate_disease_spread(population_size, initial_infected, transmission_rate, recovery_rate, days, iterations)
+    # Run the Monte Carlo simulation, streaming each chunk into mergeable statistics
+    simulate = partial(accumulate_disease_spread, population_size, initial_infected, transmission_rate, recovery_rate, days)
+    infection_counts = run_parallel(simulate, iterations, seed=seed, workers=workers, block_size=250, combine=merge_accumulators)
 
-# Plot the simulation results
-plot_disease_spread(infection_counts)
+    # Plot the simulation results
+    plot_disease_spread(infection_counts)
 
-# Plot the distribution of final infection counts
-plot_final_infection_distribution(infection_counts)
+    # Plot the distribution of final infection counts
+    plot_final_infection_distribution(infection_counts)
@@ -1,12 +1,15 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
 import matplotlib.pyplot as plt
 from datetime import datetime
-from scipy.optimize import minimize
+from pf_optimizer import optimize_portfolio as optimize_sharpe
+from mc_portfolios import simulate_portfolios, annualized_moments, leverage_sweep
+from mc_frontier import efficient_frontier
+from pf_covariance import estimate_covariance
+from price_store import fetch_prices
 
 def fetch_historical_data(tickers, start_date, end_date):
-    stock_data = yf.download(tickers, start=start_date, end=end_date)['Adj Close']
+    stock_data = fetch_prices(tickers, start_date, end_date)
     return stock_data
 
 def calculate_daily_returns(stock_data):
@@ -15,45 +18,27 @@ def calculate_daily_returns(stock_data):
 
 def portfolio_performance(weights, mean_returns, cov_matrix, risk_free_rate=0.01):
     returns = np.sum(mean_returns * weights) * 252
-    std_dev = np.sqrt(np.dot(weights.T, np.dot(cov_matrix * 252, weights)))
+    std_dev = np.sqrt(weights @ ((cov_matrix * 252) @ weights))
     sharpe_ratio = (returns - risk_free_rate) / std_dev
     return returns, std_dev, sharpe_ratio
 
-def negative_sharpe_ratio(weights, mean_returns, cov_matrix, risk_free_rate=0.01):
-    returns, std_dev, sharpe_ratio = portfolio_performance(weights, mean_returns, cov_matrix, risk_free_rate)
-    return -sharpe_ratio
-
-def check_sum(weights):
-    return np.sum(weights) - 1
-
-def risk_constraint(weights, mean_returns, cov_matrix, max_risk):
-    returns, std_dev, sharpe_ratio = portfolio_performance(weights, mean_returns, cov_matrix)
-    return max_risk - std_dev
-
-def leverage_constraint(weights, max_leverage):
-    return max_leverage - np.sum(np.abs(weights))
-
-def optimize_portfolio(mean_returns, cov_matrix, risk_free_rate, max_risk, max_leverage):
-    num_assets = len(mean_returns)
-    args = (mean_returns, cov_matrix, risk_free_rate)
-    constraints = ({'type': 'eq', 'fun': check_sum},
-                   {'type': 'ineq', 'fun': lambda x: risk_constraint(x, mean_returns, cov_matrix, max_risk)},
-                   {'type': 'ineq', 'fun': lambda x: leverage_constraint(x, max_leverage)})
-    bounds = tuple((-1, 1) for asset in range(num_assets))
-    result = minimize(negative_sharpe_ratio, num_assets*[1./num_assets,], args=args,
-                      method='SLSQP', bounds=bounds, constraints=constraints)
+def optimize_portfolio(mean_returns, cov_matrix, risk_free_rate, max_risk, max_leverage, x0=None):
+    # Annualized NumPy moments and analytic gradients for SLSQP
+    result = optimize_sharpe(np.asarray(mean_returns) * 252, cov_matrix * 252, risk_free_rate,
+                             max_risk=max_risk, max_leverage=max_leverage, bounds=(-1, 1), x0=x0)
     return result
 
-def plot_simulation(results, weights_record, tickers, investment_amount, leverage_levels):
-    max_sharpe_idx = np.argmax(results[2])
-    max_sharpe_allocation = weights_record[int(results[3,max_sharpe_idx])]
-    max_sharpe_return = results[0,max_sharpe_idx]
-    max_sharpe_std_dev = results[1,max_sharpe_idx]
+def plot_simulation(portfolios, frontier, tickers, investment_amount, sweep):
+    # Exact optimal portfolios from the frontier solver rather than the best random samples
+    max_sharpe = frontier['max_sharpe']
+    max_sharpe_allocation = max_sharpe['weights']
+    max_sharpe_return = max_sharpe['returns']
+    max_sharpe_std_dev = max_sharpe['volatility']
 
-    min_vol_idx = np.argmin(results[1])
-    min_vol_allocation = weights_record[int(results[3,min_vol_idx])]
-    min_vol_return = results[0,min_vol_idx]
-    min_vol_std_dev = results[1,min_vol_idx]
+    min_vol = frontier['min_volatility']
+    min_vol_allocation = min_vol['weights']
+    min_vol_return = min_vol['returns']
+    min_vol_std_dev = min_vol['volatility']
 
     print("Maximum Sharpe Ratio Portfolio Allocation\n")
     print("Annualized Return:", max_sharpe_return)
@@ -72,19 +57,21 @@ def plot_simulation(results, weights_record, tickers, investment_amount, leverag
         print(f"{ticker}: {min_vol_allocation[i]:.2%}")
 
     plt.figure(figsize=(10, 6))
-    plt.scatter(results[1,:], results[0,:], c=results[2,:], cmap='viridis')
+    plt.scatter(portfolios.volatility, portfolios.returns, c=portfolios.sharpe, cmap='viridis')
     plt.colorbar(label='Sharpe Ratio')
+    plt.plot(frontier['volatility'], frontier['returns'], color='black', label='Efficient Frontier')
     plt.scatter(max_sharpe_std_dev, max_sharpe_return, c='red', marker='*', s=200)
     plt.scatter(min_vol_std_dev, min_vol_return, c='blue', marker='*', s=200)
     plt.title('Efficient Frontier')
     plt.xlabel('Volatility')
     plt.ylabel('Return')
+    plt.legend()
     plt.show()
 
     # Plot leverage impact
     plt.figure(figsize=(10, 6))
-    for leverage, res in leverage_levels.items():
-        plt.scatter(res[1,:], res[0,:], label=f'Leverage {leverage}')
+    for leverage, returns, volatility in zip(sweep['leverage'], sweep['returns'], sweep['volatility']):
+        plt.scatter(volatility, returns, label=f'Leverage {leverage}')
     plt.colorbar(label='Sharpe Ratio')
     plt.title('Efficient Frontier with Different Leverage Levels')
     plt.xlabel('Volatility')
@@ -98,8 +85,12 @@ def main():
     start_date = '2020-01-01'
     end_date = datetime.today().strftime('%Y-%m-%d')
     risk_free_rate = 0.01
+    seed = None  # Set an integer for a reproducible run
+    cov_estimator = 'sample'  # 'sample', 'ledoit_wolf', 'oas', 'ewma' or 'factor'
     max_risk = 0.2  # Maximum acceptable risk (standard deviation)
     max_leverage = 1.5  # Maximum leverage allowed
+    financing_rate = 0.03  # Annual cost of the money borrowed for leverage
+    leverage_levels = [1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0, 10.0]
 
     # User input for investment amount
     investment_amount = float(input("Enter the amount of investment: "))
@@ -112,7 +103,7 @@ def main():
 
     # Estimate parameters
     mean_returns = daily_returns.mean()
-    cov_matrix = daily_returns.cov()
+    cov_matrix = estimate_covariance(daily_returns, cov_estimator)
 
     # Optimize portfolio
     result = optimize_portfolio(mean_returns, cov_matrix, risk_free_rate, max_risk, max_leverage)
@@ -120,37 +111,17 @@ def main():
 
     # Simulate portfolio allocations
     num_portfolios = 5000
-    results = np.zeros((4, num_portfolios))
-    weights_record = []
-
-    for i in range(num_portfolios):
-        weights = np.random.random(len(tickers))
-        weights /= np.sum(weights)
-        weights_record.append(weights)
-
-        portfolio_return, portfolio_std_dev, sharpe_ratio = portfolio_performance(weights, mean_returns, cov_matrix, risk_free_rate)
-
-        results[0,i] = portfolio_return
-        results[1,i] = portfolio_std_dev
-        results[2,i] = sharpe_ratio
-        results[3,i] = i
-
-    # Analyze impact of different leverage levels
-    leverage_levels = {}
-    for leverage in [1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0, 10.0]:
-        res = np.zeros((4, num_portfolios))
-        for i in range(num_portfolios):
-            weights = np.random.random(len(tickers))
-            weights /= np.sum(weights)
-            portfolio_return, portfolio_std_dev, sharpe_ratio = portfolio_performance(weights, mean_returns, cov_matrix, risk_free_rate)
-            res[0,i] = portfolio_return
-            res[1,i] = portfolio_std_dev
-            res[2,i] = sharpe_ratio
-            res[3,i] = i
-        leverage_levels[leverage] = res
+    rng = np.random.default_rng(seed)
+    portfolios = simulate_portfolios(daily_returns, num_portfolios, risk_free_rate, rng=rng, cov_estimator=cov_estimator)
+
+    # Trace the exact long-only efficient frontier
+    frontier = efficient_frontier(*annualized_moments(daily_returns, cov_estimator=cov_estimator), risk_free_rate)
+
+    # Analyze impact of different leverage levels on the same portfolios, net of financing costs
+    sweep = leverage_sweep(portfolios, leverage_levels, risk_free_rate, financing_rate, max_risk)
 
     # Plot the simulation results
-    plot_simulation(results, weights_record, tickers, investment_amount, leverage_levels)
+    plot_simulation(portfolios, frontier, tickers, investment_amount, sweep)
 
     print("\nOptimal Portfolio Allocation with Risk and Leverage Constraint\n")
     print("Annualized Return:", portfolio_performance(optimal_weights, mean_returns, cov_matrix, risk_free_rate)[0])
@@ -160,5 +131,14 @@ def main():
     for i, ticker in enumerate(tickers):
         print(f"{ticker}: {optimal_weights[i]:.2%}")
 
+    # Refine the best simulated portfolio of each leverage level with the constrained solver
+    print("\nOptimal Sharpe Ratio by Leverage Level\n")
+    annual_mean, annual_cov = annualized_moments(daily_returns, cov_estimator=cov_estimator)
+    for leverage, x0 in zip(sweep['leverage'], sweep['x0']):
+        levered = optimize_sharpe(annual_mean, annual_cov, risk_free_rate, max_risk=max_risk, max_leverage=leverage,
+                                  bounds=(0, leverage), x0=x0, budget=leverage, financing_rate=financing_rate)
+        status = f"{-levered.fun:.4f}" if levered.success else "infeasible within the risk limit"
+        print(f"Leverage {leverage:g}: {status}")
+
 if __name__ == "__main__":
     main()
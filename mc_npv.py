@@ -1,19 +1,24 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from functools import partial
+from mc_parallel import run_parallel
 
-def simulate_cash_flows(years, mean_cash_flow, std_dev_cash_flow):
+def simulate_cash_flows(years, mean_cash_flow, std_dev_cash_flow, rng=None):
     """
     Simulate random annual cash flows based on a normal distribution.
     
     Parameters:
-    years : int : number of years
+    years : int or tuple : number of years (or shape of the array of cash flows, years last)
     mean_cash_flow : float : mean annual cash flow
     std_dev_cash_flow : float : standard deviation of annual cash flows
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     cash_flows : ndarray : simulated annual cash flows
     """
-    return np.random.normal(mean_cash_flow, std_dev_cash_flow, years)
+    if rng is None:
+        rng = np.random.default_rng()
+    return rng.normal(mean_cash_flow, std_dev_cash_flow, years)
 
 def calculate_npv(initial_investment, discount_rate, cash_flows):
     """
@@ -22,17 +27,17 @@ def calculate_npv(initial_investment, discount_rate, cash_flows):
     Parameters:
     initial_investment : float : initial investment
     discount_rate : float : discount rate
-    cash_flows : ndarray : annual cash flows
+    cash_flows : ndarray : annual cash flows (years on the last axis)
     
     Returns:
-    npv : float : Net Present Value
+    npv : float or ndarray : Net Present Value
     """
-    years = len(cash_flows)
+    years = np.shape(cash_flows)[-1]
     discounted_cash_flows = cash_flows / (1 + discount_rate) ** np.arange(1, years + 1)
-    npv = np.sum(discounted_cash_flows) - initial_investment
+    npv = np.sum(discounted_cash_flows, axis=-1) - initial_investment
     return npv
 
-def monte_carlo_npv_simulation(initial_investment, discount_rate, years, mean_cash_flow, std_dev_cash_flow, iterations):
+def monte_carlo_npv_simulation(initial_investment, discount_rate, years, mean_cash_flow, std_dev_cash_flow, iterations, rng=None):
     """
     Perform a Monte Carlo simulation to estimate the NPV of a project.
     
@@ -43,14 +48,13 @@ def monte_carlo_npv_simulation(initial_investment, discount_rate, years, mean_ca
     mean_cash_flow : float : mean annual cash flow
     std_dev_cash_flow : float : standard deviation of annual cash flows
     iterations : int : number of Monte Carlo simulations
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     npvs : ndarray : simulated NPVs
     """
-    npvs = np.zeros(iterations)
-    for i in range(iterations):
-        cash_flows = simulate_cash_flows(years, mean_cash_flow, std_dev_cash_flow)
-        npvs[i] = calculate_npv(initial_investment, discount_rate, cash_flows)
+    cash_flows = simulate_cash_flows((iterations, years), mean_cash_flow, std_dev_cash_flow, rng)
+    npvs = calculate_npv(initial_investment, discount_rate, cash_flows)
     return npvs
 
 def plot_npv_distribution(npvs):
@@ -67,26 +71,30 @@ def plot_npv_distribution(npvs):
     plt.title('Distribution of NPVs from Monte Carlo Simulation')
     plt.show()
 
-# Parameters
-initial_investment = 100000  # Initial investment amount
-discount_rate = 0.1  # Discount rate
-years = 10  # Number of years
-mean_cash_flow = 20000  # Mean annual cash flow
-std_dev_cash_flow = 5000  # Standard deviation of annual cash flows
-iterations = 10000  # Number of Monte Carlo simulations
+if __name__ == "__main__":
+    # Parameters
+    initial_investment = 100000  # Initial investment amount
+    discount_rate = 0.1  # Discount rate
+    years = 10  # Number of years
+    mean_cash_flow = 20000  # Mean annual cash flow
+    std_dev_cash_flow = 5000  # Standard deviation of annual cash flows
+    iterations = 10000  # Number of Monte Carlo simulations
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
 
-# Run the Monte Carlo simulation
-npvs = monte_carlo_npv_simulation(initial_investment, discount_rate, years, mean_cash_flow, std_dev_cash_flow, iterations)
+    # Run the Monte Carlo simulation
+    simulate = partial(monte_carlo_npv_simulation, initial_investment, discount_rate, years, mean_cash_flow, std_dev_cash_flow)
+    npvs = run_parallel(simulate, iterations, seed=seed, workers=workers)
 
-# Analyze the results
-mean_npv = np.mean(npvs)
-median_npv = np.median(npvs)
-positive_npv_probability = np.sum(npvs > 0) / iterations
+    # Analyze the results
+    mean_npv = np.mean(npvs)
+    median_npv = np.median(npvs)
+    positive_npv_probability = np.sum(npvs > 0) / iterations
 
-# Print the results
-print(f"Mean NPV: ${mean_npv:,.2f}")
-print(f"Median NPV: ${median_npv:,.2f}")
-print(f"Probability of positive NPV: {positive_npv_probability:.2%}")
+    # Print the results
+    print(f"Mean NPV: ${mean_npv:,.2f}")
+    print(f"Median NPV: ${median_npv:,.2f}")
+    print(f"Probability of positive NPV: {positive_npv_probability:.2%}")
 
-# Plot the distribution of NPVs
-plot_npv_distribution(npvs)
+    # Plot the distribution of NPVs
+    plot_npv_distribution(npvs)
@@ -0,0 +1,100 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# Number of iterations per independent random stream
+DEFAULT_BLOCK_SIZE = 10000
+
+def split_iterations(iterations, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Split a number of iterations into fixed-size blocks.
+
+    The split only depends on the number of iterations and the block size,
+    never on the number of workers, which is what keeps parallel runs
+    reproducible.
+
+    Parameters:
+    iterations : int : total number of iterations
+    block_size : int : number of iterations per block
+
+    Returns:
+    sizes : list : number of iterations in each block
+    """
+    if block_size < 1:
+        raise ValueError(f"block_size must be positive, got {block_size}")
+    full_blocks, remainder = divmod(iterations, block_size)
+    sizes = [block_size] * full_blocks
+    if remainder:
+        sizes.append(remainder)
+    return sizes
+
+def _run_block(simulate, iterations, seed_sequence):
+    return simulate(iterations, rng=np.random.default_rng(seed_sequence))
+
+def run_parallel(simulate, iterations, seed=None, workers=None, block_size=DEFAULT_BLOCK_SIZE,
+                 combine=np.concatenate):
+    """
+    Run a Monte Carlo simulator over a process pool with independent random streams.
+
+    The iterations are split into fixed-size blocks and every block gets its
+    own np.random.Generator spawned from one SeedSequence. Blocks are merged
+    in order, so for a given seed and block size the result is bit-identical
+    whatever the number of workers.
+
+    Parameters:
+    simulate : callable : picklable function called as simulate(n, rng=generator) for a block of n iterations
+                          (use functools.partial to bind the other parameters)
+    iterations : int : total number of iterations
+    seed : int or np.random.SeedSequence : seed of the root SeedSequence, None for fresh entropy
+    workers : int : number of worker processes, None for every core, 1 to run in-process
+    block_size : int : number of iterations per block
+    combine : callable : function merging the list of block results
+
+    Returns:
+    result : merged result of all blocks
+    """
+    sizes = split_iterations(iterations, block_size)
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    streams = root.spawn(len(sizes))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(sizes))
+
+    if workers <= 1:
+        results = [_run_block(simulate, size, stream) for size, stream in zip(sizes, streams)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(partial(_run_block, simulate), sizes, streams))
+    if len(results) == 1:
+        # Nothing to merge, and no copy of a possibly large block
+        return results[0]
+    return combine(results)
+
+def concatenate_paths(results):
+    """
+    Merge path blocks laid out as (steps, iterations) along the iteration axis.
+
+    Parameters:
+    results : list : path arrays of shape (steps, block iterations)
+
+    Returns:
+    paths : ndarray : merged paths of shape (steps, iterations)
+    """
+    return np.concatenate(results, axis=1)
+
+def sum_counts(results):
+    """
+    Merge block results given as dictionaries of counts by summing them key by key.
+
+    Parameters:
+    results : list : dictionaries of counts
+
+    Returns:
+    totals : dict : summed counts
+    """
+    totals = {}
+    for counts in results:
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
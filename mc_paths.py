@@ -0,0 +1,234 @@
+import numpy as np
+from mc_qmc import sobol_normals, brownian_bridge
+
+def draw_normals(out, rng, antithetic=False, moment_matching=False, sampler='pseudo'):
+    """
+    Fill a buffer with standard normal shocks, one column per path.
+
+    Parameters:
+    out : ndarray : C-contiguous float64 buffer of shape (rows, paths) or (paths,) to fill
+    rng : np.random.Generator : random number generator
+    antithetic : bool : draw the first half of the paths and mirror it (-z) into the second half
+    moment_matching : bool : rescale every row to an exact sample mean of 0 and standard deviation of 1
+    sampler : str : 'pseudo' for i.i.d. pseudo-random shocks, 'sobol' for scrambled Sobol points
+                    (arranged with a Brownian bridge when there is more than one row)
+
+    Returns:
+    out : ndarray : the filled buffer
+    """
+    if sampler not in ('pseudo', 'sobol'):
+        raise ValueError(f"sampler must be 'pseudo' or 'sobol', got {sampler!r}")
+    paths = out.shape[-1]
+    if antithetic:
+        if paths % 2:
+            raise ValueError(f"antithetic sampling needs an even number of paths, got {paths}")
+        half = paths // 2
+        out[..., :half] = _standard_normals(out[..., :half].shape, rng, sampler)
+        np.negative(out[..., :half], out=out[..., half:])
+    elif sampler == 'sobol':
+        out[...] = _standard_normals(out.shape, rng, sampler)
+    else:
+        rng.standard_normal(out=out)
+    if moment_matching:
+        out -= out.mean(axis=-1, keepdims=True)
+        out /= out.std(axis=-1, keepdims=True)
+    return out
+
+def _standard_normals(shape, rng, sampler):
+    if sampler == 'pseudo':
+        return rng.standard_normal(shape)
+    if len(shape) == 1:
+        return sobol_normals(1, shape[0], rng)[0]
+    return brownian_bridge(sobol_normals(shape[0], shape[1], rng))
+
+def simulate_gbm_paths(start_price, drift, diffusion, steps, iterations, out=None, rng=None,
+                       antithetic=False, moment_matching=False, sampler='pseudo', shift=0.0):
+    """
+    Simulate log-normal price paths in a single vectorized pass.
+
+    Every step applies the log-increment drift + diffusion * z with z ~ N(0, 1).
+    The whole (steps x iterations) block of shocks is drawn at once and the
+    paths are built with a cumulative sum of the log-increments, all inside
+    the output buffer, so no per-step temporaries are allocated. Passing
+    drift and diffusion as (steps, 1) arrays gives a non-uniform time grid.
+    A non-zero shift moves the mean of every shock for importance sampling;
+    reweight the paths with likelihood_ratios.
+
+    Parameters:
+    start_price : float : initial price of every path
+    drift : float or ndarray : deterministic part of each log-increment
+    diffusion : float or ndarray : standard deviation of each log-increment
+    steps : int : number of time steps
+    iterations : int : number of simulated paths
+    out : ndarray : optional C-contiguous float64 buffer of shape (steps + 1, iterations) to fill
+    rng : np.random.Generator : random number generator (a fresh one if None)
+    antithetic : bool : pair every path with its mirrored (-z) path
+    moment_matching : bool : match the first two moments of the shocks at every step
+    sampler : str : 'pseudo' or 'sobol' (scrambled Sobol with Brownian-bridge construction)
+    shift : float : mean of the shocks, z ~ N(shift, 1) (0 for the real-world measure)
+
+    Returns:
+    paths : ndarray : simulated price paths, shape (steps + 1, iterations)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if out is None:
+        out = np.empty((steps + 1, iterations))
+    elif out.shape != (steps + 1, iterations):
+        raise ValueError(f"out has shape {out.shape}, expected {(steps + 1, iterations)}")
+
+    out[0] = 0.0
+    draw_normals(out[1:], rng, antithetic, moment_matching, sampler)
+    if shift:
+        out[1:] += shift
+    out[1:] *= diffusion
+    out[1:] += drift
+    np.cumsum(out, axis=0, out=out)
+    np.exp(out, out=out)
+    out *= start_price
+    return out
+
+def gbm_increments(mu, sigma, dt):
+    """
+    Convert GBM parameters into the per-step drift and diffusion of the log-price.
+
+    Parameters:
+    mu : float : drift of the price process
+    sigma : float : volatility of the price process
+    dt : float : time step (in years)
+
+    Returns:
+    drift : float : per-step drift of the log-price
+    diffusion : float : per-step standard deviation of the log-price
+    """
+    drift = (mu - 0.5 * sigma ** 2) * dt
+    diffusion = sigma * np.sqrt(dt)
+    return drift, diffusion
+
+def simulate_terminal_values(start_price, drift, diffusion, steps, iterations, rng=None,
+                             antithetic=False, moment_matching=False, sampler='pseudo', shift=0.0):
+    """
+    Sample the terminal value of log-normal price paths directly.
+
+    The sum of `steps` independent log-increments is itself normal with mean
+    steps * drift and standard deviation sqrt(steps) * diffusion, so a single
+    draw per path is enough when only the terminal price matters (European
+    payoffs, VaR on the final price). Memory is O(iterations).
+
+    Parameters:
+    start_price : float : initial price of every path
+    drift : float : deterministic part of each log-increment
+    diffusion : float : standard deviation of each log-increment
+    steps : int : number of time steps
+    iterations : int : number of simulated paths
+    rng : np.random.Generator : random number generator (a fresh one if None)
+    antithetic : bool : pair every path with its mirrored (-z) path
+    moment_matching : bool : match the first two moments of the terminal shocks
+    sampler : str : 'pseudo' or 'sobol' (one-dimensional scrambled Sobol points)
+    shift : float : mean of every per-step shock, as in simulate_gbm_paths (0 for the real-world measure)
+
+    Returns:
+    terminal_values : ndarray : simulated terminal prices, shape (iterations,)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    terminal_values = draw_normals(np.empty(iterations), rng, antithetic, moment_matching, sampler)
+    if shift:
+        # `steps` shocks of mean shift add up to one normal of mean sqrt(steps) * shift
+        terminal_values += np.sqrt(steps) * shift
+    terminal_values *= np.sqrt(steps) * diffusion
+    terminal_values += steps * drift
+    np.exp(terminal_values, out=terminal_values)
+    terminal_values *= start_price
+    return terminal_values
+
+def likelihood_ratios(start_price, terminal_values, drift, diffusion, steps, shift):
+    """
+    Importance-sampling weights of paths simulated with shifted shocks.
+
+    With shocks drawn from N(shift, 1) instead of N(0, 1), the likelihood
+    ratio of a path only depends on the sum of its shocks, which the terminal
+    price gives back: exp(-shift * sum(z) + steps * shift ** 2 / 2). Weighted
+    averages over the shifted paths are then unbiased for the real-world
+    measure. Only valid for a scalar drift and diffusion.
+
+    Parameters:
+    start_price : float : initial price of every path
+    terminal_values : ndarray : terminal prices of the shifted paths
+    drift : float : deterministic part of each log-increment
+    diffusion : float : standard deviation of each log-increment
+    steps : int : number of time steps
+    shift : float : mean of the shocks the paths were simulated with
+
+    Returns:
+    weights : ndarray : likelihood ratio of every path, same shape as terminal_values
+    """
+    shock_sum = (np.log(terminal_values / start_price) - steps * drift) / diffusion
+    return np.exp(-shift * shock_sum + 0.5 * steps * shift ** 2)
+
+def iterate_gbm_steps(start_price, drift, diffusion, steps, iterations, rng=None):
+    """
+    Stream log-normal price paths one time step at a time.
+
+    Only the current prices are kept, so memory is O(iterations) whatever the
+    number of steps. The same array is yielded (and updated in place) at every
+    step; copy it if a snapshot must outlive the next iteration.
+
+    Parameters:
+    start_price : float : initial price of every path
+    drift : float : deterministic part of each log-increment
+    diffusion : float : standard deviation of each log-increment
+    steps : int : number of time steps
+    iterations : int : number of simulated paths
+    rng : np.random.Generator : random number generator (a fresh one if None)
+
+    Yields:
+    prices : ndarray : prices after each step, shape (iterations,)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    log_prices = np.full(iterations, np.log(start_price))
+    shocks = np.empty(iterations)
+    prices = np.empty(iterations)
+    for _ in range(steps):
+        rng.standard_normal(out=shocks)
+        shocks *= diffusion
+        shocks += drift
+        log_prices += shocks
+        np.exp(log_prices, out=prices)
+        yield prices
+
+def simulate_path_statistics(start_price, drift, diffusion, steps, iterations, rng=None):
+    """
+    Compute path-dependent statistics without storing the paths.
+
+    Running minimum, maximum and sum are updated step by step, so memory is
+    O(iterations). The average is taken over the monitoring dates 1..steps,
+    as for an arithmetic Asian payoff.
+
+    Parameters:
+    start_price : float : initial price of every path
+    drift : float : deterministic part of each log-increment
+    diffusion : float : standard deviation of each log-increment
+    steps : int : number of time steps
+    iterations : int : number of simulated paths
+    rng : np.random.Generator : random number generator (a fresh one if None)
+
+    Returns:
+    statistics : dict : 'terminal', 'minimum', 'maximum' and 'average' arrays of shape (iterations,)
+    """
+    minimum = np.full(iterations, float(start_price))
+    maximum = np.full(iterations, float(start_price))
+    total = np.zeros(iterations)
+    prices = minimum
+    for prices in iterate_gbm_steps(start_price, drift, diffusion, steps, iterations, rng):
+        np.minimum(minimum, prices, out=minimum)
+        np.maximum(maximum, prices, out=maximum)
+        total += prices
+    statistics = {
+        'terminal': prices.copy(),
+        'minimum': minimum,
+        'maximum': maximum,
+        'average': total / max(steps, 1)
+    }
+    return statistics
@@ -1,28 +1,26 @@
-import random
+import numpy as np
 import matplotlib.pyplot as plt
+from mc_parallel import run_parallel
 
-def monte_carlo_pi(num_points):
-    inside_circle = 0
-    points_x = []
-    points_y = []
-    colors = []
-
-    for _ in range(num_points):
-        x = random.uniform(0, 1)
-        y = random.uniform(0, 1)
-        distance = x**2 + y**2
-
-        points_x.append(x)
-        points_y.append(y)
-        if distance <= 1:
-            inside_circle += 1
-            colors.append('blue')
-        else:
-            colors.append('red')
+def monte_carlo_pi(num_points, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+    points_x = rng.random(num_points)
+    points_y = rng.random(num_points)
+    inside = points_x**2 + points_y**2 <= 1
+    inside_circle = np.count_nonzero(inside)
+    colors = np.where(inside, 'blue', 'red')
 
     pi_estimate = (inside_circle / num_points) * 4
     return pi_estimate, points_x, points_y, colors
 
+def count_points_inside(num_points, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+    x = rng.random(num_points)
+    y = rng.random(num_points)
+    return np.count_nonzero(x**2 + y**2 <= 1)
+
 def plot_simulation(points_x, points_y, colors):
     plt.figure(figsize=(6, 6))
     plt.scatter(points_x, points_y, c=colors, s=1)
@@ -31,14 +29,23 @@ def plot_simulation(points_x, points_y, colors):
     plt.title('Monte Carlo Simulation for Estimating π')
     plt.show()
 
-# Number of random points to generate
-num_points = 10000
+if __name__ == "__main__":
+    # Number of random points to generate
+    num_points = 10000
+    num_points_parallel = 100000000  # Number of points for the parallel estimate
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
+
+    # Run the Monte Carlo simulation
+    pi_estimate, points_x, points_y, colors = monte_carlo_pi(num_points, np.random.default_rng(seed))
 
-# Run the Monte Carlo simulation
-pi_estimate, points_x, points_y, colors = monte_carlo_pi(num_points)
+    # Print the estimated value of π
+    print(f"Estimated value of pi after {num_points} points: {pi_estimate}")
 
-# Print the estimated value of π
-print(f"Estimated value of pi after {num_points} points: {pi_estimate}")
+    # Refine the estimate over every core
+    inside_circle = run_parallel(count_points_inside, num_points_parallel, seed=seed, workers=workers,
+                                 block_size=1000000, combine=sum)
+    print(f"Estimated value of pi after {num_points_parallel} points: {inside_circle / num_points_parallel * 4}")
 
-# Plot the simulation
-plot_simulation(points_x, points_y, colors)
+    # Plot the simulation
+    plot_simulation(points_x, points_y, colors)
@@ -1,27 +1,27 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from functools import partial
+from mc_parallel import run_parallel
 
-def get_random_returns(years, mean_return=0.07, std_dev=0.15):
+def get_random_returns(years, mean_return=0.07, std_dev=0.15, rng=None):
     """
     Generate random annual returns based on a normal distribution.
     """
-    return np.random.normal(mean_return, std_dev, years)
+    if rng is None:
+        rng = np.random.default_rng()
+    return rng.normal(mean_return, std_dev, years)
 
-def simulate_portfolio_growth(starting_pot, annual_contributions, years, mean_return, std_dev, iterations):
+def simulate_portfolio_growth(starting_pot, annual_contributions, years, mean_return, std_dev, iterations, rng=None):
     """
     Simulate the growth of an investment portfolio over time.
+    All iterations are advanced together, one year at a time.
     """
-    results = []
-    for _ in range(iterations):
-        pot = starting_pot
-        yearly_values = [pot]
-        returns = get_random_returns(years, mean_return, std_dev)
-        for annual_return in returns:
-            pot *= (1 + annual_return)
-            pot += annual_contributions
-            yearly_values.append(pot)
-        results.append(yearly_values)
-    return np.array(results)
+    returns = get_random_returns((years, iterations), mean_return, std_dev, rng)
+    results = np.empty((iterations, years + 1))
+    results[:, 0] = starting_pot
+    for year in range(years):
+        results[:, year + 1] = results[:, year] * (1 + returns[year]) + annual_contributions
+    return results
 
 def plot_simulation(results, years):
     """
@@ -46,31 +46,35 @@ def plot_distribution(final_values):
     plt.title('Distribution of Final Portfolio Values')
     plt.show()
 
-# Parameters
-starting_pot = 10000  # Initial investment amount
-annual_contributions = 5000  # Annual contributions
-years = 30  # Number of years
-mean_return = 0.07  # Mean annual return
-std_dev = 0.15  # Standard deviation of annual returns
-iterations = 10000  # Number of Monte Carlo simulations
+if __name__ == "__main__":
+    # Parameters
+    starting_pot = 10000  # Initial investment amount
+    annual_contributions = 5000  # Annual contributions
+    years = 30  # Number of years
+    mean_return = 0.07  # Mean annual return
+    std_dev = 0.15  # Standard deviation of annual returns
+    iterations = 10000  # Number of Monte Carlo simulations
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
 
-# Run the Monte Carlo simulation
-results = simulate_portfolio_growth(starting_pot, annual_contributions, years, mean_return, std_dev, iterations)
+    # Run the Monte Carlo simulation
+    simulate = partial(simulate_portfolio_growth, starting_pot, annual_contributions, years, mean_return, std_dev)
+    results = run_parallel(simulate, iterations, seed=seed, workers=workers)
 
-# Analyze the results
-final_values = results[:, -1]
-mean_final_value = np.mean(final_values)
-median_final_value = np.median(final_values)
-lower_confidence = np.percentile(final_values, 5)
-upper_confidence = np.percentile(final_values, 95)
+    # Analyze the results
+    final_values = results[:, -1]
+    mean_final_value = np.mean(final_values)
+    median_final_value = np.median(final_values)
+    lower_confidence = np.percentile(final_values, 5)
+    upper_confidence = np.percentile(final_values, 95)
 
-# Print the results
-print(f"Mean final portfolio value: ${mean_final_value:,.2f}")
-print(f"Median final portfolio value: ${median_final_value:,.2f}")
-print(f"5% confidence interval: ${lower_confidence:,.2f} - ${upper_confidence:,.2f}")
+    # Print the results
+    print(f"Mean final portfolio value: ${mean_final_value:,.2f}")
+    print(f"Median final portfolio value: ${median_final_value:,.2f}")
+    print(f"5% confidence interval: ${lower_confidence:,.2f} - ${upper_confidence:,.2f}")
 
-# Plot the simulation results
-plot_simulation(results, years)
+    # Plot the simulation results
+    plot_simulation(results, years)
 
-# Plot the distribution of final portfolio values
-plot_distribution(final_values)
+    # Plot the distribution of final portfolio values
+    plot_distribution(final_values)
@@ -0,0 +1,307 @@
+import os
+import numpy as np
+from pf_covariance import estimate_covariance, as_operator
+
+# Trading days used to annualize daily moments
+TRADING_DAYS = 252
+
+# Number of portfolios evaluated per batch of matrix products
+DEFAULT_CHUNK_SIZE = 100000
+
+def annualized_moments(daily_returns, periods=TRADING_DAYS, cov_estimator='sample'):
+    """
+    Annualize the mean vector and covariance matrix of daily returns, once.
+
+    Parameters:
+    daily_returns : DataFrame or ndarray : daily returns, one column per asset
+    periods : int : number of periods per year
+    cov_estimator : str or callable : covariance estimator, see pf_covariance.estimate_covariance
+
+    Returns:
+    mean_returns : ndarray : annualized mean returns, shape (assets,)
+    cov_matrix : ndarray : annualized covariance matrix, shape (assets, assets)
+    """
+    daily_returns = np.asarray(daily_returns, dtype=float)
+    mean_returns = daily_returns.mean(axis=0) * periods
+    cov_matrix = estimate_covariance(daily_returns, cov_estimator) * periods
+    return mean_returns, cov_matrix
+
+class MetricIndex:
+    """
+    Sorted index over one metric for repeated nearest-k and range queries.
+
+    The metric is sorted once, O(n log n); every query is then a binary
+    search, O(log n + k), instead of a full sort of the portfolios.
+
+    Attributes:
+    order : ndarray : portfolio indices sorted by the metric
+    sorted_values : ndarray : metric values in that order
+    """
+
+    def __init__(self, values):
+        self.order = np.argsort(values, kind='stable')
+        self.sorted_values = np.asarray(values)[self.order]
+
+    def nearest(self, target, k=1):
+        """
+        Indices of the k portfolios whose metric is closest to the target, closest first.
+        """
+        k = min(k, len(self.order))
+        position = np.searchsorted(self.sorted_values, target)
+        # The k nearest values lie within k positions on either side of the insertion point
+        start = max(position - k, 0)
+        stop = min(position + k, len(self.order))
+        distances = np.abs(self.sorted_values[start:stop] - target)
+        nearest = np.argsort(distances, kind='stable')[:k]
+        return self.order[start + nearest]
+
+    def between(self, low, high):
+        """
+        Indices of the portfolios whose metric lies in [low, high], in increasing metric order.
+        """
+        start = np.searchsorted(self.sorted_values, low, side='left')
+        stop = np.searchsorted(self.sorted_values, high, side='right')
+        return self.order[start:stop]
+
+class PortfolioStore:
+    """
+    Columnar store of simulated portfolios.
+
+    The weights live in one contiguous (num_portfolios x assets) matrix and
+    every metric in its own typed column, the portfolio index being the row
+    number. Passing a directory backs every column with a .npy file opened
+    through np.lib.format.open_memmap, so stores larger than memory can be
+    filled chunk by chunk and reopened later without recomputing them.
+
+    Attributes:
+    weights : ndarray : portfolio weights, shape (num_portfolios, assets)
+    returns : ndarray : annualized returns, shape (num_portfolios,)
+    volatility : ndarray : annualized volatilities, shape (num_portfolios,)
+    sharpe : ndarray : Sharpe ratios, shape (num_portfolios,)
+    path : str : directory of the memory-mapped columns, None when in memory
+    """
+
+    METRICS = ('returns', 'volatility', 'sharpe')
+
+    def __init__(self, num_portfolios, num_assets, path=None, dtype=np.float64):
+        self.path = path
+        self._indexes = {}
+        if path is None:
+            self.weights = np.empty((num_portfolios, num_assets), dtype=dtype)
+            for metric in self.METRICS:
+                setattr(self, metric, np.empty(num_portfolios))
+            return
+        os.makedirs(path, exist_ok=True)
+        self.weights = np.lib.format.open_memmap(os.path.join(path, 'weights.npy'), mode='w+', dtype=dtype,
+                                                 shape=(num_portfolios, num_assets))
+        for metric in self.METRICS:
+            setattr(self, metric, np.lib.format.open_memmap(os.path.join(path, f'{metric}.npy'), mode='w+',
+                                                            dtype=np.float64, shape=(num_portfolios,)))
+
+    @classmethod
+    def open(cls, path, mode='r'):
+        """
+        Reopen a memory-mapped store written earlier ('r' read-only, 'r+' read-write).
+        """
+        store = cls.__new__(cls)
+        store.path = path
+        store._indexes = {}
+        store.weights = np.load(os.path.join(path, 'weights.npy'), mmap_mode=mode)
+        for metric in cls.METRICS:
+            setattr(store, metric, np.load(os.path.join(path, f'{metric}.npy'), mmap_mode=mode))
+        return store
+
+    def __len__(self):
+        return self.weights.shape[0]
+
+    def __getitem__(self, index):
+        """
+        Look up one portfolio: its index, weights and metrics.
+        """
+        index = int(index)
+        portfolio = {'index': index, 'weights': np.asarray(self.weights[index])}
+        for metric in self.METRICS:
+            portfolio[metric] = float(getattr(self, metric)[index])
+        return portfolio
+
+    def metric(self, name):
+        if name not in self.METRICS:
+            raise ValueError(f"metric must be one of {self.METRICS}, got {name!r}")
+        return getattr(self, name)
+
+    def index(self, metric):
+        """
+        Sorted MetricIndex over a metric, built on first use and cached.
+
+        Build it once the store is filled; it does not follow later writes.
+        """
+        if metric not in self._indexes:
+            self._indexes[metric] = MetricIndex(self.metric(metric))
+        return self._indexes[metric]
+
+    def top_k(self, metric, k=1, largest=True):
+        """
+        Indices of the k best portfolios by a metric, best first.
+
+        np.argpartition selects the k candidates in O(num_portfolios), only
+        those k are then sorted.
+        """
+        values = self.metric(metric)
+        k = min(k, len(values))
+        keys = -values if largest else values
+        candidates = np.argpartition(keys, k - 1)[:k] if k < len(values) else np.arange(len(values))
+        return candidates[np.argsort(keys[candidates], kind='stable')]
+
+    def flush(self):
+        # Write memory-mapped columns back to disk
+        if self.path is not None:
+            for column in (self.weights,) + tuple(getattr(self, metric) for metric in self.METRICS):
+                column.flush()
+
+def sample_weights(num_portfolios, num_assets, method='random', rng=None, out=None):
+    """
+    Draw long-only, fully invested portfolio weights in one call.
+
+    'random' normalizes i.i.d. uniform draws, as the original scripts did;
+    those weights crowd towards the equal-weight portfolio. 'dirichlet'
+    normalizes standard exponentials, which is a Dirichlet(1, ..., 1) draw
+    and therefore uniform over the simplex.
+
+    Parameters:
+    num_portfolios : int : number of portfolios
+    num_assets : int : number of assets
+    method : str : 'random' or 'dirichlet'
+    rng : np.random.Generator : random number generator (a fresh one if None)
+    out : ndarray : optional float buffer of shape (num_portfolios, num_assets) to fill
+
+    Returns:
+    weights : ndarray : portfolio weights summing to one, shape (num_portfolios, num_assets)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    weights = np.empty((num_portfolios, num_assets)) if out is None else out
+    if method == 'random':
+        rng.random(dtype=weights.dtype, out=weights)
+    elif method == 'dirichlet':
+        rng.standard_exponential(dtype=weights.dtype, out=weights)
+    else:
+        raise ValueError(f"method must be 'random' or 'dirichlet', got {method!r}")
+    weights /= weights.sum(axis=1, keepdims=True)
+    return weights
+
+def portfolio_metrics(weights, mean_returns, cov_matrix, risk_free_rate=0.01, chunk_size=DEFAULT_CHUNK_SIZE, out=None):
+    """
+    Compute return, volatility and Sharpe ratio of many portfolios with batched matrix products.
+
+    Portfolios are processed in chunks so the (chunk x assets) temporary of
+    weights @ cov_matrix stays small whatever the number of portfolios.
+
+    Parameters:
+    weights : ndarray : portfolio weights, shape (num_portfolios, assets)
+    mean_returns : ndarray : annualized mean returns, shape (assets,)
+    cov_matrix : ndarray or FactorCovariance : annualized covariance matrix, shape (assets, assets)
+    risk_free_rate : float : annual risk-free rate
+    chunk_size : int : number of portfolios per batch
+    out : tuple : optional (returns, volatility, sharpe) float64 buffers of shape (num_portfolios,) to fill
+
+    Returns:
+    returns : ndarray : annualized returns, shape (num_portfolios,)
+    volatility : ndarray : annualized volatilities, shape (num_portfolios,)
+    sharpe : ndarray : Sharpe ratios, shape (num_portfolios,)
+    """
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    # A factor-model covariance stays structured: chunk @ cov_matrix then costs O(assets * factors) per portfolio
+    cov_matrix = as_operator(cov_matrix)
+    num_portfolios = weights.shape[0]
+    if out is None:
+        out = tuple(np.empty(num_portfolios) for _ in range(3))
+    returns, volatility, sharpe = out
+    for start in range(0, num_portfolios, chunk_size):
+        stop = min(start + chunk_size, num_portfolios)
+        chunk = np.asarray(weights[start:stop], dtype=float)
+        np.dot(chunk, mean_returns, out=returns[start:stop])
+        np.einsum('ij,ij->i', chunk @ cov_matrix, chunk, out=volatility[start:stop])
+    np.sqrt(volatility, out=volatility)
+    np.subtract(returns, risk_free_rate, out=sharpe)
+    sharpe /= volatility
+    return returns, volatility, sharpe
+
+def leverage_sweep(portfolios, leverage_levels, risk_free_rate=0.01, financing_rate=None, max_risk=None):
+    """
+    Evaluate levered copies of every simulated portfolio for several leverage levels in one batch.
+
+    A portfolio levered L times holds L * w and borrows L - 1 at the
+    financing rate: its return is L r - (L - 1) f and its volatility L s.
+    Every level is therefore computed by broadcasting the base metrics, with
+    no new weights drawn and no covariance products repeated.
+
+    Parameters:
+    portfolios : PortfolioStore : base (unlevered) portfolios
+    leverage_levels : sequence : leverage levels L
+    risk_free_rate : float : annual risk-free rate of the Sharpe ratios
+    financing_rate : float : annual borrowing cost (the risk-free rate if None)
+    max_risk : float : maximum volatility when picking the best portfolio of each level, None for no limit
+
+    Returns:
+    sweep : dict : 'leverage' (levels,), 'returns', 'volatility' and 'sharpe' (levels, portfolios),
+                   the 'best' portfolio index of each level (highest Sharpe ratio within max_risk, lowest
+                   volatility if none is) and its levered weights 'x0' (levels, assets), ready to warm-start
+                   pf_optimizer.optimize_portfolio with budget=L
+    """
+    if financing_rate is None:
+        financing_rate = risk_free_rate
+    leverage = np.asarray(leverage_levels, dtype=float)
+    levels = leverage[:, np.newaxis]
+    returns = levels * portfolios.returns - (levels - 1) * financing_rate
+    volatility = levels * portfolios.volatility
+    sharpe = (returns - risk_free_rate) / volatility
+
+    feasible = volatility <= (np.inf if max_risk is None else max_risk)
+    best = np.where(feasible.any(axis=1), np.where(feasible, sharpe, -np.inf).argmax(axis=1), volatility.argmin(axis=1))
+    sweep = {
+        'leverage': leverage,
+        'returns': returns,
+        'volatility': volatility,
+        'sharpe': sharpe,
+        'best': best,
+        'x0': levels * np.asarray(portfolios.weights[best], dtype=float)
+    }
+    return sweep
+
+def simulate_portfolios(daily_returns, num_portfolios=5000, risk_free_rate=0.01, method='random', rng=None,
+                        chunk_size=DEFAULT_CHUNK_SIZE, path=None, dtype=np.float64, cov_estimator='sample'):
+    """
+    Simulate random portfolio allocations into a PortfolioStore.
+
+    The moments are computed once from the daily returns, the whole weight
+    matrix is drawn in one call (or one call per chunk for a memory-mapped
+    store) and the metrics of every portfolio are computed with batched
+    matrix products, written straight into the store's columns.
+
+    Parameters:
+    daily_returns : DataFrame or ndarray : daily returns, one column per asset
+    num_portfolios : int : number of portfolios
+    risk_free_rate : float : annual risk-free rate
+    method : str : 'random' (normalized uniforms) or 'dirichlet' (uniform over the simplex)
+    rng : np.random.Generator : random number generator (a fresh one if None)
+    chunk_size : int : number of portfolios per batch of matrix products
+    path : str : directory to memory-map the store to, None to keep it in memory
+    dtype : dtype : dtype of the weights matrix (float32 halves its footprint)
+    cov_estimator : str or callable : covariance estimator, see pf_covariance.estimate_covariance
+
+    Returns:
+    store : PortfolioStore : weights and metrics of every portfolio
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    mean_returns, cov_matrix = annualized_moments(daily_returns, cov_estimator=cov_estimator)
+    store = PortfolioStore(num_portfolios, len(mean_returns), path, dtype)
+    # A memory-mapped store is filled chunk by chunk so only one chunk is resident at a time
+    fill_size = num_portfolios if path is None else chunk_size
+    for start in range(0, num_portfolios, fill_size):
+        stop = min(start + fill_size, num_portfolios)
+        sample_weights(stop - start, len(mean_returns), method, rng, out=store.weights[start:stop])
+        columns = tuple(getattr(store, metric)[start:stop] for metric in store.METRICS)
+        portfolio_metrics(store.weights[start:stop], mean_returns, cov_matrix, risk_free_rate, chunk_size, out=columns)
+    store.flush()
+    return store
@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from functools import partial
+from mc_parallel import run_parallel
 
 # Define the activity cost ranges
 activity_costs = {
@@ -12,19 +14,23 @@ activity_costs = {
     'F': (5000, 7000)
 }
 
-def generate_random_costs(activity_costs):
+def generate_random_costs(activity_costs, size=None, rng=None):
     """
     Generate random costs for each activity based on a uniform distribution.
     
     Parameters:
     activity_costs : dict : dictionary with activity names as keys and (min, max) cost tuples as values
+    size : int : number of draws per activity, None for a single draw
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     costs : dict : dictionary with activity names as keys and random costs as values
     """
+    if rng is None:
+        rng = np.random.default_rng()
     costs = {}
     for activity, (min_cost, max_cost) in activity_costs.items():
-        costs[activity] = np.random.uniform(min_cost, max_cost)
+        costs[activity] = rng.uniform(min_cost, max_cost, size)
     return costs
 
 def calculate_total_cost(costs):
@@ -35,25 +41,24 @@ def calculate_total_cost(costs):
     costs : dict : dictionary with activity names as keys and costs as values
     
     Returns:
-    total_cost : float : total project cost
+    total_cost : float or ndarray : total project cost
     """
     return sum(costs.values())
 
-def monte_carlo_project_cost_simulation(activity_costs, iterations):
+def monte_carlo_project_cost_simulation(activity_costs, iterations, rng=None):
     """
     Perform a Monte Carlo simulation to estimate the total project cost.
     
     Parameters:
     activity_costs : dict : dictionary with activity names as keys and (min, max) cost tuples as values
     iterations : int : number of Monte Carlo simulations
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     total_costs : ndarray : simulated total project costs
     """
-    total_costs = np.zeros(iterations)
-    for i in range(iterations):
-        costs = generate_random_costs(activity_costs)
-        total_costs[i] = calculate_total_cost(costs)
+    costs = generate_random_costs(activity_costs, iterations, rng)
+    total_costs = calculate_total_cost(costs)
     return total_costs
 
 def plot_cost_distribution(total_costs):
@@ -70,21 +75,25 @@ def plot_cost_distribution(total_costs):
     plt.title('Distribution of Total Project Costs from Monte Carlo Simulation')
     plt.show()
 
-# Parameters
-iterations = 10000  # Number of Monte Carlo simulations
+if __name__ == "__main__":
+    # Parameters
+    iterations = 10000  # Number of Monte Carlo simulations
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
 
-# Run the Monte Carlo simulation
-total_costs = monte_carlo_project_cost_simulation(activity_costs, iterations)
+    # Run the Monte Carlo simulation
+    simulate = partial(monte_carlo_project_cost_simulation, activity_costs)
+    total_costs = run_parallel(simulate, iterations, seed=seed, workers=workers)
 
-# Analyze the results
-mean_cost = np.mean(total_costs)
-median_cost = np.median(total_costs)
-probability_exceeding_100k = np.sum(total_costs > 100000) / iterations
+    # Analyze the results
+    mean_cost = np.mean(total_costs)
+    median_cost = np.median(total_costs)
+    probability_exceeding_100k = np.sum(total_costs > 100000) / iterations
 
-# Print the results
-print(f"Mean total project cost: ${mean_cost:,.2f}")
-print(f"Median total project cost: ${median_cost:,.2f}")
-print(f"Probability of exceeding $100,000: {probability_exceeding_100k:.2%}")
+    # Print the results
+    print(f"Mean total project cost: ${mean_cost:,.2f}")
+    print(f"Median total project cost: ${median_cost:,.2f}")
+    print(f"Probability of exceeding $100,000: {probability_exceeding_100k:.2%}")
 
-# Plot the distribution of total project costs
-plot_cost_distribution(total_costs)
+    # Plot the distribution of total project costs
+    plot_cost_distribution(total_costs)
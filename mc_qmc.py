@@ -0,0 +1,101 @@
+import numpy as np
+from scipy.stats import norm, qmc
+
+def sobol_normals(dimensions, iterations, rng=None):
+    """
+    Draw scrambled-Sobol points mapped to standard normals.
+
+    Each column is one point of the low-discrepancy sequence, each row one of
+    its coordinates. The scrambling is driven by `rng`, so independent
+    generators give independent randomized-QMC replicates. Sobol points keep
+    their balance properties only when `iterations` is a power of two.
+
+    Parameters:
+    dimensions : int : number of coordinates per point (time steps)
+    iterations : int : number of points (paths)
+    rng : np.random.Generator : random number generator for the scrambling (a fresh one if None)
+
+    Returns:
+    normals : ndarray : standard normal quasi-random numbers, shape (dimensions, iterations)
+    """
+    sampler = qmc.Sobol(d=dimensions, scramble=True, seed=rng)
+    if iterations & (iterations - 1) == 0:
+        uniforms = sampler.random_base2(int(np.log2(iterations)))
+    else:
+        uniforms = sampler.random(iterations)
+    # Keep the inverse normal CDF finite at the edges of the unit cube
+    np.clip(uniforms, np.finfo(float).tiny, 1 - np.finfo(float).eps, out=uniforms)
+    return norm.ppf(uniforms).T
+
+def _bridge_schedule(steps):
+    # Bisection order of the Brownian bridge: (point, left, right, left weight, right weight, std)
+    schedule = []
+    intervals = [(0, steps)]
+    while intervals:
+        next_intervals = []
+        for left, right in intervals:
+            if right - left < 2:
+                continue
+            middle = (left + right) // 2
+            span = right - left
+            schedule.append((middle, left, right, (right - middle) / span, (middle - left) / span,
+                             np.sqrt((middle - left) * (right - middle) / span)))
+            next_intervals += [(left, middle), (middle, right)]
+        intervals = next_intervals
+    return schedule
+
+def brownian_bridge(normals, out=None):
+    """
+    Turn independent normals into Brownian increments with a Brownian-bridge construction.
+
+    The first row fixes the terminal value of the Brownian motion, the next
+    rows fill in the midpoints by bisection. The most important coordinates of
+    a low-discrepancy sequence therefore drive the coarse shape of the paths,
+    which is what makes QMC effective on path simulations. Every returned
+    increment is N(0, 1), so the result is a drop-in replacement for i.i.d.
+    shocks.
+
+    Parameters:
+    normals : ndarray : independent standard normals, shape (steps, paths)
+    out : ndarray : optional buffer of the same shape to write the increments to (may be `normals`)
+
+    Returns:
+    increments : ndarray : unit-variance Brownian increments, shape (steps, paths)
+    """
+    steps, paths = normals.shape
+    path = np.empty((steps + 1, paths))
+    path[0] = 0.0
+    path[steps] = np.sqrt(steps) * normals[0]
+    for k, (middle, left, right, left_weight, right_weight, std) in enumerate(_bridge_schedule(steps), start=1):
+        path[middle] = left_weight * path[left] + right_weight * path[right] + std * normals[k]
+    if out is None:
+        out = np.empty_like(normals)
+    np.subtract(path[1:], path[:-1], out=out)
+    return out
+
+def rqmc_estimate(estimator, replicates=16, seed=None):
+    """
+    Run a randomized-QMC estimator on independent scramblings and combine them.
+
+    Every replicate gets its own generator spawned from one SeedSequence. The
+    replicates are i.i.d. unbiased estimates, so their spread gives a valid
+    standard error even though the points inside a replicate are not random.
+
+    Parameters:
+    estimator : callable : function of an np.random.Generator returning one estimate
+    replicates : int : number of independent scramblings
+    seed : int : seed of the SeedSequence the replicate streams are spawned from
+
+    Returns:
+    estimate : dict : 'value' (mean of the replicates), 'std_error' and the raw 'replicates'
+    """
+    if replicates < 2:
+        raise ValueError(f"at least two replicates are needed for an error bar, got {replicates}")
+    streams = np.random.SeedSequence(seed).spawn(replicates)
+    values = np.array([estimator(np.random.default_rng(stream)) for stream in streams])
+    estimate = {
+        'value': values.mean(),
+        'std_error': values.std(ddof=1) / np.sqrt(replicates),
+        'replicates': values
+    }
+    return estimate
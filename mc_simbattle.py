@@ -1,10 +1,15 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from functools import partial
+from mc_parallel import run_parallel, sum_counts
 
-def simulate_battle(troops_A, troops_B, effectiveness_A, effectiveness_B, terrain_advantage_A, terrain_advantage_B, iterations):
+def simulate_battle(troops_A, troops_B, effectiveness_A, effectiveness_B, terrain_advantage_A, terrain_advantage_B, iterations, rng=None):
     """
     Simulate a battlefield scenario using Monte Carlo simulation.
     
+    All battles are fought together: every round draws the casualties of the
+    battles still in progress in one vectorized call.
+    
     Parameters:
     troops_A : int : initial number of troops for Force A
     troops_B : int : initial number of troops for Force B
@@ -13,36 +18,32 @@ def simulate_battle(troops_A, troops_B, effectiveness_A, effectiveness_B, terrai
     terrain_advantage_A : float : terrain advantage for Force A
     terrain_advantage_B : float : terrain advantage for Force B
     iterations : int : number of Monte Carlo simulations
+    rng : np.random.Generator : random number generator (a fresh one if None)
     
     Returns:
     results : dict : dictionary containing the number of victories for each force and the number of draws
     """
-    victories_A = 0
-    victories_B = 0
-    draws = 0
+    if rng is None:
+        rng = np.random.default_rng()
+    remaining_troops_A = np.full(iterations, troops_A, dtype=np.int64)
+    remaining_troops_B = np.full(iterations, troops_B, dtype=np.int64)
+    ongoing = np.flatnonzero((remaining_troops_A > 0) & (remaining_troops_B > 0))
     
-    for _ in range(iterations):
-        remaining_troops_A = troops_A
-        remaining_troops_B = troops_B
-        
-        while remaining_troops_A > 0 and remaining_troops_B > 0:
-            casualties_A = np.random.binomial(remaining_troops_A, effectiveness_B * terrain_advantage_B)
-            casualties_B = np.random.binomial(remaining_troops_B, effectiveness_A * terrain_advantage_A)
-            
-            remaining_troops_A -= casualties_A
-            remaining_troops_B -= casualties_B
+    while ongoing.size:
+        casualties_A = rng.binomial(remaining_troops_A[ongoing], effectiveness_B * terrain_advantage_B)
+        casualties_B = rng.binomial(remaining_troops_B[ongoing], effectiveness_A * terrain_advantage_A)
         
-        if remaining_troops_A > 0:
-            victories_A += 1
-        elif remaining_troops_B > 0:
-            victories_B += 1
-        else:
-            draws += 1
+        remaining_troops_A[ongoing] -= casualties_A
+        remaining_troops_B[ongoing] -= casualties_B
+        ongoing = ongoing[(remaining_troops_A[ongoing] > 0) & (remaining_troops_B[ongoing] > 0)]
+    
+    victories_A = int(np.count_nonzero(remaining_troops_A > 0))
+    victories_B = int(np.count_nonzero((remaining_troops_A <= 0) & (remaining_troops_B > 0)))
     
     results = {
         'victories_A': victories_A,
         'victories_B': victories_B,
-        'draws': draws
+        'draws': iterations - victories_A - victories_B
     }
     
     return results
@@ -65,22 +66,26 @@ def plot_battle_results(results, iterations):
     plt.title('Monte Carlo Simulation of Battlefield Outcomes')
     plt.show()
 
-# Parameters
-troops_A = 700000  # Initial number of troops for Force A
-troops_B = 350000  # Initial number of troops for Force B
-effectiveness_A = 0.06  # Weapon effectiveness for Force A
-effectiveness_B = 0.05  # Weapon effectiveness for Force B
-terrain_advantage_A = 1.0  # Terrain advantage for Force A
-terrain_advantage_B = 1.1  # Terrain advantage for Force B
-iterations = 10000  # Number of Monte Carlo simulations
+if __name__ == "__main__":
+    # Parameters
+    troops_A = 700000  # Initial number of troops for Force A
+    troops_B = 350000  # Initial number of troops for Force B
+    effectiveness_A = 0.06  # Weapon effectiveness for Force A
+    effectiveness_B = 0.05  # Weapon effectiveness for Force B
+    terrain_advantage_A = 1.0  # Terrain advantage for Force A
+    terrain_advantage_B = 1.1  # Terrain advantage for Force B
+    iterations = 10000  # Number of Monte Carlo simulations
+    seed = None  # Set an integer for a reproducible run (identical for any number of workers)
+    workers = None  # Number of worker processes (None uses every core)
 
-# Run the Monte Carlo simulation
-results = simulate_battle(troops_A, troops_B, effectiveness_A, effectiveness_B, terrain_advantage_A, terrain_advantage_B, iterations)
+    # Run the Monte Carlo simulation
+    simulate = partial(simulate_battle, troops_A, troops_B, effectiveness_A, effectiveness_B, terrain_advantage_A, terrain_advantage_B)
+    results = run_parallel(simulate, iterations, seed=seed, workers=workers, block_size=1000, combine=sum_counts)
 
-# Print the results
-print(f"Force A Wins: {results['victories_A']} ({results['victories_A'] / iterations:.2%})")
-print(f"Force B Wins: {results['victories_B']} ({results['victories_B'] / iterations:.2%})")
-print(f"Draws: {results['draws']} ({results['draws'] / iterations:.2%})")
+    # Print the results
+    print(f"Force A Wins: {results['victories_A']} ({results['victories_A'] / iterations:.2%})")
+    print(f"Force B Wins: {results['victories_B']} ({results['victories_B'] / iterations:.2%})")
+    print(f"Draws: {results['draws']} ({results['draws'] / iterations:.2%})")
 
-# Plot the simulation results
-plot_battle_results(results, iterations)
+    # Plot the simulation results
+    plot_battle_results(results, iterations)
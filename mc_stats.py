@@ -0,0 +1,229 @@
+import numpy as np
+
+class RunningMoments:
+    """
+    Mergeable running mean and variance (Welford / Chan et al.).
+
+    Batches are folded in along their last axis, so one accumulator can track
+    a whole vector of statistics at once, e.g. one per simulated day.
+
+    Attributes:
+    count : int : number of observations seen
+    mean : ndarray : running mean
+    m2 : ndarray : running sum of squared deviations from the mean
+    """
+
+    def __init__(self, shape=()):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def update(self, values):
+        """
+        Fold a batch of observations (observations on the last axis) into the accumulator.
+        """
+        values = np.asarray(values, dtype=float)
+        batch = RunningMoments()
+        batch.count = values.shape[-1]
+        if batch.count == 0:
+            return self
+        batch.mean = values.mean(axis=-1)
+        batch.m2 = ((values - batch.mean[..., np.newaxis]) ** 2).sum(axis=-1)
+        return self.merge(batch)
+
+    def merge(self, other):
+        """
+        Fold another accumulator into this one.
+        """
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / count)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.count * other.count / count)
+        self.count = count
+        return self
+
+    def variance(self, ddof=0):
+        return self.m2 / (self.count - ddof)
+
+    def std(self, ddof=0):
+        return np.sqrt(self.variance(ddof))
+
+class QuantileSketch:
+    """
+    Mergeable KLL quantile sketch.
+
+    Items live in compactors of increasing weight 2**level; a full compactor
+    is sorted and every other item (random offset) is promoted to the next
+    level. Memory stays O(k log(n / k)) and the rank error is O(1 / k).
+
+    Attributes:
+    k : int : size of the top compactor, controls the accuracy
+    count : int : number of observations seen
+    """
+
+    def __init__(self, k=200, rng=None):
+        self.k = k
+        self.count = 0
+        self.compactors = [np.empty(0)]
+        self.rng = np.random.default_rng() if rng is None else rng
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.compactors):
+            items = self.compactors[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays at this level
+                leftover, items = items[:items.size % 2], items[items.size % 2:]
+                promoted = items[self.rng.integers(2)::2]
+                self.compactors[level + 1] = np.concatenate((self.compactors[level + 1], promoted))
+                self.compactors[level] = leftover
+            level += 1
+
+    def update(self, values):
+        """
+        Add a batch of observations to the sketch.
+        """
+        values = np.ravel(np.asarray(values, dtype=float))
+        self.compactors[0] = np.concatenate((self.compactors[0], values))
+        self.count += values.size
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Fold another sketch into this one.
+        """
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate((self.compactors[level], items))
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """
+        Approximate quantile(s) for q in [0, 1].
+        """
+        values = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(items.size, 2.0 ** level) for level, items in enumerate(self.compactors)])
+        order = np.argsort(values)
+        values, cumulative = values[order], np.cumsum(weights[order])
+        ranks = np.asarray(q) * cumulative[-1]
+        indices = np.minimum(np.searchsorted(cumulative, ranks, side='left'), values.size - 1)
+        return values[indices]
+
+class TailBuffer:
+    """
+    Mergeable buffer of the most extreme observations for exact tail statistics.
+
+    Only the `capacity` smallest (side='lower') or largest (side='upper')
+    observations are kept, which is enough to compute exactly, as
+    np.percentile would on the full sample, every quantile and conditional
+    tail mean whose tail holds fewer than `capacity` observations.
+
+    Attributes:
+    capacity : int : number of extreme observations kept
+    side : str : 'lower' or 'upper'
+    count : int : number of observations seen
+    """
+
+    def __init__(self, capacity, side='lower'):
+        if side not in ('lower', 'upper'):
+            raise ValueError(f"side must be 'lower' or 'upper', got {side!r}")
+        self.capacity = capacity
+        self.side = side
+        self.count = 0
+        # Stored as a lower tail; the upper tail is kept negated
+        self.values = np.empty(0)
+
+    def _keep(self, values):
+        if values.size > self.capacity:
+            values = np.partition(values, self.capacity - 1)[:self.capacity]
+        self.values = values
+
+    def update(self, values):
+        """
+        Add a batch of observations to the buffer.
+        """
+        values = np.ravel(np.asarray(values, dtype=float))
+        if self.side == 'upper':
+            values = -values
+        self.count += values.size
+        self._keep(np.concatenate((self.values, values)))
+        return self
+
+    def merge(self, other):
+        """
+        Fold another buffer of the same side into this one.
+        """
+        if other.side != self.side:
+            raise ValueError("cannot merge tail buffers of different sides")
+        self.count += other.count
+        self._keep(np.concatenate((self.values, other.values)))
+        return self
+
+    def _sorted(self, needed):
+        if needed > self.values.size:
+            raise ValueError(f"the tail needs {needed} observations but the buffer keeps {self.values.size}; "
+                             "raise the capacity")
+        return np.sort(self.values)
+
+    def quantile(self, q):
+        """
+        Exact quantile for q in [0, 1], with np.percentile's linear interpolation.
+        """
+        tail_q = q if self.side == 'lower' else 1 - q
+        position = (self.count - 1) * tail_q
+        lower_index = int(np.floor(position))
+        upper_index = min(lower_index + 1, self.count - 1)
+        values = self._sorted(upper_index + 1)
+        value = values[lower_index] + (position - lower_index) * (values[upper_index] - values[lower_index])
+        return value if self.side == 'lower' else -value
+
+    def tail_mean(self, threshold):
+        """
+        Exact mean of the observations at or beyond the threshold (at or below it for a lower tail).
+        """
+        if self.side == 'lower':
+            tail = self.values[self.values <= threshold]
+        else:
+            tail = -self.values[self.values <= -threshold]
+        if tail.size >= self.values.size and self.values.size < self.count:
+            raise ValueError("the whole buffer lies in the tail; raise the capacity")
+        return tail.mean()
+
+def merge_accumulators(results):
+    """
+    Merge a list of accumulator collections produced by independent chunks or workers.
+
+    Every element must have the same structure: an accumulator (anything with
+    a merge method), an ndarray (concatenated along the last axis), or a
+    dict / list of those, merged entry by entry.
+
+    Parameters:
+    results : list : accumulator collections to merge
+
+    Returns:
+    merged : the merged collection
+    """
+    first = results[0]
+    if isinstance(first, dict):
+        return {key: merge_accumulators([result[key] for result in results]) for key in first}
+    if isinstance(first, list):
+        return [merge_accumulators(list(items)) for items in zip(*results)]
+    if isinstance(first, np.ndarray):
+        return np.concatenate(results, axis=-1)
+    merged = first
+    for other in results[1:]:
+        merged = merged.merge(other)
+    return merged
@@ -1,51 +1,15 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
 import matplotlib.pyplot as plt
 from datetime import datetime
 import random
-
-# Fetch historical data
-def fetch_historical_data(tickers, start_date, end_date):
-    stock_data = yf.download(tickers, start=start_date, end=end_date)['Adj Close']
-    return stock_data
-
-# Calculate daily returns
-def calculate_daily_returns(stock_data):
-    daily_returns = stock_data.pct_change().dropna()
-    return daily_returns
-
-# Simulate portfolio allocations
-def simulate_portfolios(daily_returns, num_portfolios=5000, risk_free_rate=0.01):
-    num_assets = len(daily_returns.columns)
-    results = np.zeros((4, num_portfolios))
-    weights_record = []
-
-    for i in range(num_portfolios):
-        weights = np.random.random(num_assets)
-        weights /= np.sum(weights)
-        weights_record.append(weights)
-
-        portfolio_return = np.sum(daily_returns.mean() * weights) * 252
-        portfolio_std_dev = np.sqrt(np.dot(weights.T, np.dot(daily_returns.cov() * 252, weights)))
-        sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_std_dev
-
-        results[0, i] = portfolio_return
-        results[1, i] = portfolio_std_dev
-        results[2, i] = sharpe_ratio
-        results[3, i] = i
-
-    return results, weights_record
+from mc_portfolios import simulate_portfolios
+from price_panel import fetch_returns
 
 # Find portfolios by volatility range
-def find_portfolios_by_volatility_range(results, weights_record, tickers, target_volatility, num_portfolios=3):
-    volatilities = results[1]
-    
-    # Calculate the absolute differences from the target volatility
-    differences = np.abs(volatilities - target_volatility)
-    
-    # Get the indices of the portfolios with the smallest differences
-    closest_indices = np.argsort(differences)[:num_portfolios]
+def find_portfolios_by_volatility_range(portfolios, tickers, target_volatility, num_portfolios=3):
+    # Binary search in the sorted volatility index (built once, on the first query)
+    closest_indices = portfolios.index('volatility').nearest(target_volatility, num_portfolios)
     
     if len(closest_indices) == 0:
         print(f"No portfolios found close to the target volatility ({target_volatility:.2%})")
@@ -53,9 +17,10 @@ def find_portfolios_by_volatility_range(results, weights_record, tickers, target
     
     print(f"Top {num_portfolios} portfolios closest to the target volatility ({target_volatility}):")
     for index in closest_indices:
-        allocation = weights_record[index]
-        annualized_return = results[0, index]
-        annualized_volatility = results[1, index]
+        portfolio = portfolios[index]
+        allocation = portfolio['weights']
+        annualized_return = portfolio['returns']
+        annualized_volatility = portfolio['volatility']
 
         print(f"\nPortfolio {index + 1}:")
         print(f"Annualized Return: {annualized_return:.2%}")
@@ -67,18 +32,25 @@ def find_portfolios_by_volatility_range(results, weights_record, tickers, target
 tickers = ['AAPL','MSFT','GOOGL','AMZN','NVDA','META','TSLA','BRK-B','UNH','JNJ','V','JPM','WMT','PG','MA','HD','BAC','XOM','PFE','KO','DIS','PEP','CSCO','MRK','ABT','COST','CMCSA','ADBE','NFLX','INTC','CRM','AVGO','TXN','ACN','NEE','MDT','NKE','LLY','ORCL','PM']
 start_date = '2020-01-01'
 end_date = datetime.today().strftime('%Y-%m-%d')
+seed = None  # Set an integer for a reproducible run
+cov_estimator = 'ledoit_wolf'  # Shrinkage keeps the 40-asset covariance well conditioned
 
-# Fetch historical data
-stock_data = fetch_historical_data(tickers, start_date, end_date)
-
-# Calculate daily returns
-daily_returns = calculate_daily_returns(stock_data)
+# Daily returns from the shared price panel
+daily_returns = fetch_returns(tickers, start_date, end_date)
 
 # Simulate portfolio allocations
-results, weights_record = simulate_portfolios(daily_returns)
-
-# Get target volatility from user
-target_volatility = float(input("Enter the target volatility: "))
-
-# Find and display the portfolios closest to the given volatility within the range
-find_portfolios_by_volatility_range(results, weights_record, tickers, target_volatility)
\ No newline at end of file
+portfolios = simulate_portfolios(daily_returns, rng=np.random.default_rng(seed), cov_estimator=cov_estimator)
+
+# Answer as many target volatilities as needed against the same simulation
+while True:
+    answer = input("Enter the target volatility (leave empty to quit): ").strip()
+    if not answer:
+        break
+    try:
+        target_volatility = float(answer)
+    except ValueError:
+        print(f"Not a number: {answer!r}")
+        continue
+
+    # Find and display the portfolios closest to the given volatility within the range
+    find_portfolios_by_volatility_range(portfolios, tickers, target_volatility)
\ No newline at end of file
@@ -1,79 +1,46 @@
-import numpy as np
+import os
 import pandas as pd
-import yfinance as yf
-import concurrent.futures
 from datetime import datetime
-from scipy.optimize import minimize
-
-# Function to fetch historical data for a single stock
-def fetch_stock_data(ticker):
-    try:
-        return yf.download(ticker, start='2020-01-01', end=datetime.now().strftime('%Y-%m-%d'))['Adj Close']
-    except Exception as e:
-        print(f"Failed to fetch data for {ticker}: {e}")
-        return pd.DataFrame()  # Return an empty DataFrame in case of failure
-
-# Function to fetch historical data for multiple stocks concurrently
-def fetch_all_stocks_data(tickers):
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # Submit all tasks and store them in a dictionary keyed by the ticker symbol
-        future_to_ticker = {executor.submit(fetch_stock_data, ticker): ticker for ticker in tickers}
-        # Retrieve the results from the futures and store them in a dictionary keyed by the ticker symbol
-        data = {}
-        for future, ticker in future_to_ticker.items():
-            result = future.result()
-            if not result.empty:  # Only add non-empty DataFrames to the dictionary
-                data[ticker] = result
-    return data
-
-# Function to calculate daily returns
-def calculate_daily_returns(data):
-    return data.pct_change().dropna()
+from pf_optimizer import optimize_portfolio
+from pf_covariance import estimate_covariance, EWMA_STATE_ROOT
+from price_panel import load_panel
+from price_fetcher import fetch_universe
 
 # Function to estimate mean returns and covariance matrix
-def estimate_parameters(daily_returns):
+def estimate_parameters(daily_returns, cov_estimator='sample'):
     mean_returns = daily_returns.mean()
-    cov_matrix = daily_returns.cov()
+    # An 'ewma' estimate resumes from the previous run and only folds in the new days
+    cov_matrix = estimate_covariance(daily_returns, cov_estimator, state_path=os.path.join(EWMA_STATE_ROOT, 'pf1.1.npz'))
     return mean_returns, cov_matrix
 
-# Function to compute portfolio performance
-def portfolio_performance(weights, mean_returns, cov_matrix, risk_free_rate=0.01):
-    returns = np.sum(mean_returns * weights) * 252
-    std_dev = np.sqrt(np.dot(weights.T, np.dot(cov_matrix * 252, weights)))
-    sharpe_ratio = (returns - risk_free_rate) / std_dev
-    return returns, std_dev, sharpe_ratio
-
-# Function to find the weights that maximize the Sharpe ratio
-def neg_sharpe_ratio(weights, mean_returns, cov_matrix, risk_free_rate=0.01):
-    returns, std_dev, sharpe_ratio = portfolio_performance(weights, mean_returns, cov_matrix, risk_free_rate)
-    return -sharpe_ratio
-
 # Main function to orchestrate the process
 def main():
     tickers = ['AAPL', 'MSFT', 'GOOGL', 'AMZN']  # Add more tickers as needed
-    data = fetch_all_stocks_data(tickers)
+    start_date = '2020-01-01'
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    universe_file = None  # Set to 'company_codes.csv' to pull the whole scraped universe
+    if universe_file is not None:
+        tickers = pd.read_csv(universe_file)['Company Code'].dropna().tolist()
+    
+    # Batched, throttled and retried downloads of whatever the local store lacks
+    failed = fetch_universe(tickers, start_date, end_date)
+    for ticker in failed:
+        print(f"Failed to fetch data for {ticker}")
     
     # Filter out tickers for which data retrieval failed
-    valid_tickers = [ticker for ticker, df in data.items() if not df.empty]
+    valid_tickers = [ticker for ticker in tickers if ticker not in failed]
     
-    # Concatenate data for valid tickers only
     if valid_tickers:
-        combined_data = pd.concat([data[ticker] for ticker in valid_tickers], axis=1)
-        
-        # Calculate daily returns
-        daily_returns = calculate_daily_returns(combined_data)
+        # Daily returns of the valid tickers, precomputed in the shared price panel; the gaps the
+        # batched fetch could not fill are not downloaded again one request at a time
+        panel = load_panel(valid_tickers, start_date, end_date, fetched=tickers)
+        daily_returns = panel.returns_frame(valid_tickers, start_date, end_date)
         
         # Estimate mean returns and covariance matrix
         mean_returns, cov_matrix = estimate_parameters(daily_returns)
         
-        # Define the optimization problem
-        num_assets = len(mean_returns)
-        args = (mean_returns, cov_matrix, 0.01)
-        constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
-        bounds = tuple((0, None) for _ in range(num_assets))
-        
-        # Solve the optimization problem
-        result = minimize(neg_sharpe_ratio, num_assets*[1./num_assets,], args=args, method='SLSQP', bounds=bounds, constraints=constraints)
+        # Maximize the Sharpe ratio on the annualized moments, with analytic gradients
+        result = optimize_portfolio(mean_returns.to_numpy() * 252, cov_matrix * 252, 0.01, bounds=(0, None))
         optimal_weights = result.x
         
         # Print the optimal weights
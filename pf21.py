@@ -1,53 +1,40 @@
+import os
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from scipy.optimize import minimize
+from mc_portfolios import TRADING_DAYS
+from pf_covariance import estimate_covariance, EWMA_STATE_ROOT
+from pf_optimizer import optimize_portfolio as optimize_sharpe
+from pf_backtest import window_sweep
+from mc_multiasset import simulate_portfolio_paths
 from datetime import datetime
-
-# Function to fetch stock data
-def fetch_data(tickers, start_date, end_date):
-    data = yf.download(tickers, start=start_date, end=end_date)['Adj Close']
-    return data
+from price_panel import fetch_returns
+from pf_metrics import risk_metrics
 
 # Function to calculate portfolio performance
 def portfolio_performance(weights, mean_returns, cov_matrix):
     returns = np.sum(mean_returns * weights) * 252
-    std = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights))) * np.sqrt(252)
+    std = np.sqrt(weights @ (cov_matrix @ weights)) * np.sqrt(252)
     return returns, std
 
-# Function to calculate negative Sharpe ratio
-def neg_sharpe_ratio(weights, mean_returns, cov_matrix, risk_free_rate):
-    p_returns, p_std = portfolio_performance(weights, mean_returns, cov_matrix)
-    return -(p_returns - risk_free_rate) / p_std
-
 # Function to optimize portfolio
-def optimize_portfolio(tickers, start_date, end_date, risk_free_rate=0.01):
-    data = fetch_data(tickers, start_date, end_date)
-    returns = data.pct_change().dropna()
+def optimize_portfolio(tickers, start_date, end_date, risk_free_rate=0.01, cov_estimator='sample'):
+    # Returns precomputed once per refresh in the shared price panel
+    returns = fetch_returns(tickers, start_date, end_date)
     mean_returns = returns.mean()
-    cov_matrix = returns.cov()
+    # An 'ewma' estimate resumes from the previous run and only folds in the new days
+    cov_matrix = estimate_covariance(returns, cov_estimator, state_path=os.path.join(EWMA_STATE_ROOT, 'pf21.npz'))
     
-    num_assets = len(tickers)
-    args = (mean_returns, cov_matrix, risk_free_rate)
-    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
-    bounds = tuple((0, 1) for asset in range(num_assets))
-    result = minimize(neg_sharpe_ratio, num_assets*[1./num_assets,], args=args,
-                      method='SLSQP', bounds=bounds, constraints=constraints)
+    # Maximize the Sharpe ratio with analytic gradients on the annualized moments
+    result = optimize_sharpe(mean_returns.to_numpy() * TRADING_DAYS, cov_matrix * TRADING_DAYS, risk_free_rate, bounds=(0, 1))
     
     return result, mean_returns, cov_matrix, returns
 
 # Function to calculate metrics for each asset
 def asset_metrics(returns, risk_free_rate=0.01):
-    metrics = {}
-    for column in returns.columns:
-        avg_return = returns[column].mean() * 252
-        volatility = returns[column].std() * np.sqrt(252)
-        sharpe_ratio = (avg_return - risk_free_rate) / volatility
-        metrics[column] = {
-            'Average Return': avg_return,
-            'Volatility': volatility,
-            'Sharpe Ratio': sharpe_ratio
-        }
+    # All columns in one vectorized pass
+    table = risk_metrics(returns, risk_free_rate=risk_free_rate)
+    table = table.rename(columns={'Annualized Return': 'Average Return', 'Annualized Volatility': 'Volatility'})
+    metrics = table[['Average Return', 'Volatility', 'Sharpe Ratio']].to_dict('index')
     return metrics
 
 # Main function
@@ -74,6 +61,12 @@ if __name__ == "__main__":
     print(f"Volatility: {portfolio_volatility:.4f}")
     print(f"Sharpe Ratio: {portfolio_sharpe_ratio:.4f}")
     
+    # Joint one-year simulation of the optimal portfolio from the same covariance
+    values = simulate_portfolio_paths(optimal_weights, mean_returns.to_numpy() * TRADING_DAYS,
+                                      cov_matrix * TRADING_DAYS, TRADING_DAYS, 10000)
+    low, median, high = np.percentile(values[-1], [5, 50, 95])
+    print(f"\nOne-Year Value of 1 Invested: 5%: {low:.4f}, Median: {median:.4f}, 95%: {high:.4f}")
+    
     metrics = asset_metrics(returns, risk_free_rate)
     print("\nAsset Metrics:")
     for ticker, metric in metrics.items():
@@ -81,3 +74,12 @@ if __name__ == "__main__":
         print(f"  Average Return: {metric['Average Return']:.4f}")
         print(f"  Volatility: {metric['Volatility']:.4f}")
         print(f"  Sharpe Ratio: {metric['Sharpe Ratio']:.4f}")
+    
+    # Out-of-sample check: monthly walk-forward re-optimization for several estimation windows
+    window_lengths = [126, 252, 504]
+    summaries = window_sweep(returns, window_lengths, rebalance=21, risk_free_rate=risk_free_rate, bounds=(0, 1))
+    print("\nWalk-Forward Backtest:")
+    for window, summary in summaries.items():
+        print(f"Window {window} days: Return {summary['return']:.4f}, Volatility {summary['volatility']:.4f}, "
+              f"Sharpe {summary['sharpe']:.4f}, Max Drawdown {summary['max_drawdown']:.2%}, "
+              f"Turnover {summary['mean_turnover']:.2%}")
@@ -0,0 +1,211 @@
+import numpy as np
+from mc_portfolios import TRADING_DAYS
+from pf_covariance import EWMACovariance
+from pf_optimizer import optimize_portfolio
+
+class RollingMoments:
+    """
+    Sample mean and covariance over a sliding window of returns, updated incrementally.
+
+    The window is kept in a ring buffer together with the sum and the
+    cross-product sum of its rows. Moving it forward adds the new rows and
+    subtracts the rows they overwrite, with O(rows * assets^2) work instead
+    of recomputing the covariance of the whole window. fit() mirrors
+    pf_covariance.EWMACovariance.fit so either can drive a backtest.
+
+    Attributes:
+    window : int : number of observations in the window
+    count : int : number of observations currently in the window
+    """
+
+    def __init__(self, window):
+        if window < 2:
+            raise ValueError(f"window must hold at least 2 observations, got {window}")
+        self.window = window
+        self.count = 0
+        self._position = 0
+        self._buffer = None
+        self._sum = None
+        self._cross = None
+
+    def fit(self, returns):
+        """
+        Push the rows of a returns table into the window, in order, evicting the oldest ones.
+        """
+        returns = np.asarray(returns, dtype=float)
+        if self._buffer is None:
+            # Empty slots are zeros, so evicting them leaves the sums unchanged
+            self._buffer = np.zeros((self.window, returns.shape[1]))
+            self._sum = np.zeros(returns.shape[1])
+            self._cross = np.zeros((returns.shape[1], returns.shape[1]))
+        for start in range(0, len(returns), self.window):
+            block = returns[start:start + self.window]
+            positions = (self._position + np.arange(len(block))) % self.window
+            leaving = self._buffer[positions]
+            self._sum += block.sum(axis=0) - leaving.sum(axis=0)
+            self._cross += block.T @ block - leaving.T @ leaving
+            self._buffer[positions] = block
+            self._position = (self._position + len(block)) % self.window
+            self.count = min(self.count + len(block), self.window)
+        return self
+
+    @property
+    def mean(self):
+        return self._sum / self.count
+
+    @property
+    def covariance(self):
+        mean = self.mean
+        return (self._cross - self.count * np.outer(mean, mean)) / (self.count - 1)
+
+def drawdowns(returns):
+    """
+    Wealth curve and drawdowns of a series of periodic returns, or of every column of a matrix of them.
+
+    Parameters:
+    returns : ndarray : periodic returns, shape (periods,) or (periods, series)
+
+    Returns:
+    wealth : ndarray : growth of one unit invested, same shape as returns
+    drawdown : ndarray : fall from the running peak of the wealth curve (<= 0), same shape as returns
+    """
+    wealth = np.cumprod(1 + np.asarray(returns, dtype=float), axis=0)
+    peak = np.maximum.accumulate(np.maximum(wealth, 1.0))
+    return wealth, wealth / peak - 1
+
+def walk_forward(daily_returns, window=TRADING_DAYS, rebalance=21, risk_free_rate=0.01, halflife=None,
+                 transaction_cost=0.0, periods=TRADING_DAYS, **kwargs):
+    """
+    Walk-forward backtest of the maximum-Sharpe portfolio re-optimized on a sliding window.
+
+    Every rebalance re-estimates the moments on the trailing window and
+    solves pf_optimizer.optimize_portfolio warm-started from the current
+    weights. Between rebalances the held weights drift with the market and
+    the moments are updated incrementally with the new rows only, so the
+    whole walk costs one small update per day and one warm solve per
+    rebalance. Returns are strictly out of sample: the weights chosen on the
+    data up to day t are applied from day t + 1. The first allocation is
+    bought from cash without cost and reported apart from the turnover of
+    the later rebalances.
+
+    Parameters:
+    daily_returns : DataFrame or ndarray : daily returns, one row per day and one column per asset
+    window : int : number of trailing days the moments are estimated on
+    rebalance : int : number of days between rebalances
+    risk_free_rate : float : annual risk-free rate
+    halflife : float : exponentially weighted moments with this halflife in days instead of the window
+                       (the window then only sets the warm-up period), None for the sliding window
+    transaction_cost : float : cost per unit of turnover, deducted on rebalance days after the first
+    periods : int : number of periods per year
+    kwargs : other optimize_portfolio arguments (max_risk, max_leverage, bounds, options, ...)
+
+    Returns:
+    backtest : dict : out-of-sample 'returns', 'wealth' and 'drawdown' (days,), the 'dates' if the
+                      returns have an index, the 'rebalances' day positions, the 'weights' chosen at
+                      each rebalance (rebalances, assets), the 'turnover' of every rebalance after
+                      the first (rebalances - 1,) and the gross 'initial_turnover' bought from cash
+    """
+    index = getattr(daily_returns, 'index', None)
+    returns = np.asarray(daily_returns, dtype=float)
+    num_days, num_assets = returns.shape
+    if num_days <= window:
+        raise ValueError(f"need more than {window} days of returns, got {num_days}")
+    moments = RollingMoments(window) if halflife is None else EWMACovariance(halflife=halflife)
+    moments.fit(returns[:window])
+    # The borrowed part of a levered budget costs the financing rate every day
+    financing_rate = kwargs.get('financing_rate')
+    daily_financing = (risk_free_rate if financing_rate is None else financing_rate) / periods
+    budget = kwargs.get('budget', 1.0)
+
+    held = np.zeros(num_assets)
+    x0 = None
+    portfolio_returns = np.empty(num_days - window)
+    rebalances, chosen, turnover = [], [], []
+    for day in range(window, num_days):
+        if (day - window) % rebalance == 0:
+            if day > window:
+                moments.fit(returns[day - rebalance:day])
+            result = optimize_portfolio(moments.mean * periods, moments.covariance * periods, risk_free_rate,
+                                        x0=x0, **kwargs)
+            # A failed solve keeps the current allocation rather than trading on a bad point,
+            # and starts from equal weights when there is no allocation yet
+            if result.success:
+                target = result.x
+            elif x0 is None:
+                target = np.full(num_assets, budget / num_assets)
+            else:
+                target = held
+            if x0 is not None:
+                turnover.append(np.abs(target - held).sum())
+            rebalances.append(day)
+            chosen.append(target)
+            held = target.copy()
+            x0 = target
+        gross_return = held @ returns[day] - (held.sum() - 1) * daily_financing
+        day_return = gross_return
+        if rebalances[-1] == day and len(rebalances) > 1:
+            day_return -= transaction_cost * turnover[-1]
+        portfolio_returns[day - window] = day_return
+        # Weights drift as the positions grow against the wealth, the costs being taken pro rata,
+        # which keeps a long-short book with a small net sum well defined
+        held = held * (1 + returns[day]) / (1 + gross_return)
+
+    wealth, drawdown = drawdowns(portfolio_returns)
+    backtest = {
+        'returns': portfolio_returns,
+        'wealth': wealth,
+        'drawdown': drawdown,
+        'rebalances': np.array(rebalances),
+        'weights': np.array(chosen),
+        'turnover': np.array(turnover),
+        'initial_turnover': np.abs(chosen[0]).sum()
+    }
+    if index is not None:
+        backtest['dates'] = index[window:]
+    return backtest
+
+def summarize_backtest(backtest, risk_free_rate=0.01, periods=TRADING_DAYS):
+    """
+    Annualized performance, turnover and drawdown figures of a walk_forward backtest.
+
+    Returns:
+    summary : dict : 'return', 'volatility', 'sharpe', 'max_drawdown', 'mean_turnover' and 'total_return'
+    """
+    returns = backtest['returns']
+    annual_return = returns.mean() * periods
+    volatility = returns.std(ddof=1) * np.sqrt(periods)
+    summary = {
+        'return': annual_return,
+        'volatility': volatility,
+        'sharpe': (annual_return - risk_free_rate) / volatility,
+        'max_drawdown': backtest['drawdown'].min(),
+        'mean_turnover': backtest['turnover'].mean() if len(backtest['turnover']) else 0.0,
+        'total_return': backtest['wealth'][-1] - 1
+    }
+    return summary
+
+def window_sweep(daily_returns, windows, rebalance=21, risk_free_rate=0.01, **kwargs):
+    """
+    Walk-forward summaries for several estimation window lengths.
+
+    All windows are scored on the same out-of-sample days, those after the
+    longest window, so their figures are comparable.
+
+    Parameters:
+    daily_returns : DataFrame or ndarray : daily returns, one row per day and one column per asset
+    windows : sequence : window lengths in days
+    rebalance : int : number of days between rebalances
+    risk_free_rate : float : annual risk-free rate
+    kwargs : other walk_forward arguments
+
+    Returns:
+    summaries : dict : summarize_backtest result of each window length
+    """
+    returns = np.asarray(daily_returns, dtype=float)
+    longest = max(windows)
+    summaries = {}
+    for window in windows:
+        # Start later so every walk trades from day `longest` on
+        backtest = walk_forward(returns[longest - window:], window, rebalance, risk_free_rate, **kwargs)
+        summaries[window] = summarize_backtest(backtest, risk_free_rate, kwargs.get('periods', TRADING_DAYS))
+    return summaries
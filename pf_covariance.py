@@ -0,0 +1,319 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Daily decay of the RiskMetrics exponentially weighted covariance
+DEFAULT_DECAY = 0.94
+
+# Number of statistical factors of the PCA factor model
+DEFAULT_FACTORS = 5
+
+# Directory of the EWMA states the optimizer scripts resume from
+EWMA_STATE_ROOT = 'covariance_state'
+
+def _centered(returns):
+    returns = np.asarray(returns, dtype=float)
+    return returns - returns.mean(axis=0), returns.shape[0]
+
+def ledoit_wolf(returns):
+    """
+    Ledoit-Wolf shrinkage of the sample covariance towards a scaled identity.
+
+    The shrinkage intensity minimizes the expected Frobenius distance to the
+    true covariance (Ledoit and Wolf, 2004). The result is well conditioned
+    even when the number of assets approaches the number of observations.
+
+    Parameters:
+    returns : DataFrame or ndarray : returns, one row per observation and one column per asset
+
+    Returns:
+    cov_matrix : ndarray : shrunk covariance matrix, shape (assets, assets)
+    shrinkage : float : weight of the identity target, in [0, 1]
+    """
+    centered, num_observations = _centered(returns)
+    num_assets = centered.shape[1]
+    sample = centered.T @ centered / num_observations
+    mu = np.trace(sample) / num_assets
+    squared = centered ** 2
+    # Variance of the sample covariance entries, and their distance to the target
+    beta = (np.sum(squared.T @ squared) / num_observations - np.sum(sample ** 2)) / num_observations
+    delta = np.sum((sample - mu * np.eye(num_assets)) ** 2)
+    shrinkage = 0.0 if delta == 0 else min(beta / delta, 1.0)
+    cov_matrix = (1 - shrinkage) * sample
+    cov_matrix.flat[::num_assets + 1] += shrinkage * mu
+    return cov_matrix, shrinkage
+
+def oas(returns):
+    """
+    Oracle Approximating Shrinkage of the sample covariance towards a scaled identity.
+
+    Chen et al. (2010) derive the intensity under a Gaussian assumption; it
+    usually shrinks more than Ledoit-Wolf when observations are scarce.
+
+    Parameters:
+    returns : DataFrame or ndarray : returns, one row per observation and one column per asset
+
+    Returns:
+    cov_matrix : ndarray : shrunk covariance matrix, shape (assets, assets)
+    shrinkage : float : weight of the identity target, in [0, 1]
+    """
+    centered, num_observations = _centered(returns)
+    num_assets = centered.shape[1]
+    sample = centered.T @ centered / num_observations
+    mu = np.trace(sample) / num_assets
+    alpha = np.mean(sample ** 2)
+    denominator = (num_observations + 1) * (alpha - mu ** 2 / num_assets)
+    shrinkage = 1.0 if denominator == 0 else min((alpha + mu ** 2) / denominator, 1.0)
+    cov_matrix = (1 - shrinkage) * sample
+    cov_matrix.flat[::num_assets + 1] += shrinkage * mu
+    return cov_matrix, shrinkage
+
+class EWMACovariance:
+    """
+    Exponentially weighted covariance updated one observation at a time.
+
+    Each update folds a new return vector in with O(assets^2) work:
+    mean += (1 - decay) * d and cov = decay * (cov + (1 - decay) * d d'),
+    with d the deviation from the previous mean. A daily re-run only needs
+    the saved state and the newest bar instead of the whole history (see
+    ewma_covariance).
+
+    Attributes:
+    decay : float : weight of the past at every update (0.94 is the RiskMetrics daily value)
+    count : int : number of observations folded in
+    mean : ndarray : exponentially weighted mean, shape (assets,)
+    covariance : ndarray : exponentially weighted covariance, shape (assets, assets)
+    columns : list : asset names of the returns fitted from a DataFrame, None otherwise
+    last_date : Timestamp : date of the last row fitted from a dated DataFrame, None otherwise
+    """
+
+    def __init__(self, decay=DEFAULT_DECAY, halflife=None):
+        if halflife is not None:
+            decay = 0.5 ** (1 / halflife)
+        if not 0 < decay < 1:
+            raise ValueError(f"decay must be in (0, 1), got {decay}")
+        self.decay = decay
+        self.count = 0
+        self.mean = None
+        self.covariance = None
+        self.columns = None
+        self.last_date = None
+
+    def update(self, observation):
+        """
+        Fold one return vector into the estimate.
+        """
+        observation = np.asarray(observation, dtype=float)
+        if self.count == 0:
+            self.mean = observation.copy()
+            self.covariance = np.zeros((observation.size, observation.size))
+        else:
+            deviation = observation - self.mean
+            self.mean += (1 - self.decay) * deviation
+            self.covariance += (1 - self.decay) * np.outer(deviation, deviation)
+            self.covariance *= self.decay
+        self.count += 1
+        return self
+
+    def fit(self, returns):
+        """
+        Fold every row of a returns table into the estimate, in order.
+        """
+        for observation in np.asarray(returns, dtype=float):
+            self.update(observation)
+        if isinstance(returns, pd.DataFrame):
+            self.columns = list(returns.columns)
+            if isinstance(returns.index, pd.DatetimeIndex) and len(returns):
+                self.last_date = returns.index[-1]
+        return self
+
+    def fit_new(self, returns):
+        """
+        Fold in only the rows of a dated returns table after the last date already fitted.
+        """
+        if self.last_date is not None:
+            returns = returns[returns.index > self.last_date]
+        return self.fit(returns)
+
+    def save(self, path):
+        # State for the next incremental run
+        last_date = np.datetime64('NaT') if self.last_date is None else np.datetime64(self.last_date)
+        np.savez(path, decay=self.decay, count=self.count, mean=self.mean, covariance=self.covariance,
+                 columns=np.array(self.columns or [], dtype=str), last_date=last_date.astype('datetime64[ns]'))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as state:
+            estimator = cls(float(state['decay']))
+            estimator.count = int(state['count'])
+            estimator.mean = state['mean']
+            estimator.covariance = state['covariance']
+            estimator.columns = state['columns'].tolist() or None
+            last_date = state['last_date'][()]
+        estimator.last_date = None if np.isnat(last_date) else pd.Timestamp(last_date)
+        return estimator
+
+def ewma_covariance(returns, state_path=None, decay=DEFAULT_DECAY):
+    """
+    Exponentially weighted covariance of a dated returns table, resumed from a saved state.
+
+    The state saved at state_path by the previous run is reused when it
+    was fitted on the same columns and its last date is in the table: only
+    the rows after that date are folded in, so a daily re-run costs one
+    update per new bar. Otherwise the whole table is fitted. Rows already
+    fitted are not revisited, so a state should be dropped when the history
+    it was fitted on is revised. The updated state is saved back.
+
+    Parameters:
+    returns : DataFrame : returns indexed by date, one column per asset
+    state_path : str : .npz file of the saved state, None to always fit the whole table
+    decay : float : weight of the past at every update
+
+    Returns:
+    cov_matrix : ndarray : exponentially weighted covariance, shape (assets, assets)
+    """
+    estimator = None
+    if state_path is not None and os.path.exists(state_path):
+        estimator = EWMACovariance.load(state_path)
+        if (estimator.decay != decay or estimator.columns != list(returns.columns)
+                or estimator.last_date not in returns.index):
+            estimator = None
+    if estimator is None:
+        estimator = EWMACovariance(decay).fit(returns)
+    else:
+        estimator.fit_new(returns)
+    if state_path is not None:
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        estimator.save(state_path)
+    return estimator.covariance
+
+class FactorCovariance:
+    """
+    Factor-model covariance B F B' + diag(specific), kept in structured form.
+
+    Only the (assets x factors) loadings, the (factors x factors) factor
+    covariance and the specific variances are stored, so memory is O(n k)
+    and products with weight vectors or weight matrices cost O(n k) per
+    portfolio instead of O(n^2). The @ operator works on either side
+    (cov @ w, w @ cov, weights_matrix @ cov) and a scalar product rescales
+    it, so the optimizer and the portfolio simulators use it like an array.
+    to_array() builds the dense matrix when an algorithm needs one.
+
+    Attributes:
+    loadings : ndarray : factor loadings B, shape (assets, factors)
+    factor_cov : ndarray : factor covariance F, shape (factors, factors)
+    specific : ndarray : specific (idiosyncratic) variances, shape (assets,)
+    """
+
+    # Let ndarray @ FactorCovariance and ndarray * FactorCovariance defer to this class
+    __array_ufunc__ = None
+
+    def __init__(self, loadings, factor_cov, specific):
+        self.loadings = np.asarray(loadings, dtype=float)
+        self.factor_cov = np.atleast_2d(np.asarray(factor_cov, dtype=float))
+        self.specific = np.asarray(specific, dtype=float)
+
+    @property
+    def shape(self):
+        return (len(self.specific), len(self.specific))
+
+    def __matmul__(self, weights):
+        # cov @ w for a vector, or cov @ W for a (assets x m) matrix
+        weights = np.asarray(weights, dtype=float)
+        specific = self.specific if weights.ndim == 1 else self.specific[:, np.newaxis]
+        return self.loadings @ (self.factor_cov @ (self.loadings.T @ weights)) + specific * weights
+
+    def __rmatmul__(self, weights):
+        # w @ cov for a vector, or W @ cov for a (m x assets) matrix of portfolios
+        weights = np.asarray(weights, dtype=float)
+        return ((weights @ self.loadings) @ self.factor_cov) @ self.loadings.T + weights * self.specific
+
+    def __mul__(self, scale):
+        return FactorCovariance(self.loadings, self.factor_cov * scale, self.specific * scale)
+
+    __rmul__ = __mul__
+
+    def variance(self, weights):
+        """
+        Variance of one portfolio (assets,) or of every row of a (m x assets) weight matrix, in O(n k).
+        """
+        weights = np.asarray(weights, dtype=float)
+        exposures = weights @ self.loadings
+        return np.sum((exposures @ self.factor_cov) * exposures, axis=-1) + np.sum(weights ** 2 * self.specific, axis=-1)
+
+    def to_array(self):
+        cov_matrix = self.loadings @ self.factor_cov @ self.loadings.T
+        cov_matrix.flat[::len(self.specific) + 1] += self.specific
+        return cov_matrix
+
+def factor_covariance(returns, num_factors=DEFAULT_FACTORS):
+    """
+    Statistical (PCA) factor-model covariance of returns.
+
+    The factors are the leading principal components of the returns, taken
+    from a thin SVD so the n x n sample covariance is never formed. The
+    specific variances are what the factors leave of each asset's sample
+    variance.
+
+    Parameters:
+    returns : DataFrame or ndarray : returns, one row per observation and one column per asset
+    num_factors : int : number of principal components kept
+
+    Returns:
+    cov_matrix : FactorCovariance : factor-model covariance in the units of the returns
+    """
+    centered, num_observations = _centered(returns)
+    num_factors = min(num_factors, min(centered.shape))
+    _, singular_values, components = np.linalg.svd(centered, full_matrices=False)
+    loadings = components[:num_factors].T
+    factor_variances = singular_values[:num_factors] ** 2 / (num_observations - 1)
+    sample_variances = np.sum(centered ** 2, axis=0) / (num_observations - 1)
+    specific = sample_variances - (loadings ** 2) @ factor_variances
+    # Keep every asset with some idiosyncratic risk so the matrix stays positive definite
+    specific = np.maximum(specific, 1e-4 * sample_variances + np.finfo(float).tiny)
+    return FactorCovariance(loadings, np.diag(factor_variances), specific)
+
+def as_array(cov_matrix):
+    """
+    Dense covariance matrix from an array, a DataFrame or a FactorCovariance.
+    """
+    if isinstance(cov_matrix, FactorCovariance):
+        return cov_matrix.to_array()
+    return np.asarray(cov_matrix, dtype=float)
+
+def as_operator(cov_matrix):
+    """
+    Covariance usable with @ and *: a FactorCovariance is kept structured, anything else becomes an ndarray.
+    """
+    if isinstance(cov_matrix, FactorCovariance):
+        return cov_matrix
+    return np.asarray(cov_matrix, dtype=float)
+
+def estimate_covariance(returns, estimator='sample', state_path=None):
+    """
+    Covariance matrix of returns with the chosen estimator.
+
+    Parameters:
+    returns : DataFrame or ndarray : returns, one row per observation and one column per asset
+    estimator : str or callable : 'sample', 'ledoit_wolf', 'oas', 'ewma', 'factor' (PCA factor model), or a
+                                  function of the returns array returning a covariance matrix
+    state_path : str : with 'ewma' and dated returns, .npz file the estimator state is resumed from and saved to
+
+    Returns:
+    cov_matrix : ndarray or FactorCovariance : covariance in the units of the returns, shape (assets, assets)
+    """
+    if callable(estimator):
+        return as_operator(estimator(np.asarray(returns, dtype=float)))
+    if estimator == 'sample':
+        return np.atleast_2d(np.cov(np.asarray(returns, dtype=float), rowvar=False))
+    if estimator == 'ledoit_wolf':
+        return ledoit_wolf(returns)[0]
+    if estimator == 'oas':
+        return oas(returns)[0]
+    if estimator == 'ewma':
+        if isinstance(returns, pd.DataFrame) and isinstance(returns.index, pd.DatetimeIndex):
+            return ewma_covariance(returns, state_path)
+        return EWMACovariance().fit(returns).covariance
+    if estimator == 'factor':
+        return factor_covariance(returns)
+    raise ValueError(f"estimator must be 'sample', 'ledoit_wolf', 'oas', 'ewma', 'factor' or a callable, got {estimator!r}")
@@ -0,0 +1,126 @@
+import functools
+import numpy as np
+import pandas as pd
+from mc_portfolios import TRADING_DAYS
+from pf_backtest import drawdowns
+from price_store import fetch_prices
+
+# Benchmark of the information ratio and the beta
+BENCHMARK = 'SPY'
+
+def _naive_dates(index):
+    # Daily bars from yf.Ticker.history are timezone-aware, those of the price store are not
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+@functools.lru_cache(maxsize=None)
+def _benchmark_returns(benchmark, start_date, end_date):
+    prices = fetch_prices(benchmark, start_date, end_date)
+    return prices.pct_change().dropna()
+
+def benchmark_returns(start_date, end_date, benchmark=BENCHMARK):
+    """
+    Daily returns of the benchmark, fetched once per date range and process (and kept in the price store).
+
+    Parameters:
+    start_date : str or Timestamp : first date
+    end_date : str or Timestamp : end date (excluded)
+    benchmark : str : benchmark ticker
+
+    Returns:
+    benchmark_returns : Series : daily returns indexed by date
+    """
+    return _benchmark_returns(benchmark, pd.Timestamp(start_date).strftime('%Y-%m-%d'),
+                              pd.Timestamp(end_date).strftime('%Y-%m-%d'))
+
+def risk_metrics(returns, benchmark=None, risk_free_rate=0.01, periods=TRADING_DAYS):
+    """
+    Annualized risk and performance metrics of every column of a returns panel at once.
+
+    Every statistic is a NaN-aware reduction over the date axis of the whole
+    (days x tickers) matrix, so a universe costs the same few array passes
+    as a single ticker. Missing returns (a ticker listed later, a market
+    holiday) are skipped. Sortino uses the standard deviation of the
+    negative returns. The information ratio and beta are computed on the
+    days both the ticker and the benchmark have a return.
+
+    Parameters:
+    returns : DataFrame : daily returns, one row per date and one column per ticker
+    benchmark : Series : daily benchmark returns indexed by date, None to skip the relative metrics
+    risk_free_rate : float : annual risk-free rate
+    periods : int : number of periods per year
+
+    Returns:
+    metrics : DataFrame : one row per ticker with 'Annualized Return', 'Annualized Volatility',
+                          'Sharpe Ratio', 'Sortino Ratio', 'Max Drawdown' and, with a benchmark,
+                          'Information Ratio' and 'Beta'
+    """
+    tickers = returns.columns
+    matrix = returns.to_numpy(dtype=float)
+    annual_return = np.nanmean(matrix, axis=0) * periods
+    volatility = np.nanstd(matrix, axis=0, ddof=1) * np.sqrt(periods)
+    downside = np.nanstd(np.where(matrix < 0, matrix, np.nan), axis=0, ddof=1) * np.sqrt(periods)
+    _, drawdown = drawdowns(np.nan_to_num(matrix))
+    metrics = {
+        'Annualized Return': annual_return,
+        'Annualized Volatility': volatility,
+        'Sharpe Ratio': (annual_return - risk_free_rate) / volatility,
+        'Sortino Ratio': (annual_return - risk_free_rate) / downside,
+        'Max Drawdown': drawdown.min(axis=0)
+    }
+
+    if benchmark is not None:
+        benchmark = pd.Series(np.asarray(benchmark, dtype=float), index=_naive_dates(benchmark.index))
+        aligned = benchmark.reindex(_naive_dates(returns.index)).to_numpy()[:, np.newaxis]
+        both = ~np.isnan(matrix) & ~np.isnan(aligned)
+        paired_returns = np.where(both, matrix, np.nan)
+        paired_benchmark = np.where(both, aligned, np.nan)
+        # Excess return and tracking error both come from the same paired active returns
+        active = paired_returns - paired_benchmark
+        tracking_error = np.nanstd(active, axis=0, ddof=1) * np.sqrt(periods)
+        metrics['Information Ratio'] = np.nanmean(active, axis=0) * periods / tracking_error
+        deviations = paired_benchmark - np.nanmean(paired_benchmark, axis=0)
+        covariance = np.nansum((paired_returns - np.nanmean(paired_returns, axis=0)) * deviations, axis=0)
+        metrics['Beta'] = covariance / np.nansum(deviations ** 2, axis=0)
+    return pd.DataFrame(metrics, index=tickers)
+
+def rolling_metrics(returns, window=63, benchmark=None, risk_free_rate=0.01, periods=TRADING_DAYS):
+    """
+    Rolling annualized return, volatility, Sharpe and Sortino ratios (and beta) of every column at once.
+
+    Parameters:
+    returns : DataFrame : daily returns, one row per date and one column per ticker
+    window : int : number of days in each rolling window
+    benchmark : Series : daily benchmark returns indexed by date, None to skip the rolling beta
+    risk_free_rate : float : annual risk-free rate
+    periods : int : number of periods per year
+
+    Returns:
+    metrics : dict : one (dates x tickers) DataFrame per metric: 'return', 'volatility', 'sharpe',
+                     'sortino' and, with a benchmark, 'beta'
+    """
+    returns = returns.set_axis(_naive_dates(returns.index))
+    rolling = returns.rolling(window)
+    annual_return = rolling.mean() * periods
+    volatility = rolling.std() * np.sqrt(periods)
+    downside = returns.where(returns < 0).rolling(window, min_periods=2).std() * np.sqrt(periods)
+    metrics = {
+        'return': annual_return,
+        'volatility': volatility,
+        'sharpe': (annual_return - risk_free_rate) / volatility,
+        'sortino': (annual_return - risk_free_rate) / downside
+    }
+    if benchmark is not None:
+        aligned = benchmark.set_axis(_naive_dates(benchmark.index)).reindex(returns.index)
+        metrics['beta'] = rolling.cov(aligned) / aligned.rolling(window).var().to_numpy()[:, np.newaxis]
+    return metrics
+
+def rank_universe(returns, by='Sharpe Ratio', benchmark=None, risk_free_rate=0.01, periods=TRADING_DAYS):
+    """
+    Metrics of every ticker of a returns panel, best first by one of the risk_metrics columns.
+    """
+    metrics = risk_metrics(returns, benchmark, risk_free_rate, periods)
+    ascending = by in ('Annualized Volatility',)
+    return metrics.sort_values(by, ascending=ascending)
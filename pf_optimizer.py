@@ -0,0 +1,126 @@
+import numpy as np
+from scipy.optimize import minimize
+from pf_covariance import as_operator
+
+def neg_sharpe_ratio(weights, mean_returns, cov_matrix, risk_free_rate=0.01):
+    """
+    Negative Sharpe ratio of a portfolio and its gradient.
+
+    With r = mu.w and s = sqrt(w' S w), the gradient of the Sharpe ratio is
+    mu / s - (r - rf) S w / s^3, so SLSQP needs one evaluation per iteration
+    instead of n + 1 for finite differences.
+
+    Parameters:
+    weights : ndarray : portfolio weights, shape (assets,)
+    mean_returns : ndarray : annualized mean returns, shape (assets,)
+    cov_matrix : ndarray : annualized covariance matrix, shape (assets, assets)
+    risk_free_rate : float : annual risk-free rate
+
+    Returns:
+    value : float : negative Sharpe ratio
+    gradient : ndarray : gradient with respect to the weights, shape (assets,)
+    """
+    cov_weights = cov_matrix @ weights
+    std_dev = np.sqrt(weights @ cov_weights)
+    excess_return = weights @ mean_returns - risk_free_rate
+    gradient = mean_returns / std_dev - excess_return * cov_weights / std_dev ** 3
+    return -excess_return / std_dev, -gradient
+
+def budget_constraint(weights, budget=1.0):
+    return np.sum(weights) - budget
+
+def budget_jacobian(weights, budget=1.0):
+    return np.ones_like(weights)
+
+def risk_constraint(weights, cov_matrix, max_risk):
+    # Non-negative while the annualized volatility stays below max_risk
+    return max_risk - np.sqrt(weights @ cov_matrix @ weights)
+
+def risk_jacobian(weights, cov_matrix, max_risk):
+    cov_weights = cov_matrix @ weights
+    return -cov_weights / np.sqrt(weights @ cov_weights)
+
+def leverage_constraint(weights, max_leverage):
+    # Non-negative while the gross exposure stays below max_leverage
+    return max_leverage - np.sum(np.abs(weights))
+
+def leverage_jacobian(weights, max_leverage):
+    return -np.sign(weights)
+
+def optimize_portfolio(mean_returns, cov_matrix, risk_free_rate=0.01, max_risk=None, max_leverage=None,
+                       bounds=(0, 1), x0=None, options=None, budget=1.0, financing_rate=None):
+    """
+    Maximize the Sharpe ratio of a fully invested portfolio with SLSQP and analytic gradients.
+
+    A budget above 1 describes a levered portfolio: the weights sum to the
+    budget and the borrowed budget - 1 costs the financing rate, so the
+    return is mu.w - (sum(w) - 1) f = (mu - f).w + f. The objective is then
+    the plain Sharpe ratio on mu - f with a risk-free rate of rf - f.
+
+    Parameters:
+    mean_returns : array-like : annualized mean returns, shape (assets,)
+    cov_matrix : array-like or FactorCovariance : annualized covariance matrix, shape (assets, assets)
+    risk_free_rate : float : annual risk-free rate
+    max_risk : float : maximum annualized volatility, None for no risk constraint
+    max_leverage : float : maximum gross exposure sum(|w|), None for no leverage constraint
+    bounds : tuple : (lowest, highest) weight of every asset, None for unbounded
+    x0 : ndarray : starting weights, e.g. the previous solution (equal weights if None)
+    options : dict : options passed to scipy.optimize.minimize
+    budget : float : sum of the weights (the leverage of a long-only portfolio)
+    financing_rate : float : annual cost of the borrowed budget - 1 (the risk-free rate if None)
+
+    Returns:
+    result : OptimizeResult : result of scipy.optimize.minimize, the weights being result.x
+    """
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    # Only products with weight vectors are needed, so a factor-model covariance is never densified
+    cov_matrix = as_operator(cov_matrix)
+    num_assets = len(mean_returns)
+    if x0 is None:
+        x0 = np.full(num_assets, budget / num_assets)
+    if financing_rate is None:
+        financing_rate = risk_free_rate
+
+    constraints = [{'type': 'eq', 'fun': budget_constraint, 'jac': budget_jacobian, 'args': (budget,)}]
+    if max_risk is not None:
+        constraints.append({'type': 'ineq', 'fun': risk_constraint, 'jac': risk_jacobian,
+                            'args': (cov_matrix, max_risk)})
+    if max_leverage is not None:
+        constraints.append({'type': 'ineq', 'fun': leverage_constraint, 'jac': leverage_jacobian,
+                            'args': (max_leverage,)})
+    args = (mean_returns - financing_rate, cov_matrix, risk_free_rate - financing_rate)
+    result = minimize(neg_sharpe_ratio, x0, args=args, jac=True,
+                      method='SLSQP', bounds=[bounds] * num_assets, constraints=constraints, options=options)
+    return result
+
+def optimize_sweep(mean_returns, cov_matrix, parameter, values, risk_free_rate=0.01, x0=None, **kwargs):
+    """
+    Solve optimize_portfolio for a sweep of one constraint level, warm-starting each solve.
+
+    Neighbouring levels have neighbouring optima, so every solve starts from
+    the previous solution and typically converges in a few iterations. Pass
+    the values in a monotone order to get the most out of the warm starts.
+
+    Parameters:
+    mean_returns : array-like : annualized mean returns, shape (assets,)
+    cov_matrix : array-like or FactorCovariance : annualized covariance matrix, shape (assets, assets)
+    parameter : str : 'max_risk' or 'max_leverage'
+    values : sequence : levels of the swept constraint
+    risk_free_rate : float : annual risk-free rate
+    x0 : ndarray : starting weights of the first solve (equal weights if None)
+    kwargs : other optimize_portfolio arguments, fixed across the sweep
+
+    Returns:
+    results : list : one OptimizeResult per level, in the order of values
+    """
+    if parameter not in ('max_risk', 'max_leverage'):
+        raise ValueError(f"parameter must be 'max_risk' or 'max_leverage', got {parameter!r}")
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    cov_matrix = as_operator(cov_matrix)
+    results = []
+    for value in values:
+        result = optimize_portfolio(mean_returns, cov_matrix, risk_free_rate, x0=x0, **{parameter: value}, **kwargs)
+        results.append(result)
+        if result.success:
+            x0 = result.x
+    return results
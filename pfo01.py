@@ -1,37 +1,32 @@
+import os
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from scipy.optimize import minimize
+from mc_portfolios import TRADING_DAYS
+from pf_covariance import estimate_covariance, EWMA_STATE_ROOT
+from pf_optimizer import optimize_portfolio as optimize_sharpe
+from price_store import fetch_prices
 
 # Function to fetch stock data
 def fetch_data(tickers, start_date, end_date):
-    data = yf.download(tickers, start=start_date, end=end_date)['Adj Close']
+    data = fetch_prices(tickers, start_date, end_date)
     return data
 
 # Function to calculate portfolio performance
 def portfolio_performance(weights, mean_returns, cov_matrix):
     returns = np.sum(mean_returns * weights) * 252
-    std = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights))) * np.sqrt(252)
+    std = np.sqrt(weights @ (cov_matrix @ weights)) * np.sqrt(252)
     return returns, std
 
-# Function to calculate negative Sharpe ratio
-def neg_sharpe_ratio(weights, mean_returns, cov_matrix, risk_free_rate):
-    p_returns, p_std = portfolio_performance(weights, mean_returns, cov_matrix)
-    return -(p_returns - risk_free_rate) / p_std
-
 # Function to optimize portfolio
-def optimize_portfolio(tickers, start_date, end_date, risk_free_rate=0.01):
+def optimize_portfolio(tickers, start_date, end_date, risk_free_rate=0.01, cov_estimator='sample'):
     data = fetch_data(tickers, start_date, end_date)
     returns = data.pct_change().dropna()
     mean_returns = returns.mean()
-    cov_matrix = returns.cov()
+    # An 'ewma' estimate resumes from the previous run and only folds in the new days
+    cov_matrix = estimate_covariance(returns, cov_estimator, state_path=os.path.join(EWMA_STATE_ROOT, 'pfo01.npz'))
     
-    num_assets = len(tickers)
-    args = (mean_returns, cov_matrix, risk_free_rate)
-    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
-    bounds = tuple((0, 1) for asset in range(num_assets))
-    result = minimize(neg_sharpe_ratio, num_assets*[1./num_assets,], args=args,
-                      method='SLSQP', bounds=bounds, constraints=constraints)
+    # Maximize the Sharpe ratio with analytic gradients on the annualized moments
+    result = optimize_sharpe(mean_returns.to_numpy() * TRADING_DAYS, cov_matrix * TRADING_DAYS, risk_free_rate, bounds=(0, 1))
     
     return result, mean_returns, cov_matrix
 
@@ -42,12 +37,17 @@ if __name__ == "__main__":
     start_date = '2020-01-01'
     end_date = '2023-01-01'
     risk_free_rate = 0.01
+    universe_file = None  # Set to 'company_codes.csv' to optimize the whole scraped universe
+    if universe_file is not None:
+        tickers = pd.read_csv(universe_file)['Company Code'].dropna().tolist()
+    # The factor model keeps every covariance product O(assets * factors) on large universes
+    cov_estimator = 'factor' if len(tickers) > 50 else 'sample'
     
-    result, mean_returns, cov_matrix = optimize_portfolio(tickers, start_date, end_date, risk_free_rate)
+    result, mean_returns, cov_matrix = optimize_portfolio(tickers, start_date, end_date, risk_free_rate, cov_estimator)
     optimal_weights = result.x
     
     print("Optimal Weights:")
-    for ticker, weight in zip(tickers, optimal_weights):
+    for ticker, weight in zip(mean_returns.index, optimal_weights):
         print(f"{ticker}: {weight:.4f}")
     
     portfolio_return, portfolio_volatility = portfolio_performance(optimal_weights, mean_returns, cov_matrix)
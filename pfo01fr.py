@@ -1,37 +1,27 @@
+import os
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from scipy.optimize import minimize
-
-# Function to fetch stock data
-def fetch_data(tickers, start_date, end_date):
-    data = yf.download(tickers, start=start_date, end=end_date)['Adj Close']
-    return data
+from mc_portfolios import TRADING_DAYS
+from pf_covariance import estimate_covariance, EWMA_STATE_ROOT
+from pf_optimizer import optimize_portfolio as optimize_sharpe
+from price_panel import fetch_returns
 
 # Function to calculate portfolio performance
 def portfolio_performance(weights, mean_returns, cov_matrix):
     returns = np.sum(mean_returns * weights) * 252
-    std = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights))) * np.sqrt(252)
+    std = np.sqrt(weights @ (cov_matrix @ weights)) * np.sqrt(252)
     return returns, std
 
-# Function to calculate negative Sharpe ratio
-def neg_sharpe_ratio(weights, mean_returns, cov_matrix, risk_free_rate):
-    p_returns, p_std = portfolio_performance(weights, mean_returns, cov_matrix)
-    return -(p_returns - risk_free_rate) / p_std
-
 # Function to optimize portfolio
-def optimize_portfolio(tickers, start_date, end_date, risk_free_rate=0.01):
-    data = fetch_data(tickers, start_date, end_date)
-    returns = data.pct_change().dropna()
+def optimize_portfolio(tickers, start_date, end_date, risk_free_rate=0.01, cov_estimator='sample'):
+    # Returns precomputed once per refresh in the shared price panel
+    returns = fetch_returns(tickers, start_date, end_date)
     mean_returns = returns.mean()
-    cov_matrix = returns.cov()
+    # An 'ewma' estimate resumes from the previous run and only folds in the new days
+    cov_matrix = estimate_covariance(returns, cov_estimator, state_path=os.path.join(EWMA_STATE_ROOT, 'pfo01fr.npz'))
     
-    num_assets = len(tickers)
-    args = (mean_returns, cov_matrix, risk_free_rate)
-    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
-    bounds = tuple((0, 1) for asset in range(num_assets))
-    result = minimize(neg_sharpe_ratio, num_assets*[1./num_assets,], args=args,
-                      method='SLSQP', bounds=bounds, constraints=constraints)
+    # Maximize the Sharpe ratio with analytic gradients on the annualized moments
+    result = optimize_sharpe(mean_returns.to_numpy() * TRADING_DAYS, cov_matrix * TRADING_DAYS, risk_free_rate, bounds=(0, 1))
     
     return result, mean_returns, cov_matrix
 
@@ -47,8 +37,9 @@ if __name__ == "__main__":
     start_date = '2020-01-01'
     end_date = '2024-07-25'
     risk_free_rate = 0.01
+    cov_estimator = 'ledoit_wolf'  # Shrinkage keeps the 40-asset covariance well conditioned
     
-    result, mean_returns, cov_matrix = optimize_portfolio(tickers, start_date, end_date, risk_free_rate)
+    result, mean_returns, cov_matrix = optimize_portfolio(tickers, start_date, end_date, risk_free_rate, cov_estimator)
     optimal_weights = result.x
     
     print("Optimal Weights:")
@@ -0,0 +1,289 @@
+import io
+import zlib
+import random
+import asyncio
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from price_store import PriceStore, download_prices
+
+# Tickers per multi-symbol request
+DEFAULT_BATCH_SIZE = 25
+
+# Requests in flight at the same time
+DEFAULT_CONCURRENCY = 4
+
+# Requests started per second, across all batches
+DEFAULT_RATE_LIMIT = 2.0
+
+class BatchTooLarge(Exception):
+    """
+    Raised by a downloader when the service refuses a request for holding too many tickers.
+    """
+
+class RateLimited(Exception):
+    """
+    Raised by a downloader when the service asks the client to slow down.
+
+    Attributes:
+    retry_after : float : seconds the service asked to wait, None if it did not say
+    """
+
+    def __init__(self, retry_after=None):
+        super().__init__(f"rate limited, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+class RateLimiter:
+    """
+    Space out request starts to at most `rate` per second across coroutines.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = max(self._next, loop.time()) + self.interval
+
+    def pause(self, delay):
+        """
+        Hold every request start for `delay` seconds from now.
+        """
+        self._next = max(self._next, asyncio.get_running_loop().time() + delay)
+
+async def _fetch_batch(store, batch, start, end, semaphore, limiter, write_lock, retries, backoff, rng):
+    # Download one batch, retrying the tickers that fail with jittered exponential backoff
+    pending = list(batch)
+    for attempt in range(retries + 1):
+        if attempt:
+            await asyncio.sleep(backoff * 2 ** (attempt - 1) * rng.uniform(0.5, 1.5))
+        async with semaphore:
+            await limiter.wait()
+            try:
+                frames = await asyncio.to_thread(store.downloader, pending, start, end)
+            except BatchTooLarge:
+                too_large, frames = len(pending) > 1, None
+            except RateLimited as error:
+                # Throttling holds back every batch, not only this one
+                limiter.pause(backoff if error.retry_after is None else error.retry_after)
+                too_large, frames = False, None
+            except Exception:
+                too_large, frames = False, None
+        if frames is None:
+            if too_large:
+                # The same size would be refused again, so split it
+                half = len(pending) // 2
+                halves = await asyncio.gather(
+                    _fetch_batch(store, pending[:half], start, end, semaphore, limiter, write_lock, retries, backoff,
+                                 rng),
+                    _fetch_batch(store, pending[half:], start, end, semaphore, limiter, write_lock, retries, backoff,
+                                 rng))
+                return halves[0] + halves[1]
+            continue
+        # Written as soon as the batch arrives, on a worker thread but one batch at a time, since two
+        # gaps of the same ticker would otherwise merge into its files concurrently
+        async with write_lock:
+            pending = await asyncio.to_thread(store.save_download,
+                                              {ticker: frames.get(ticker, pd.DataFrame()) for ticker in pending},
+                                              start, end)
+        if not pending:
+            break
+    return pending
+
+async def fetch_universe_async(tickers, start_date, end_date, store=None, batch_size=DEFAULT_BATCH_SIZE,
+                               concurrency=DEFAULT_CONCURRENCY, rate_limit=DEFAULT_RATE_LIMIT, retries=3,
+                               backoff=1.0, seed=None):
+    """
+    Coroutine of fetch_universe.
+    """
+    if store is None:
+        store = PriceStore()
+    if store.downloader is download_prices:
+        # yf.download keeps module-global state and is not thread-safe: one request at a time,
+        # the batch size doing the work
+        concurrency = 1
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate_limit)
+    write_lock = asyncio.Lock()
+    rng = random.Random(seed)
+    tasks = []
+    for (start, end), gap_tickers in store.requests(tickers, start_date, end_date).items():
+        for first in range(0, len(gap_tickers), batch_size):
+            batch = gap_tickers[first:first + batch_size]
+            tasks.append(_fetch_batch(store, batch, start, end, semaphore, limiter, write_lock, retries, backoff, rng))
+    pending = set()
+    for batch_pending in await asyncio.gather(*tasks):
+        pending.update(batch_pending)
+    # A ticker whose gap could not be filled still has its stored history to work with
+    return [ticker for ticker in tickers
+            if ticker in pending and not len(store.read(ticker, ['Adj Close'], start_date, end_date))]
+
+def fetch_universe(tickers, start_date, end_date, store=None, batch_size=DEFAULT_BATCH_SIZE,
+                   concurrency=DEFAULT_CONCURRENCY, rate_limit=DEFAULT_RATE_LIMIT, retries=3, backoff=1.0, seed=None):
+    """
+    Bring the price store up to date for a whole universe with batched, throttled, retried downloads.
+
+    Only the date ranges the store lacks are requested. Tickers missing the
+    same range are grouped into multi-symbol requests of batch_size; at most
+    `concurrency` requests run at once and at most rate_limit start per
+    second. A batch the downloader refuses as too large (BatchTooLarge) is
+    split in two halves. A throttled request (RateLimited) holds back every
+    request start for the delay the service asked for. Any failed request,
+    or a ticker that comes back empty, is retried after a jittered
+    exponential backoff.
+    Every batch is written to the store as soon as it arrives.
+
+    Parameters:
+    tickers : list : ticker symbols
+    start_date : str : start date in YYYY-MM-DD format
+    end_date : str : end date (excluded) in YYYY-MM-DD format
+    store : PriceStore : store to fill, the default one if None (its downloader does the requests)
+    batch_size : int : tickers per request
+    concurrency : int : requests in flight at the same time (always 1 with the yfinance downloader)
+    rate_limit : float : requests started per second
+    retries : int : retries of a batch after its first attempt
+    backoff : float : base delay in seconds, doubled at every retry
+    seed : int : seed of the backoff jitter
+
+    Returns:
+    failed : list : tickers with no stored prices in the range after every retry (a ticker whose
+                    newest days could not be fetched keeps its stored history and is not listed)
+    """
+    return asyncio.run(fetch_universe_async(tickers, start_date, end_date, store, batch_size, concurrency,
+                                            rate_limit, retries, backoff, seed))
+
+def http_downloader(base_url, timeout=30):
+    """
+    PriceStore downloader reading CSV bars from an HTTP price service such as the stand-in server.
+
+    The service answers GET {base_url}/prices?symbols=A,B&start=...&end=... with one
+    CSV row per ticker and date (Date, Ticker and the PriceStore columns). It
+    answers 413 to a request with too many symbols and 429, with an optional
+    Retry-After header in seconds, when it throttles the client; these raise
+    BatchTooLarge and RateLimited.
+
+    Returns:
+    downloader : callable : function (tickers, start, end) -> {ticker: DataFrame}
+    """
+    def download(tickers, start, end):
+        query = urllib.parse.urlencode({'symbols': ','.join(tickers), 'start': start, 'end': end})
+        try:
+            with urllib.request.urlopen(f"{base_url}/prices?{query}", timeout=timeout) as response:
+                data = pd.read_csv(io.BytesIO(response.read()), parse_dates=['Date'])
+        except urllib.error.HTTPError as error:
+            if error.code == 413:
+                raise BatchTooLarge(error.reason) from error
+            if error.code == 429:
+                retry_after = error.headers.get('Retry-After')
+                raise RateLimited(float(retry_after) if retry_after else None) from error
+            raise
+        groups = dict(tuple(data.groupby('Ticker')))
+        return {ticker: groups[ticker].set_index('Date')[list(PriceStore.COLUMNS)] if ticker in groups
+                else pd.DataFrame() for ticker in tickers}
+    return download
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the price service: synthetic daily bars, with optional throttling and failures.
+
+    Every ticker gets a reproducible random walk over business days. The
+    server attributes set by serve_stand_in make a share of the requests fail
+    with 503, throttle another share with 429 and Retry-After, and reject
+    requests above max_symbols tickers with 413, so the retry, throttling
+    and batching paths can be exercised without the network.
+    """
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        server = self.server
+        server.request_count += 1
+        if url.path != '/prices':
+            self.send_error(404)
+            return
+        symbols = query.get('symbols', [''])[0].split(',')
+        if len(symbols) > server.max_symbols:
+            self.send_error(413, 'too many symbols')
+            return
+        with server.lock:
+            draw = server.rng.random()
+        if draw < server.failure_rate:
+            self.send_error(503, 'try again')
+            return
+        if draw < server.failure_rate + server.throttle_rate:
+            self.send_response(429, 'slow down')
+            self.send_header('Retry-After', str(server.retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        dates = pd.bdate_range(query['start'][0], query['end'][0], inclusive='left')
+        frames = []
+        for symbol in symbols:
+            if symbol in server.unknown:
+                continue
+            # Seeded by the symbol, and by the date through the cumulative index, so ranges stitch together
+            offsets = (dates - pd.Timestamp('2000-01-03')).days.to_numpy()
+            walk = np.random.default_rng(zlib.crc32(symbol.encode())).normal(0.0003, 0.015, 20000)
+            log_prices = np.cumsum(walk)[np.clip(offsets, 0, len(walk) - 1)]
+            close = 100 * np.exp(log_prices)
+            frames.append(pd.DataFrame({'Date': dates, 'Ticker': symbol, 'Open': close, 'High': close * 1.01,
+                                        'Low': close * 0.99, 'Close': close, 'Adj Close': close * 0.98,
+                                        'Volume': 1e6}))
+        body = pd.concat(frames).to_csv(index=False).encode() if frames else b'Date,Ticker\n'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_stand_in(port=0, failure_rate=0.0, max_symbols=50, unknown=(), seed=None, throttle_rate=0.0,
+                   retry_after=1):
+    """
+    Start the stand-in price service on a background thread.
+
+    Parameters:
+    port : int : port to listen on, 0 for any free port
+    failure_rate : float : share of requests answered with 503
+    max_symbols : int : largest batch accepted, bigger ones get 413
+    unknown : sequence : tickers the service has no data for
+    seed : int : seed of the simulated failures
+    throttle_rate : float : share of requests answered with 429
+    retry_after : float : seconds sent in the Retry-After header of a 429
+
+    Returns:
+    server : ThreadingHTTPServer : running server (call shutdown() to stop it), request_count counts requests
+    base_url : str : URL to pass to http_downloader
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), StandInHandler)
+    server.failure_rate = failure_rate
+    server.max_symbols = max_symbols
+    server.throttle_rate = throttle_rate
+    server.retry_after = retry_after
+    server.unknown = set(unknown)
+    server.rng = random.Random(seed)
+    server.lock = threading.Lock()
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    # Pull the scraped universe from the stand-in, with a third of the requests failing
+    tickers = pd.read_csv('company_codes.csv')['Company Code'].dropna().tolist()
+    server, base_url = serve_stand_in(failure_rate=0.3, seed=0)
+    store = PriceStore('price_cache_stand_in', downloader=http_downloader(base_url))
+    failed = fetch_universe(tickers, '2015-01-01', '2024-01-01', store, rate_limit=20, backoff=0.1, seed=0)
+    print(f"{len(tickers) - len(failed)} tickers stored in {server.request_count} requests, failed: {failed}")
+    server.shutdown()
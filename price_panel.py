@@ -0,0 +1,216 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+from price_store import fetch_prices
+
+# Directory of the shared price panel
+DEFAULT_PANEL = 'price_panel'
+
+def _write_matrix(path, matrix):
+    # Column-major so every ticker is one contiguous run; written aside and renamed so open readers keep the old file
+    temporary = path + '.tmp.npy'
+    out = open_memmap(temporary, mode='w+', dtype=np.float64, shape=matrix.shape, fortran_order=True)
+    out[...] = matrix
+    out.flush()
+    del out
+    os.replace(temporary, path)
+
+class PricePanel:
+    """
+    Date-aligned matrix of prices and returns of a universe, memory-mapped from disk.
+
+    The panel directory holds dates.npy, prices.npy and returns.npy (days x
+    tickers, Fortran order so each ticker column is contiguous) and
+    tickers.json with the column order and the date range it was built for.
+    The returns are computed once when the panel is built, with a NaN first
+    row so they share the date index of the prices; they are handed out as
+    they are whenever the selected tickers all trade on every day of the
+    range. Opening maps the files
+    read-only: processes on the same machine share one copy in the page
+    cache, and row ranges or a contiguous run of tickers are handed out as
+    views without copying. Any other ticker subset is gathered into a new
+    array of only those columns.
+
+    Attributes:
+    dates : ndarray : trading dates, shape (days,)
+    tickers : list : ticker of each column
+    start : str : first date the panel was built for, YYYY-MM-DD
+    end : str : end date (excluded) the panel was built for, YYYY-MM-DD
+    """
+
+    def __init__(self, dates, tickers, prices, returns, start, end):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.start = start
+        self.end = end
+        self._prices = prices
+        self._returns = returns
+        self._columns = {ticker: column for column, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def open(cls, path=DEFAULT_PANEL):
+        with open(os.path.join(path, 'tickers.json')) as file:
+            metadata = json.load(file)
+        return cls(np.load(os.path.join(path, 'dates.npy'), mmap_mode='r'), metadata['tickers'],
+                   np.load(os.path.join(path, 'prices.npy'), mmap_mode='r'),
+                   np.load(os.path.join(path, 'returns.npy'), mmap_mode='r'),
+                   metadata['start'], metadata['end'])
+
+    def covers(self, tickers, start, end):
+        """
+        Whether the panel was built for all these tickers over at least [start, end).
+        """
+        return self.start <= start and self.end >= end and all(ticker in self._columns for ticker in tickers)
+
+    def has_data(self, ticker):
+        return bool(np.isfinite(self._prices[:, self._columns[ticker]]).any())
+
+    def _select(self, matrix, tickers, start, end):
+        rows = slice(None if start is None else np.searchsorted(self.dates, np.datetime64(start, 'ns')),
+                     None if end is None else np.searchsorted(self.dates, np.datetime64(end, 'ns')))
+        if tickers is None:
+            return matrix[rows], self.tickers, rows
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        columns = np.array([self._columns[ticker] for ticker in tickers], dtype=np.intp)
+        if len(columns) and np.all(np.diff(columns) == 1):
+            # Consecutive columns: a plain view of the mapped file
+            return matrix[rows, columns[0]:columns[-1] + 1], tickers, rows
+        return matrix[rows][:, columns], tickers, rows
+
+    def prices(self, tickers=None, start=None, end=None):
+        """
+        Price matrix of some tickers (all if None) over [start, end), shape (days, tickers).
+        """
+        return self._select(self._prices, tickers, start, end)[0]
+
+    def returns(self, tickers=None, start=None, end=None, dropna=True):
+        """
+        Daily returns of some tickers (all if None) over [start, end), shape (days, tickers).
+
+        See returns_frame; the result stays a view when the tickers all trade every day.
+        """
+        return self.returns_frame(tickers, start, end, dropna).to_numpy()
+
+    def returns_frame(self, tickers=None, start=None, end=None, dropna=True):
+        """
+        Daily returns as a DataFrame indexed by date with one column per ticker.
+
+        With dropna, the returns are those of the selected tickers on their
+        own trading days, as prices.dropna().pct_change().dropna() would
+        give: a day the panel holds only for other tickers (another market's
+        session, a ticker listed later) is skipped rather than splitting a
+        return in two NaNs. Without it, the precomputed returns on every day
+        of the panel are returned, NaN where a price is missing.
+        """
+        matrix, tickers, rows = self._select(self._returns, tickers, start, end)
+        # The first day of the range has no return within it
+        dates = self.dates[rows][1:]
+        matrix = matrix[1:]
+        if dropna:
+            prices = self._select(self._prices, tickers, start, end)[0]
+            traded = np.isfinite(prices).all(axis=1)
+            if not traded.all():
+                # Ratios between the consecutive days all the selected tickers trade
+                prices, dates = prices[traded], self.dates[rows][traded]
+                matrix, dates = prices[1:] / prices[:-1] - 1, dates[1:]
+        return pd.DataFrame(matrix, index=pd.DatetimeIndex(dates, name='Date'), columns=tickers, copy=False)
+
+    def prices_frame(self, tickers=None, start=None, end=None):
+        """
+        Prices as a DataFrame indexed by date with one column per ticker.
+        """
+        matrix, tickers, rows = self._select(self._prices, tickers, start, end)
+        return pd.DataFrame(matrix, index=pd.DatetimeIndex(self.dates[rows], name='Date'), columns=tickers, copy=False)
+
+def build_panel(tickers, start_date, end_date, path=DEFAULT_PANEL, store=None, fetched=()):
+    """
+    Build (or rebuild) the panel of a universe from the price store and precompute its returns.
+
+    Parameters:
+    tickers : list : ticker symbols, in column order
+    start_date : str : start date in YYYY-MM-DD format
+    end_date : str : end date (excluded) in YYYY-MM-DD format
+    path : str : directory of the panel
+    store : PriceStore : price store to read from, the default one if None
+    fetched : collection : tickers already brought up to date in the store, not downloaded again
+
+    Returns:
+    panel : PricePanel : the new panel, memory-mapped
+    """
+    frame = fetch_prices(list(tickers), start_date, end_date, store=store, fetched=fetched)
+    prices = frame.to_numpy(dtype=float)
+    returns = np.full_like(prices, np.nan)
+    returns[1:] = prices[1:] / prices[:-1] - 1
+    return _write_panel(path, tickers, frame.index.values, prices, returns, start_date, end_date)
+
+def _write_panel(path, tickers, dates, prices, returns, start_date, end_date):
+    os.makedirs(path, exist_ok=True)
+    _write_matrix(os.path.join(path, 'prices.npy'), prices)
+    _write_matrix(os.path.join(path, 'returns.npy'), returns)
+    np.save(os.path.join(path, 'dates.tmp.npy'), np.asarray(dates).astype('datetime64[ns]'))
+    os.replace(os.path.join(path, 'dates.tmp.npy'), os.path.join(path, 'dates.npy'))
+    with open(os.path.join(path, 'tickers.json'), 'w') as file:
+        json.dump({'tickers': list(tickers), 'start': start_date, 'end': end_date}, file)
+    return PricePanel.open(path)
+
+def _extend_panel(panel, end_date, path, store, fetched):
+    # Read from the store only the panel's last day and the days after it
+    last = pd.Timestamp(panel.dates[-1])
+    frame = fetch_prices(panel.tickers, last.strftime('%Y-%m-%d'), end_date, store=store, fetched=fetched)
+    if not len(frame) or frame.index[0] != last or not np.allclose(frame.iloc[0].to_numpy(dtype=float),
+                                                                   panel._prices[-1], rtol=1e-9, equal_nan=True):
+        # The store re-based the history since the panel was built, so the stored rows are stale
+        return None
+    new_prices = frame.iloc[1:].to_numpy(dtype=float)
+    previous = np.vstack([panel._prices[-1:], new_prices[:-1]])
+    prices = np.vstack([panel._prices, new_prices])
+    returns = np.vstack([panel._returns, new_prices / previous - 1])
+    dates = np.concatenate([panel.dates, frame.index.values[1:].astype('datetime64[ns]')])
+    return _write_panel(path, panel.tickers, dates, prices, returns, panel.start, end_date)
+
+def load_panel(tickers, start_date, end_date, path=DEFAULT_PANEL, store=None, fetched=()):
+    """
+    Open the shared panel, rebuilding it first if it lacks some of the tickers or dates.
+
+    A panel that only lacks the newest days is extended: the store is read
+    for the days after its last one, whose returns are appended to the rows
+    already computed. A new ticker, an earlier start or a history the store
+    has re-based since (a dividend or split) rebuilds the panel, keeping
+    the tickers and dates already in it and adding the new ones, so the
+    scripts working on different universes converge on one shared panel.
+
+    Parameters:
+    tickers : list : ticker symbols needed
+    start_date : str : start date in YYYY-MM-DD format
+    end_date : str : end date (excluded) in YYYY-MM-DD format
+    path : str : directory of the panel
+    store : PriceStore : price store to rebuild from, the default one if None
+    fetched : collection : tickers already brought up to date in the store (e.g. by
+                           price_fetcher.fetch_universe), read without downloading again
+
+    Returns:
+    panel : PricePanel : a panel covering the request, memory-mapped
+    """
+    if os.path.exists(os.path.join(path, 'tickers.json')):
+        panel = PricePanel.open(path)
+        if panel.covers(tickers, start_date, end_date):
+            return panel
+        if panel.covers(tickers, start_date, panel.end) and len(panel.dates):
+            extended = _extend_panel(panel, end_date, path, store, fetched)
+            if extended is not None:
+                return extended
+        tickers = panel.tickers + [ticker for ticker in tickers if ticker not in panel.tickers]
+        start_date, end_date = min(start_date, panel.start), max(end_date, panel.end)
+    return build_panel(tickers, start_date, end_date, path, store, fetched)
+
+def fetch_returns(tickers, start_date, end_date, path=DEFAULT_PANEL):
+    """
+    Daily returns of some tickers from the shared panel on the days they all trade, as
+    data.dropna().pct_change().dropna() would give.
+
+    Returns:
+    daily_returns : DataFrame : returns indexed by date, one column per ticker in the given order
+    """
+    return load_panel(tickers, start_date, end_date, path).returns_frame(tickers, start_date, end_date)
@@ -0,0 +1,288 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# Directory of the on-disk price store
+DEFAULT_ROOT = 'price_cache'
+
+# A gap this short (in calendar days) may hold no trading day at all: a weekend plus a holiday
+EMPTY_GAP_DAYS = 4
+
+# Calendar days of stored history downloaded again before a gap, to detect a new adjustment
+OVERLAP_DAYS = 7
+
+# Columns scaled by a split, and the relative change of an overlap bar read as a new adjustment
+SPLIT_COLUMNS = ('Open', 'High', 'Low', 'Close')
+ADJUSTMENT_TOLERANCE = 1e-6
+
+def _day(date):
+    return pd.Timestamp(date).strftime('%Y-%m-%d')
+
+def _column_file(column):
+    return column.lower().replace(' ', '_') + '.npy'
+
+def _save(path, array):
+    # Write next to the target and rename, so a reader never sees a half-written file
+    temporary = path + '.tmp.npy'
+    np.save(temporary, array)
+    os.replace(temporary, path)
+
+def _rebase(stored, frame):
+    # Rescale stored bars to the adjustment basis of a new download, from the latest day both hold
+    common = stored.index.intersection(frame.index)
+    if not len(common):
+        return stored
+    day = common[-1]
+    stored = stored.copy()
+    close_ratio = frame.at[day, 'Close'] / stored.at[day, 'Close']
+    if np.isfinite(close_ratio) and close_ratio > 0 and abs(close_ratio - 1) > ADJUSTMENT_TOLERANCE:
+        # A split rescales the raw prices and the volume too
+        stored[list(SPLIT_COLUMNS)] *= close_ratio
+        stored['Volume'] /= close_ratio
+    adjusted_ratio = frame.at[day, 'Adj Close'] / stored.at[day, 'Adj Close']
+    if np.isfinite(adjusted_ratio) and adjusted_ratio > 0 and abs(adjusted_ratio - 1) > ADJUSTMENT_TOLERANCE:
+        stored['Adj Close'] *= adjusted_ratio
+    return stored
+
+def _merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def download_prices(tickers, start, end):
+    """
+    Download daily bars of several tickers over one date range with yfinance.
+
+    Prices are requested unadjusted (auto_adjust=False) so both 'Close' and
+    'Adj Close' are kept.
+
+    Parameters:
+    tickers : list : ticker symbols
+    start : str : first date, YYYY-MM-DD
+    end : str : end date (excluded), YYYY-MM-DD
+
+    Returns:
+    frames : dict : DataFrame of the PriceStore columns of each ticker, possibly empty
+    """
+    data = yf.download(tickers, start=start, end=end, auto_adjust=False, progress=False)
+    frames = {}
+    for ticker in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            frame = data.xs(ticker, axis=1, level=-1) if ticker in data.columns.get_level_values(-1) else pd.DataFrame()
+        else:
+            frame = data
+        frames[ticker] = frame.reindex(columns=PriceStore.COLUMNS).dropna(how='all')
+    return frames
+
+class PriceStore:
+    """
+    Persistent per-ticker store of daily prices, filled incrementally.
+
+    Each ticker has a directory holding one .npy file per column (dates,
+    open, high, low, close, adj_close, volume) and a coverage.json listing
+    the date ranges already downloaded. A query only downloads the parts of
+    its range not covered yet, all tickers missing the same range in one
+    batched request, and reads the rest from memory-mapped files. The
+    current day is never marked as covered, since its bar is still moving.
+
+    Yahoo re-adjusts the whole history after every dividend or split, so a
+    gap that continues stored history is downloaded from OVERLAP_DAYS
+    earlier. When the last bar of the overlap no longer matches the stored
+    one, the stored history is rescaled onto the new basis ('Adj Close'
+    for a dividend, the raw prices and the volume as well for a split)
+    before the new bars are appended.
+
+    Attributes:
+    root : str : directory of the store
+    downloader : callable : function (tickers, start, end) -> {ticker: DataFrame}, download_prices by default
+    """
+
+    COLUMNS = ('Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume')
+
+    def __init__(self, root=DEFAULT_ROOT, downloader=download_prices):
+        self.root = root
+        self.downloader = downloader
+
+    def _directory(self, ticker):
+        return os.path.join(self.root, ticker.replace(os.sep, '_'))
+
+    def coverage(self, ticker):
+        """
+        Downloaded date ranges of a ticker, as a list of [start, end) YYYY-MM-DD pairs.
+        """
+        path = os.path.join(self._directory(ticker), 'coverage.json')
+        if not os.path.exists(path):
+            return []
+        with open(path) as file:
+            return json.load(file)['coverage']
+
+    def missing(self, ticker, start, end):
+        """
+        Parts of [start, end) not downloaded yet for a ticker, as a list of (start, end) pairs.
+        """
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self.coverage(ticker):
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def read(self, ticker, columns=COLUMNS, start=None, end=None):
+        """
+        Stored bars of a ticker between start (included) and end (excluded), served from disk.
+
+        Returns:
+        frame : DataFrame : requested columns indexed by date, empty if nothing is stored
+        """
+        directory = self._directory(ticker)
+        if not os.path.exists(os.path.join(directory, 'dates.npy')):
+            return pd.DataFrame(columns=list(columns), index=pd.DatetimeIndex([], name='Date'))
+        dates = np.load(os.path.join(directory, 'dates.npy'), mmap_mode='r')
+        low = 0 if start is None else np.searchsorted(dates, np.datetime64(start, 'ns'))
+        high = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, 'ns'))
+        frame = pd.DataFrame({column: np.load(os.path.join(directory, _column_file(column)), mmap_mode='r')[low:high]
+                              for column in columns},
+                             index=pd.DatetimeIndex(dates[low:high], name='Date'))
+        return frame
+
+    def write(self, ticker, frame, covered):
+        """
+        Merge new bars of a ticker into the store and record the date ranges they cover.
+
+        Parameters:
+        ticker : str : ticker symbol
+        frame : DataFrame : new bars with the PriceStore columns, indexed by date
+        covered : list : (start, end) date ranges the download covered
+        """
+        directory = self._directory(ticker)
+        os.makedirs(directory, exist_ok=True)
+        if len(frame):
+            index = pd.DatetimeIndex(frame.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            frame = frame.set_axis(index.normalize().rename('Date')).reindex(columns=self.COLUMNS).astype(float)
+            stored = self.read(ticker)
+            if len(stored):
+                frame = pd.concat([_rebase(stored, frame), frame])
+            # New bars replace stored ones of the same day (revised adjustments)
+            frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+            for column in self.COLUMNS:
+                _save(os.path.join(directory, _column_file(column)), frame[column].to_numpy())
+            _save(os.path.join(directory, 'dates.npy'), frame.index.values.astype('datetime64[ns]'))
+        coverage = _merge_intervals(self.coverage(ticker) + [list(interval) for interval in covered])
+        with open(os.path.join(directory, 'coverage.json'), 'w') as file:
+            json.dump({'coverage': coverage}, file)
+
+    def requests(self, tickers, start, end):
+        """
+        Downloads needed to cover [start, end) for each ticker, grouped by missing range.
+
+        A gap that follows stored coverage starts OVERLAP_DAYS earlier, so
+        its download also returns bars already stored to compare with.
+
+        Returns:
+        requests : dict : list of tickers lacking each (start, end) range
+        """
+        start, end = _day(start), min(_day(end), _day(pd.Timestamp.today()))
+        requests = {}
+        for ticker in tickers:
+            coverage = self.coverage(ticker)
+            for gap_start, gap_end in self.missing(ticker, start, end):
+                if any(covered_start < gap_start for covered_start, _ in coverage):
+                    gap_start = _day(pd.Timestamp(gap_start) - pd.Timedelta(days=OVERLAP_DAYS))
+                requests.setdefault((gap_start, gap_end), []).append(ticker)
+        return requests
+
+    def save_download(self, frames, start, end):
+        """
+        Write the downloaded bars of a range and mark it covered.
+
+        A range is marked as covered when data came back, when it holds no
+        weekday at all, or when it is short enough to be a holiday and other
+        tickers of the same download did get data. An empty answer could
+        also be a failed download, so anything else is retried on the next
+        query.
+
+        Returns:
+        failed : list : tickers that got no data
+        """
+        weekend = len(pd.bdate_range(start, end, inclusive='left')) == 0
+        # Other tickers getting bars shows the download itself went through
+        holiday = ((pd.Timestamp(end) - pd.Timestamp(start)).days <= EMPTY_GAP_DAYS
+                   and any(len(frame) for frame in frames.values()))
+        failed = []
+        for ticker, frame in frames.items():
+            if len(frame) or weekend or holiday:
+                self.write(ticker, frame, [(start, end)])
+            else:
+                failed.append(ticker)
+        return failed
+
+    def update(self, tickers, start, end):
+        """
+        Download whatever part of [start, end) the store lacks for each ticker.
+
+        Tickers missing the same ranges are downloaded together.
+        """
+        for (gap_start, gap_end), gap_tickers in self.requests(tickers, start, end).items():
+            frames = self.downloader(gap_tickers, gap_start, gap_end)
+            self.save_download({ticker: frames.get(ticker, pd.DataFrame()) for ticker in gap_tickers}, gap_start, gap_end)
+
+    def get(self, tickers, start, end, column='Adj Close', fetched=()):
+        """
+        One price column of several tickers over [start, end), downloading only what is missing.
+
+        Parameters:
+        tickers : str or list : ticker symbol, or list of ticker symbols
+        start : str : first date, YYYY-MM-DD
+        end : str : end date (excluded), YYYY-MM-DD
+        column : str : one of PriceStore.COLUMNS
+        fetched : collection : tickers already brought up to date (by price_fetcher.fetch_universe),
+                               read as stored without downloading their remaining gaps again
+
+        Returns:
+        prices : Series or DataFrame : prices of a single ticker, or one column per ticker in the given order
+        """
+        single = isinstance(tickers, str)
+        symbols = [tickers] if single else list(tickers)
+        start, end = _day(start), _day(end)
+        self.update([ticker for ticker in symbols if ticker not in fetched], start, end)
+        series = [self.read(ticker, [column], start, end)[column].rename(ticker) for ticker in symbols]
+        if single:
+            return series[0]
+        return pd.concat(series, axis=1)
+
+def fetch_prices(tickers, start_date, end_date, column='Adj Close', store=None, fetched=()):
+    """
+    Daily prices of one or several tickers through the local PriceStore.
+
+    Drop-in replacement for yf.download(tickers, start=start_date, end=end_date)['Adj Close']:
+    repeated queries are served from disk and only new dates are downloaded.
+
+    Parameters:
+    tickers : str or list : ticker symbol, or list of ticker symbols
+    start_date : str : start date in YYYY-MM-DD format
+    end_date : str : end date (excluded) in YYYY-MM-DD format
+    column : str : price column, 'Adj Close' or 'Close' for the raw close
+    store : PriceStore : store to use, the default one under DEFAULT_ROOT if None
+    fetched : collection : tickers already brought up to date, not downloaded again
+
+    Returns:
+    prices : Series or DataFrame : prices of a single ticker, or one column per ticker in the given order
+    """
+    if store is None:
+        store = PriceStore()
+    return store.get(tickers, start_date, end_date, column, fetched)
@@ -0,0 +1,24 @@
+import numpy as np
+from mc_bs import estimate_option_price, calculate_greeks, black_scholes_price, clear_simulation_cache
+from mc_parallel import DEFAULT_BLOCK_SIZE
+
+S0, K, r, sigma, T, M = 100, 105, 0.05, 0.2, 1.0, 12
+
+# Four parallel blocks, so antithetic pairs have to be matched block by block
+I = 4 * DEFAULT_BLOCK_SIZE
+
+def test_antithetic_beats_crude_past_one_block():
+    clear_simulation_cache()
+    estimate = estimate_option_price(S0, K, r, sigma, T, M, I, seed=1, antithetic=True)
+
+    assert estimate['std_error'] < estimate['plain_std_error']
+    assert abs(estimate['price'] - black_scholes_price(S0, K, r, sigma, T)) < 4 * estimate['std_error']
+
+def test_antithetic_greeks_std_errors_shrink_past_one_block():
+    clear_simulation_cache()
+    crude = calculate_greeks(S0, K, r, sigma, T, M, I, seed=1)
+    greeks = calculate_greeks(S0, K, r, sigma, T, M, I, seed=1, antithetic=True)
+
+    for name in ['price', 'delta', 'vega']:
+        assert greeks['std_errors'][name] < crude['std_errors'][name]
+    assert np.isfinite(list(greeks['std_errors'].values())).all()
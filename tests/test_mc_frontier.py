@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+from mc_frontier import efficient_frontier
+from pf_optimizer import optimize_portfolio
+
+def _problem(seed, assets, tied=False):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(assets, assets))
+    cov_matrix = factors @ factors.T * 0.04 + np.eye(assets) * 0.01
+    mean_returns = rng.uniform(0.02, 0.2, assets)
+    if tied:
+        # The two best assets tie on return
+        mean_returns[1] = mean_returns[0] = mean_returns.max()
+    return mean_returns, cov_matrix
+
+def _min_volatility(cov_matrix, lower, upper):
+    assets = len(cov_matrix)
+    result = minimize(lambda w: w @ cov_matrix @ w, np.full(assets, 1 / assets), jac=lambda w: 2 * cov_matrix @ w,
+                      method='SLSQP', bounds=[(lower, upper)] * assets,
+                      constraints={'type': 'eq', 'fun': lambda w: w.sum() - 1}, options={'ftol': 1e-15})
+    return np.sqrt(result.fun)
+
+CASES = [
+    # Ties on the best return, with and without binding bounds
+    (0, 3, True, 0.0, 1.0),
+    (0, 3, True, 0.2, 0.4),
+    (5, 6, True, 0.0, 1.0),
+    (5, 6, True, 0.05, 0.3),
+    # Several assets hitting their bounds along the frontier
+    (18, 6, False, 0.05, 0.4),
+    (7, 6, False, 0.05, 0.25),
+    (11, 8, False, 0.0, 0.3),
+]
+
+@pytest.mark.parametrize('seed, assets, tied, lower, upper', CASES)
+def test_frontier_matches_slsqp(seed, assets, tied, lower, upper):
+    mean_returns, cov_matrix = _problem(seed, assets, tied)
+    frontier = efficient_frontier(mean_returns, cov_matrix, 0.01, lower_bounds=lower, upper_bounds=upper)
+    result = optimize_portfolio(mean_returns, cov_matrix, 0.01, bounds=(lower, upper), x0=np.full(assets, 1 / assets),
+                                options={'ftol': 1e-12, 'maxiter': 1000})
+
+    assert np.isclose(frontier['max_sharpe']['sharpe'], -result.fun, rtol=1e-6)
+    assert np.isclose(frontier['min_volatility']['volatility'], _min_volatility(cov_matrix, lower, upper), rtol=1e-6)
+    weights = frontier['turning_points']
+    assert np.allclose(weights.sum(axis=1), 1)
+    assert (weights >= lower - 1e-9).all() and (weights <= upper + 1e-9).all()
+
+def test_equal_returns_give_a_single_point():
+    _, cov_matrix = _problem(3, 5)
+    frontier = efficient_frontier(np.full(5, 0.1), cov_matrix, 0.01, lower_bounds=0.05, upper_bounds=0.4)
+
+    assert np.allclose(frontier['turning_points'], frontier['min_volatility']['weights'])
+    assert np.isclose(frontier['min_volatility']['volatility'], _min_volatility(cov_matrix, 0.05, 0.4), rtol=1e-6)
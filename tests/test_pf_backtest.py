@@ -0,0 +1,37 @@
+import numpy as np
+from pf_backtest import walk_forward, summarize_backtest
+
+def _returns(seed=0, days=300, assets=4):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.0005, 0.01, (days, assets)) + rng.normal(0, 0.005, (days, 1))
+
+def test_initial_allocation_is_not_charged():
+    returns = _returns()
+    free = walk_forward(returns, window=100, rebalance=50)
+    costly = walk_forward(returns, window=100, rebalance=50, transaction_cost=0.01)
+
+    assert len(free['turnover']) == len(free['rebalances']) - 1
+    assert np.isclose(free['initial_turnover'], 1)
+    # Only the later rebalances pay
+    assert costly['returns'][0] == free['returns'][0]
+    assert costly['returns'][50] < free['returns'][50]
+    assert summarize_backtest(free)['mean_turnover'] == free['turnover'].mean()
+
+def test_failed_first_solve_starts_from_equal_weights():
+    # No portfolio reaches a volatility this low, so every solve fails
+    backtest = walk_forward(_returns(), window=100, rebalance=50, max_risk=1e-6)
+
+    np.testing.assert_allclose(backtest['weights'][0], 0.25)
+    assert backtest['turnover'].max() == 0
+
+def test_long_short_weights_drift_with_holdings():
+    returns = _returns(1)
+    window, days = 100, 100
+    backtest = walk_forward(returns[:window + days], window=window, rebalance=days + 1, risk_free_rate=0.0,
+                            bounds=(-1.5, 1.5), budget=0.2)
+    weights = backtest['weights'][0]
+
+    # Buy and hold: every position grows with its asset and the rest is cash at a zero rate, the
+    # net sum of a long-short book being too small to rescale the weights by
+    holdings = weights * np.cumprod(1 + returns[window:window + days], axis=0)
+    np.testing.assert_allclose(backtest['wealth'], holdings.sum(axis=1) + 1 - weights.sum())
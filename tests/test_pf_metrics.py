@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+from pf_metrics import risk_metrics
+
+def test_information_ratio_pairs_days_with_the_benchmark():
+    dates = pd.bdate_range('2020-01-01', periods=300)
+    rng = np.random.default_rng(0)
+    benchmark = pd.Series(rng.normal(0.001, 0.01, 300), index=dates)
+    returns = pd.DataFrame({'LATE': benchmark + rng.normal(0.0002, 0.002, 300)})
+    # Listed halfway, while the benchmark has a return every day
+    returns.iloc[:150] = np.nan
+
+    metrics = risk_metrics(returns, benchmark)
+
+    active = (returns['LATE'] - benchmark).dropna()
+    expected = active.mean() * 252 / (active.std() * np.sqrt(252))
+    assert np.isclose(metrics.loc['LATE', 'Information Ratio'], expected)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from price_store import PriceStore
+from price_panel import build_panel, load_panel
+from test_price_store import StubDownloader, _bars
+
+def _store(tmp_path):
+    dates = pd.bdate_range('2020-01-01', '2020-06-01', inclusive='left')
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(dates))))
+    downloader = StubDownloader(_bars(dates, close, close))
+    return PriceStore(str(tmp_path / 'store'), downloader=downloader), downloader, dates, close
+
+def test_newer_end_appends_rows(tmp_path):
+    store = _store(tmp_path)[0]
+    load_panel(['AAA', 'BBB'], '2020-01-01', '2020-03-01', str(tmp_path / 'panel'), store)
+    reads = []
+    read = store.read
+
+    def spy(ticker, columns=PriceStore.COLUMNS, start=None, end=None):
+        if list(columns) == ['Adj Close']:
+            reads.append(start)
+        return read(ticker, columns, start, end)
+    store.read = spy
+
+    panel = load_panel(['AAA', 'BBB'], '2020-01-01', '2020-04-01', str(tmp_path / 'panel'), store)
+
+    # The panel reads only its last day and the new ones, and the result is the panel a rebuild would give
+    store.read = read
+    assert reads and all(start >= '2020-02-28' for start in reads)
+    rebuilt = build_panel(['AAA', 'BBB'], '2020-01-01', '2020-04-01', str(tmp_path / 'rebuilt'), store)
+    assert panel.end == '2020-04-01'
+    np.testing.assert_array_equal(panel.dates, rebuilt.dates)
+    np.testing.assert_allclose(panel.prices(), rebuilt.prices())
+    np.testing.assert_allclose(panel.returns(dropna=False), rebuilt.returns(dropna=False))
+
+def test_rebased_store_rebuilds(tmp_path):
+    store, downloader, dates, close = _store(tmp_path)
+    load_panel(['AAA'], '2020-01-01', '2020-03-01', str(tmp_path / 'panel'), store)
+
+    # A dividend lowers the whole adjusted history before the next download
+    downloader.bars = _bars(dates, close, close * 0.98)
+    panel = load_panel(['AAA'], '2020-01-01', '2020-04-01', str(tmp_path / 'panel'), store)
+
+    np.testing.assert_allclose(panel.prices()[:, 0], close[dates < '2020-04-01'] * 0.98)
+    assert np.nanmax(np.abs(panel.returns())) < 0.05
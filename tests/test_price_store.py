@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from price_store import PriceStore
+
+def _bars(dates, close, adjusted, volume=1e6):
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                         'Adj Close': adjusted, 'Volume': volume}, index=dates)
+
+class StubDownloader:
+    """
+    Serves one ticker's bars on the adjustment basis set by the test, recording the requested ranges.
+    """
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.requests = []
+
+    def __call__(self, tickers, start, end):
+        self.requests.append((start, end))
+        window = self.bars[(self.bars.index >= start) & (self.bars.index < end)]
+        return {ticker: window for ticker in tickers}
+
+def _history():
+    dates = pd.bdate_range('2020-01-01', '2020-03-01', inclusive='left')
+    close = np.linspace(100, 110, len(dates))
+    return dates, close
+
+def test_dividend_rescales_stored_adjusted_close(tmp_path):
+    dates, close = _history()
+    downloader = StubDownloader(_bars(dates, close, close))
+    store = PriceStore(str(tmp_path), downloader=downloader)
+    store.get('AAA', '2020-01-01', '2020-02-01')
+
+    # A dividend after the first download lowers every earlier adjusted close by 2%
+    downloader.bars = _bars(dates, close, close * 0.98)
+    prices = store.get('AAA', '2020-01-01', '2020-03-01')
+
+    assert downloader.requests[-1][0] < '2020-02-01'
+    np.testing.assert_allclose(prices.to_numpy(), close * 0.98)
+    assert np.abs(prices.pct_change().dropna()).max() < 0.01
+
+def test_split_rescales_stored_prices_and_volume(tmp_path):
+    dates, close = _history()
+    downloader = StubDownloader(_bars(dates, close, close))
+    store = PriceStore(str(tmp_path), downloader=downloader)
+    store.get('AAA', '2020-01-01', '2020-02-01')
+
+    # A 10:1 split after the first download divides every earlier price by 10
+    downloader.bars = _bars(dates, close / 10, close / 10, volume=1e7)
+    store.get('AAA', '2020-01-01', '2020-03-01')
+    stored = store.read('AAA')
+
+    np.testing.assert_allclose(stored['Adj Close'].to_numpy(), close / 10)
+    np.testing.assert_allclose(stored['Close'].to_numpy(), close / 10)
+    np.testing.assert_allclose(stored['Volume'].to_numpy(), 1e7)
+    assert stored['Adj Close'].pct_change().dropna().min() > -0.01
+
+def test_unchanged_basis_keeps_stored_bars(tmp_path):
+    dates, close = _history()
+    downloader = StubDownloader(_bars(dates, close, close))
+    store = PriceStore(str(tmp_path), downloader=downloader)
+    store.get('AAA', '2020-01-01', '2020-02-01')
+    prices = store.get('AAA', '2020-01-01', '2020-03-01')
+
+    np.testing.assert_allclose(prices.to_numpy(), close)
+    assert store.coverage('AAA') == [['2020-01-01', '2020-03-01']]